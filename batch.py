@@ -0,0 +1,360 @@
+"""
+여러 권의 책 리뷰를 사용자 입력 없이 한 번에 생성하는 배치 실행 진입점
+
+사용법:
+    python batch.py books.jsonl --workers 4 --llm-concurrency 8 --output-dir reviews
+
+매니페스트는 JSONL 또는 CSV 형식이며, 한 줄(행)이 책 한 권입니다.
+    - title, author: 필수
+    - answers: 인터뷰 질문에 대한 답변 리스트 (질문 순서대로, 질문보다 많으면 남는 답변은 '추가 답변'으로 넘김)
+    - subtopics: 사용할 소제목. 문자열이면 그대로 사용하고, 숫자면 생성된 후보 중 해당 번호(1부터)를 선택
+    - chapter_answers: 소제목별 가이드 질문 답변 리스트 (없으면 인터뷰 답변으로 챕터 작성)
+    - output: 결과 파일 이름 (없으면 '{title}_review.txt')
+CSV에서는 리스트 값을 '|'로 구분하고, chapter_answers는 JSON 문자열로 적습니다.
+"""
+import os
+import sys
+import csv
+import math
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import llm_client
+from utils import tasks, prompt_builder, routing
+from utils.trace import tracer, summary_table, TRACE_PATH
+from pipeline import startup_pipeline
+from outline_generator import generate_subtopics
+from question_generator import generate_guided_questions
+from review_writer import write_chapter_from_answers
+from utils.io import format_review, save_review_to_file
+
+# 결과 요약에 표시할 단계 순서
+STAGES = ["book_info", "reviews", "review_filter", "review_analysis", "interview_questions", "subtopics", "chapters", "save"]
+
+DEFAULT_SUBTOPIC_COUNT = 3
+
+def load_manifest(path: str) -> list:
+    """JSONL 또는 CSV 매니페스트를 읽어 책 작업 리스트를 반환합니다."""
+    jobs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                jobs.append(_normalize_csv_row(row))
+        else:
+            for line in f:
+                if line.strip():
+                    jobs.append(json.loads(line))
+
+    for idx, job in enumerate(jobs, start=1):
+        if not job.get("title") or not job.get("author"):
+            raise ValueError(f"매니페스트 {idx}번째 항목에 title/author가 없습니다.")
+    return jobs
+
+def _normalize_csv_row(row: dict) -> dict:
+    job = {k: v for k, v in row.items() if v not in (None, "")}
+    for field in ("answers", "subtopics"):
+        if field in job:
+            job[field] = [item.strip() for item in job[field].split("|") if item.strip()]
+    if "chapter_answers" in job:
+        job["chapter_answers"] = json.loads(job["chapter_answers"])
+    return job
+
+def select_subtopics(candidates: list, choices: list = None, default_count: int = DEFAULT_SUBTOPIC_COUNT) -> list:
+    """
+    매니페스트에 지정된 선택지로 소제목을 고릅니다.
+    숫자는 후보 번호(1부터), 문자열은 소제목 그대로 사용하며, 지정이 없으면 앞에서부터 default_count개를 사용합니다.
+    """
+    if not choices:
+        return candidates[:default_count]
+
+    selected = []
+    for choice in choices:
+        if isinstance(choice, int) or str(choice).isdigit():
+            idx = int(choice) - 1
+            if 0 <= idx < len(candidates):
+                selected.append(candidates[idx])
+        else:
+            selected.append(str(choice))
+    return selected
+
+def pair_answers(questions: list, answers: list, title: str = "") -> dict:
+    """
+    질문과 답변을 순서대로 짝지어 {질문: 답변} 딕셔너리를 만듭니다. 빈 답변은 뺍니다.
+    질문보다 답변이 많으면 남는 답변을 버리지 않고 '추가 답변 N' 항목으로 붙이고 경고를 출력합니다.
+    """
+    qa = {q: a for q, a in zip(questions, answers) if a}
+    extra = [a for a in answers[len(questions):] if a]
+    if extra:
+        print(f"⚠️ 『{title}』 답변이 질문보다 {len(answers) - len(questions)}개 많아 '추가 답변'으로 함께 넘깁니다.")
+        for idx, answer in enumerate(extra, start=1):
+            qa[f"추가 답변 {idx}"] = answer
+    return qa
+
+def output_filename(job: dict) -> str:
+    """결과 파일 이름을 만듭니다. 파일 시스템에서 쓸 수 없는 문자는 '_'로 바꿉니다."""
+    name = job.get("output") or f"{job['title']}_review.txt"
+    return "".join("_" if c in '\\/:*?"<>|' else c for c in name)
+
+def review_book(job: dict, output_dir: str, timeout: float = None) -> dict:
+    """
+    책 한 권에 대해 전체 리뷰 생성 과정을 입력 없이 실행하고 결과 파일을 저장합니다.
+    timeout(초)을 넘기면 진행 중인 LLM/HTTP 요청을 취소하고 실패로 기록합니다.
+
+    :return: 제목, 파일 경로, 단계별 소요 시간·프롬프트 토큰 수, 오류 메시지를 담은 딕셔너리
+    """
+    title, author = job["title"], job["author"]
+    timings = {}
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        try:
+            with tracer.span(stage, "stage"):
+                return func(*args)
+        finally:
+            timings[stage] = time.perf_counter() - start
+
+    result = {"title": title, "author": author, "timings": timings, "path": None, "error": None}
+    # 워커 프로세스는 한 번에 한 권만 처리하므로 프로세스 단위 집계를 책마다 초기화합니다.
+    prompt_builder.reset_stats()
+    llm_client.reset_cache_stats()
+    llm_client.reset_metrics()
+    routing.reset_stats()
+    tracer.reset()
+    start = time.perf_counter()
+    try:
+        with tasks.scope(timeout=timeout), tracer.span("book", "book", title=title):
+            # 책 정보·리뷰 수집부터 인터뷰 질문까지는 대화형 실행과 같은 그래프를 씁니다.
+            run, startup = startup_pipeline.start({"title": title, "author": author})
+            try:
+                startup.result()
+            finally:
+                timings.update(run.timings)
+            book_context = run["book_info"]
+            review_points = run["review_analysis"]
+            questions = run["interview_questions"]
+            answers = job.get("answers") or []
+            interview_qa = pair_answers(questions, answers, title)
+
+            candidates = timed("subtopics", generate_subtopics, answers, book_context, review_points, title)
+            subtopics = select_subtopics(candidates, job.get("subtopics"))
+            if not subtopics:
+                raise Exception("소제목 생성에 실패했습니다.")
+
+            chapter_answers = job.get("chapter_answers") or {}
+
+            def write_chapter(subtopic):
+                supplied = chapter_answers.get(subtopic)
+                if supplied:
+                    guided = generate_guided_questions(subtopic, book_context, review_points)
+                    qa = pair_answers(guided, supplied, title)
+                else:
+                    qa = interview_qa
+                return {"title": subtopic, "content": write_chapter_from_answers(subtopic, qa, book_context, review_points)}
+
+            def write_chapters():
+                with ThreadPoolExecutor(max_workers=len(subtopics)) as executor:
+                    return list(executor.map(tasks.bind(write_chapter), subtopics))
+
+            chapters = timed("chapters", write_chapters)
+
+            path = os.path.join(output_dir, output_filename(job))
+            if not timed("save", save_review_to_file, format_review(title, chapters), path):
+                raise Exception(f"파일 저장에 실패했습니다: {path}")
+            result["path"] = path
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    result["prompt_tokens"] = {stage: entry["tokens"] for stage, entry in prompt_builder.stats().items()}
+    result["llm_cache"] = llm_client.cache_stats()
+    result["llm_metrics"] = llm_client.metrics()
+    result["routes"] = routing.stats()
+    result["elapsed"] = time.perf_counter() - start
+    if tracer.enabled:
+        result["trace"] = {"started_at": tracer.started_at, "spans": tracer.spans()}
+    return result
+
+def _init_worker(limiter, quiet: bool, trace: bool = False) -> None:
+    """
+    워커 프로세스 초기화: 공용 LLM 동시 요청 한도를 연결하고, 진행 표시를 끄며(헤드리스),
+    필요하면 단계별 출력을 숨기고 구간 기록을 켭니다.
+    """
+    llm_client.set_global_limiter(limiter)
+    tasks.set_headless(True)
+    if trace:
+        tracer.enable()
+    if quiet:
+        sys.stdout = open(os.devnull, 'w', encoding='utf-8')
+
+def percentile(values: list, pct: float) -> float:
+    """최근접 순위(nearest-rank) 방식의 백분위수를 반환합니다."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def print_summary(results: list, elapsed: float) -> None:
+    """처리량(권/분)과 단계별 p50/p95 소요 시간을 출력합니다."""
+    succeeded = [r for r in results if not r["error"]]
+    per_minute = len(succeeded) / elapsed * 60 if elapsed > 0 else 0.0
+
+    print("\n📊 배치 결과 요약")
+    print(f"- 성공 {len(succeeded)}권 / 실패 {len(results) - len(succeeded)}권, 총 {elapsed:.1f}초")
+    print(f"- 처리량: {per_minute:.2f}권/분")
+    print(f"\n{'단계':<22}{'p50(초)':>10}{'p95(초)':>10}")
+    for stage in STAGES + ["total"]:
+        if stage == "total":
+            values = [r["elapsed"] for r in succeeded]
+        else:
+            values = [r["timings"][stage] for r in results if stage in r["timings"]]
+        if values:
+            print(f"{stage:<22}{percentile(values, 50):>10.2f}{percentile(values, 95):>10.2f}")
+
+    prompt_stages = sorted({stage for r in results for stage in r.get("prompt_tokens", {})})
+    if prompt_stages:
+        print(f"\n{'프롬프트 단계':<22}{'평균 토큰':>10}{'최대 토큰':>10}")
+        for stage in prompt_stages:
+            values = [r["prompt_tokens"][stage] for r in results if stage in r.get("prompt_tokens", {})]
+            print(f"{stage:<22}{sum(values) / len(values):>10.0f}{max(values):>10}")
+
+    cache_totals = {}
+    for r in results:
+        for stage, entry in r.get("llm_cache", {}).items():
+            total = cache_totals.setdefault(stage, {"hits": 0, "near_hits": 0, "misses": 0})
+            for field in total:
+                total[field] += entry[field]
+    if cache_totals:
+        print(f"\n{'응답 캐시':<22}{'적중':>8}{'근사':>8}{'실패':>8}")
+        for stage in sorted(cache_totals):
+            total = cache_totals[stage]
+            print(f"{stage:<22}{total['hits']:>8}{total['near_hits']:>8}{total['misses']:>8}")
+
+    route_totals = {}
+    for r in results:
+        for route, entry in r.get("routes", {}).items():
+            merged = route_totals.setdefault(route, dict.fromkeys(entry, 0))
+            for field, value in entry.items():
+                merged[field] = max(merged[field], value) if field == "max_latency" else merged[field] + value
+    if route_totals:
+        print(f"\n{'경로(단계/모델)':<36}{'호출':>6}{'실패':>6}{'평균(초)':>10}{'최대(초)':>10}{'입력 토큰':>10}{'출력 토큰':>10}")
+        for route in sorted(route_totals):
+            entry = route_totals[route]
+            average = entry["latency"] / entry["calls"] if entry["calls"] else 0.0
+            print(f"{route:<36}{entry['calls']:>6}{entry['failures']:>6}{average:>10.2f}{entry['max_latency']:>10.2f}"
+                  f"{entry['prompt_tokens']:>10}{entry['completion_tokens']:>10}")
+
+    def total(name):
+        return sum(r.get("llm_metrics", {}).get(name, 0) for r in results)
+    if total("requests"):
+        print(f"\n- API 요청 {total('requests')}회, 재시도 {total('retries')}회 "
+              f"(레이트 리밋 {total('rate_limit')}, 서버 오류 {total('server')}, 연결 오류 {total('connection')}), "
+              f"차단 {total('rejected')}회")
+        print(f"- 속도 제한 대기 {total('throttle_seconds'):.1f}초, 재시도 대기 {total('retry_seconds'):.1f}초")
+
+def _merge_traces(results: list, started_at: float) -> list:
+    """워커들이 기록한 구간을 배치 시작 시각 기준의 한 타임라인으로 합칩니다."""
+    spans = []
+    for r in results:
+        trace = r.pop("trace", None)
+        if not trace:
+            continue
+        offset = trace["started_at"] - started_at
+        for span in trace["spans"]:
+            spans.append(dict(span, start=round(span["start"] + offset, 6)))
+    return sorted(spans, key=lambda span: span["start"])
+
+def preload_for_workers() -> None:
+    """
+    워커들이 쓸 무거운 패키지를 포크하기 전에 읽어 둡니다. (워커마다 따로 읽지 않고 물려받습니다)
+    클라이언트·이벤트 루프처럼 스레드가 딸린 상태는 포크 후 워커마다 만들어야 하므로 여기서 만들지 않습니다.
+    """
+    import openai, requests, bs4  # noqa: F401
+
+def _run_local(jobs: list, output_dir: str, workers: int, llm_concurrency: int, quiet: bool,
+               book_timeout: float, trace: bool):
+    """이번 실행만을 위한 워커 프로세스 풀에서 책들을 처리하고, 끝나는 대로 결과를 yield 합니다."""
+    preload_for_workers()
+    ctx = multiprocessing.get_context()
+    limiter = ctx.BoundedSemaphore(llm_concurrency)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(limiter, quiet, trace)) as executor:
+        futures = [executor.submit(review_book, job, output_dir, book_timeout) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+def run_batch(manifest: str, output_dir: str, workers: int, llm_concurrency: int, quiet: bool = True,
+              book_timeout: float = None, trace_path: str = None, server: str = None) -> list:
+    """
+    매니페스트의 책들을 워커 프로세스 풀에 나눠 처리하고, 끝나는 대로 결과를 기록합니다.
+    trace_path를 지정하면 워커들의 구간 기록을 합쳐 파일로 내보냅니다. (utils.trace 참고)
+    server(소켓 경로)를 지정하면 새 워커를 띄우지 않고 실행 중인 워커 서버(worker_server.py)에 작업을 보냅니다.
+    """
+    jobs = load_manifest(manifest)
+    os.makedirs(output_dir, exist_ok=True)
+    results_path = os.path.join(output_dir, "results.jsonl")
+
+    if server:
+        import worker_server
+        print(f"📚 {len(jobs)}권을 워커 서버({server})로 보냅니다")
+        completed = worker_server.submit(server, jobs, output_dir, book_timeout, trace=bool(trace_path))
+    else:
+        print(f"📚 {len(jobs)}권 처리 시작 (워커 {workers}개, LLM 동시 요청 {llm_concurrency}개)")
+        completed = _run_local(jobs, output_dir, workers, llm_concurrency, quiet, book_timeout, bool(trace_path))
+    results = []
+    start = time.perf_counter()
+    started_at = time.time()
+    with open(results_path, 'a', encoding='utf-8') as results_file:
+        for result in completed:
+            results.append(result)
+            # 구간 기록은 결과 파일이 아니라 트레이스 파일에 씁니다.
+            record = {key: value for key, value in result.items() if key != "trace"}
+            results_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            results_file.flush()
+
+            status = f"✅ {result['path']}" if not result["error"] else f"❌ {result['error']}"
+            print(f"[{len(results)}/{len(jobs)}] 『{result['title']}』 {result['elapsed']:.1f}초 {status}")
+
+    print_summary(results, time.perf_counter() - start)
+    if trace_path:
+        spans = _merge_traces(results, started_at)
+        tracer.export(trace_path, spans)
+        print(f"\n🔎 구간별 소요 시간·토큰·비용 (트레이스: {trace_path})")
+        print(summary_table(spans))
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="매니페스트에 있는 책들의 리뷰를 일괄 생성합니다.")
+    parser.add_argument("manifest", help="책 목록 파일 (.jsonl 또는 .csv)")
+    parser.add_argument("--output-dir", default="reviews", help="리뷰 파일을 저장할 디렉토리")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="동시에 처리할 책 수 (프로세스 수)")
+    parser.add_argument("--llm-concurrency", type=int, default=llm_client.MAX_CONCURRENCY,
+                        help="모든 워커가 함께 쓰는 최대 동시 LLM 요청 수")
+    parser.add_argument("--book-timeout", type=float, default=None,
+                        help="책 한 권의 최대 처리 시간(초). 넘기면 진행 중인 요청을 취소하고 실패로 기록합니다.")
+    parser.add_argument("--verbose", action="store_true", help="워커의 단계별 출력을 숨기지 않습니다.")
+    parser.add_argument("--trace", metavar="PATH", default=TRACE_PATH or None,
+                        help="워커들의 LLM 호출·크롤링·캐시 조회 구간을 합쳐 파일로 내보냅니다. (.json이면 Chrome 트레이스)")
+    parser.add_argument("--server", metavar="SOCKET", default=None,
+                        help="실행 중인 워커 서버(worker_server.py)의 소켓으로 작업을 보냅니다. "
+                             "--workers/--llm-concurrency는 서버 설정을 따릅니다.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # 잘못된 프롬프트 템플릿은 책을 하나도 처리하기 전에 드러나도록 시작할 때 모두 읽고 검사합니다.
+    try:
+        if not args.server:
+            llm_client.check_api_key()
+        prompt_builder.preload_templates()
+    except Exception as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    results = run_batch(args.manifest, args.output_dir, args.workers, args.llm_concurrency,
+                        quiet=not args.verbose, book_timeout=args.book_timeout, trace_path=args.trace,
+                        server=args.server)
+    if any(r["error"] for r in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
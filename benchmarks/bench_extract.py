@@ -0,0 +1,85 @@
+"""
+저장된 YES24 HTML 픽스처로 리뷰 추출 속도를 비교하는 벤치마크
+
+    python benchmarks/bench_extract.py [--repeat 50] [--scale 10]
+
+- baseline: 페이지마다 BeautifulSoup 트리를 만들고 선택자를 하나씩 select 하는 기존 방식
+- extractor: utils.html_extract.SelectorExtractor 한 번의 토큰화로 모든 선택자 평가
+--scale은 리뷰 목록 본문을 반복해 큰 페이지를 흉내 냅니다.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from utils.html_extract import SelectorExtractor, find_first_attribute
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# review_crawler.POSSIBLE_SELECTORS와 같은 목록 (크롤러 모듈 import 없이 실행하기 위해 복사)
+SELECTORS = [
+    "div.reviewInfoBot.cropContentsReview",
+    "div.review_cont",
+    "ul.reviewList li p.review_cont",
+    "div.reviewInfoBot p",
+    "div.reviewInfoWrap div.reviewInfoBot",
+    "p.reviewContent"
+]
+
+def load_fixture(name: str, scale: int = 1) -> str:
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        html = f.read()
+    if scale > 1:
+        start = html.index('<div class="reviewInfoWrap">')
+        end = html.rindex("</div>", start, html.index('<div class="yesUI_pagen">'))
+        body = html[start:end + len("</div>")]
+        html = html[:start] + body * scale + html[end + len("</div>"):]
+    return html
+
+def baseline_extract(html: str) -> list:
+    soup = BeautifulSoup(html, "html.parser")
+    for selector in SELECTORS:
+        elements = soup.select(selector)
+        if elements:
+            texts = [r.get_text(strip=True) for r in elements if r.get_text(strip=True)]
+            if texts:
+                return texts
+    return []
+
+def timeit(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--scale", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print(f"{'fixture':<36}{'baseline(ms)':>14}{'extractor(ms)':>15}{'speedup':>9}")
+    for name in ("yes24_review_list.html", "yes24_review_list_alt.html"):
+        for scale in (1, args.scale):
+            html = load_fixture(name, scale)
+            extractor = SelectorExtractor(SELECTORS)
+            expected = baseline_extract(html)
+            _, texts, _ = extractor.extract(html)
+            if texts != expected:
+                raise SystemExit(f"❌ {name} x{scale}: 추출 결과가 기존 방식과 다릅니다.")
+
+            base_ms = timeit(lambda: baseline_extract(html), args.repeat)
+            fast_ms = timeit(lambda: extractor.extract(html), args.repeat)
+            label = f"{name} x{scale} ({len(expected)}건)"
+            print(f"{label:<36}{base_ms:>14.2f}{fast_ms:>15.2f}{base_ms / fast_ms:>8.1f}x")
+
+    search = load_fixture("yes24_search.html")
+    base_ms = timeit(lambda: BeautifulSoup(search, "html.parser").select_one("li[data-goods-no]").get("data-goods-no"), args.repeat)
+    fast_ms = timeit(lambda: find_first_attribute(search, "li", "data-goods-no"), args.repeat)
+    print(f"{'yes24_search.html (goods id)':<36}{base_ms:>14.2f}{fast_ms:>15.2f}{base_ms / fast_ms:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+main.py/batch.py를 import 하는 데 걸리는 시간(콜드 스타트)을 재고 예산을 넘으면 실패하는 벤치마크
+
+    python benchmarks/bench_import.py [--repeat 7] [--budget 250]
+    python benchmarks/bench_import.py --importtime        # 실패하면 -X importtime으로 오래 걸린 모듈 표시
+
+모듈마다 빈 작업 디렉토리의 새 파이썬 프로세스에서 import만 하고(OPENAI_API_KEY 없이) 중앙값을 밀리초로 보고합니다.
+- 중앙값이 --budget(ms)을 넘거나
+- import만으로 무거운 패키지(HEAVY_MODULES)가 읽혔거나
+- import만으로 작업 디렉토리에 파일(.cache/ 등)이 생겼으면
+실패(종료 코드 1)합니다. 무거운 패키지는 실제로 쓰는 시점에 읽도록 함수 안에서 import 하고,
+캐시·저장소처럼 파일을 쓰는 객체는 처음 쓸 때 만드세요.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["main", "batch"]
+
+# 모듈별 import 시간 중앙값의 기본 상한 (ms)
+BUDGET_MS = 250.0
+
+# import 시점에 읽히면 안 되는 패키지 (각각 수백 ms가 걸리거나 네트워크 클라이언트를 만듭니다)
+HEAVY_MODULES = ["openai", "httpx", "requests", "bs4", "tqdm", "tiktoken"]
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.pop("OPENAI_API_KEY", None)
+    env.pop("BOOK_REVIEW_TRACE", None)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_DIR, env.get("PYTHONPATH")]))
+    return env
+
+def measure(module: str, repeat: int) -> dict:
+    """
+    새 프로세스에서 module을 repeat번 import 해 걸린 시간(ms), 읽힌 무거운 패키지,
+    작업 디렉토리에 생긴 파일을 반환합니다.
+    """
+    times = []
+    loaded = set()
+    created = set()
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(prefix="bench-import-")
+        try:
+            completed = subprocess.run(
+                [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                cwd=workdir, env=_env(), capture_output=True, text=True
+            )
+            created.update(os.listdir(workdir))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if completed.returncode != 0:
+            raise Exception(f"{module} import 실패:\n{completed.stderr}")
+        data = json.loads(completed.stdout.strip().splitlines()[-1])
+        times.append(data["elapsed"] * 1000)
+        loaded.update(data["loaded"])
+    return {"median": statistics.median(times), "min": min(times), "loaded": sorted(loaded),
+            "created": sorted(created)}
+
+def importtime_top(module: str, limit: int = 15) -> list:
+    """-X importtime 출력에서 누적 시간이 긴 모듈 limit개 (누적 ms, 모듈 이름)"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=tempfile.gettempdir(), env=_env(), capture_output=True, text=True)
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default=",".join(MODULES), help="쉼표로 구분한 모듈 이름")
+    parser.add_argument("--repeat", type=int, default=7, help="모듈마다 새 프로세스로 잴 횟수")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="모듈별 import 시간 중앙값의 상한 (ms)")
+    parser.add_argument("--importtime", action="store_true", help="실패한 모듈의 -X importtime 상위 항목을 표시합니다.")
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f"{'모듈':<10}{'중앙값(ms)':>12}{'최소(ms)':>10}  무거운 패키지 / 생긴 파일")
+    for module in args.modules.split(","):
+        result = measure(module, args.repeat)
+        over = result["median"] > args.budget
+        print(f"{module:<10}{result['median']:>12.1f}{result['min']:>10.1f}  {', '.join(result['loaded']) or '-'}"
+              f" / {', '.join(result['created']) or '-'}{'  ❌ 예산 초과' if over else ''}")
+        if over or result["loaded"] or result["created"]:
+            failed = True
+            if args.importtime:
+                for cumulative, name in importtime_top(module):
+                    print(f"    {cumulative:>8.1f}ms  {name}")
+
+    if failed:
+        print(f"\n❌ import 예산({args.budget:.0f}ms)을 넘었거나, import 시점에 무거운 패키지를 읽거나 파일을 만들었습니다.")
+        sys.exit(1)
+    print(f"\n✅ 모든 모듈이 예산({args.budget:.0f}ms) 안에서 import 됩니다.")
+
+if __name__ == "__main__":
+    main()
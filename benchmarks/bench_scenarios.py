@@ -0,0 +1,258 @@
+"""
+기록/재생 전송 계층(benchmarks/replay.py)으로 전체 흐름을 오프라인 실행하는 시나리오 벤치마크
+
+    python benchmarks/bench_scenarios.py [--scenarios single_cold,single_warm,batch] [--books 4]
+    python benchmarks/bench_scenarios.py --baseline benchmarks/baseline.json           # 회귀 확인
+    python benchmarks/bench_scenarios.py --save-baseline benchmarks/baseline.json      # 기준값 갱신
+    python benchmarks/bench_scenarios.py --record benchmarks/recordings/real.json      # 실제 응답 기록
+
+시나리오 (각각 빈 작업 디렉토리의 자식 프로세스에서 실행하므로 캐시·세션·리뷰 저장소가 섞이지 않습니다)
+- single_cold: main.py 대화형 흐름 한 번 (입력은 자동 응답, 캐시 없음)
+- single_warm: 같은 책을 한 번 실행해 캐시를 채운 뒤 다시 실행한 두 번째 실행
+- batch: batch.py로 --books권을 --workers개 프로세스에서 처리
+
+지표: 벽시계 시간, CPU 시간(자식 워커 포함), 최대 RSS, 단계별 실제 LLM 호출 수(캐시 적중 제외), 크롤링 요청 수.
+--baseline과 비교해 시간·메모리가 --tolerance 비율보다 늘거나 호출 수가 하나라도 늘면 실패(종료 코드 1)합니다.
+기준값은 실행한 기기와 지연 설정에 따라 달라지므로, 같은 기기·설정에서 --save-baseline으로 만든 파일과 비교하세요.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import builtins
+import argparse
+import resource
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from replay import ReplayTransport
+
+SCENARIOS = ["single_cold", "single_warm", "batch"]
+
+# 기준값과 비교할 지표와, 잡음으로 보고 무시할 최소 증가량
+COMPARED = {"wall": 0.05, "cpu": 0.05, "peak_rss_mb": 5.0}
+
+BOOK_TITLE = "벤치마크 책"
+BOOK_AUTHOR = "벤치마크 저자"
+
+def _auto_input(prompt: str = "") -> str:
+    """대화형 흐름의 입력을 프롬프트에 맞춰 자동으로 채웁니다. (질문 수가 달라져도 멈추지 않도록)"""
+    if "책 제목" in prompt:
+        return BOOK_TITLE
+    if "저자명" in prompt:
+        return BOOK_AUTHOR
+    if "선택할 번호" in prompt:
+        return "1,2"
+    if "선택 (1 또는 2)" in prompt:
+        return "2"
+    return "벤치마크 답변입니다. 인상 깊었던 장면과 그 이유를 적었습니다."
+
+def _usage() -> tuple:
+    """(CPU 시간(초), 최대 RSS(MB)) - 이 프로세스와 끝난 자식 프로세스(배치 워커) 포함"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    # ru_maxrss는 Linux에서 KB, macOS에서 바이트 단위입니다.
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return cpu, max(own.ru_maxrss, children.ru_maxrss) / unit
+
+def _count_calls(trace_path: str) -> dict:
+    """
+    트레이스에서 단계별 실제 LLM 호출 수(캐시 적중·취소 제외), 캐시 적중 수, 취소된 호출 수, 크롤링 요청 수를 셉니다.
+    취소된 호출은 필요 없어진 추측 실행(선택되지 않은 소제목의 가이드 질문 등)이라 실행마다 달라질 수 있습니다.
+    """
+    calls = {}
+    with open(trace_path, encoding="utf-8") as f:
+        for line in f:
+            span = json.loads(line)
+            if span["cat"] == "llm":
+                if span["attrs"].get("hit"):
+                    key = "llm_cached"
+                elif span["attrs"].get("error") in ("TaskCancelled", "TaskTimeout"):
+                    key = "llm_cancelled"
+                else:
+                    key = f"llm/{span['name']}"
+            elif span["cat"] == "crawl":
+                key = "crawl"
+            else:
+                continue
+            calls[key] = calls.get(key, 0) + 1
+    return dict(sorted(calls.items()))
+
+def _run_single(trace_path: str) -> None:
+    import main
+    builtins.input = _auto_input
+    try:
+        main.main(["--trace", trace_path])
+    except SystemExit as e:
+        if e.code:
+            raise Exception(f"대화형 실행이 실패했습니다. (종료 코드 {e.code})")
+
+def _run_batch(trace_path: str, books: int, workers: int) -> None:
+    import batch
+    with open("books.jsonl", "w", encoding="utf-8") as f:
+        for idx in range(1, books + 1):
+            job = {"title": f"{BOOK_TITLE} {idx}", "author": BOOK_AUTHOR, "answers": [_auto_input()] * 5,
+                   "subtopics": [1, 2]}
+            f.write(json.dumps(job, ensure_ascii=False) + "\n")
+    results = batch.run_batch("books.jsonl", "reviews", workers, llm_concurrency=5, quiet=True,
+                              trace_path=trace_path)
+    failed = [r["error"] for r in results if r["error"]]
+    if failed:
+        raise Exception(f"배치 실행 중 {len(failed)}권이 실패했습니다: {failed[0]}")
+
+def child_main(kind: str, result_path: str, books: int, workers: int) -> None:
+    """자식 프로세스: 작업 디렉토리(cwd)에서 시나리오 하나를 실행하고 지표를 result_path에 씁니다."""
+    trace_path = os.path.abspath("trace.jsonl")
+    stdout = sys.stdout
+    sys.stdout = io.StringIO()  # 흐름의 안내 출력은 숨깁니다.
+    cpu_before, _ = _usage()
+    started = time.perf_counter()
+    try:
+        if kind == "batch":
+            _run_batch(trace_path, books, workers)
+        else:
+            _run_single(trace_path)
+    except BaseException:
+        stdout.write(sys.stdout.getvalue()[-2000:])
+        raise
+    finally:
+        sys.stdout = stdout
+    wall = time.perf_counter() - started
+    cpu_after, peak_rss = _usage()
+    result = {"wall": round(wall, 3), "cpu": round(cpu_after - cpu_before, 3), "peak_rss_mb": round(peak_rss, 1),
+              "calls": _count_calls(trace_path)}
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+def _run_child(kind: str, workdir: str, transport: ReplayTransport, args) -> dict:
+    result_path = os.path.join(workdir, f"result-{kind}.json")
+    command = [sys.executable, os.path.abspath(__file__), "--child", kind, "--result", result_path,
+               "--books", str(args.books), "--workers", str(args.workers)]
+    completed = subprocess.run(command, cwd=workdir, env=transport.env())
+    if completed.returncode != 0:
+        raise SystemExit(f"❌ 시나리오 '{kind}' 실행 실패 (종료 코드 {completed.returncode})")
+    with open(result_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def run_scenario(name: str, transport: ReplayTransport, args) -> dict:
+    """시나리오 하나를 빈 작업 디렉토리에서 실행하고 지표와 서버가 받은 요청 수를 반환합니다."""
+    workdir = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    try:
+        kind = "batch" if name == "batch" else "single"
+        if name == "single_warm":
+            _run_child(kind, workdir, transport, args)  # 캐시를 채우는 첫 실행 (측정하지 않음)
+        transport.reset_counters()
+        result = _run_child(kind, workdir, transport, args)
+        result.update(transport.counters())
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """기준값보다 나빠진 항목의 설명 리스트를 반환합니다."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        for metric, floor in COMPARED.items():
+            limit = base[metric] * (1 + tolerance)
+            if current[metric] > limit and current[metric] - base[metric] > floor:
+                regressions.append(f"{name}: {metric} {base[metric]} → {current[metric]} (허용 {limit:.2f})")
+        for key, count in current["calls"].items():
+            if key not in ("llm_cached", "llm_cancelled") and count > base["calls"].get(key, 0):
+                regressions.append(f"{name}: {key} 호출 {base['calls'].get(key, 0)} → {count}")
+        for key in ("llm_requests", "http_requests"):
+            if current[key] > base.get(key, current[key]):
+                regressions.append(f"{name}: {key} {base[key]} → {current[key]}")
+    return regressions
+
+def print_report(results: dict, baseline: dict = None) -> None:
+    print(f"\n{'시나리오':<14}{'벽시계(초)':>12}{'CPU(초)':>10}{'RSS(MB)':>10}{'LLM 요청':>10}{'HTTP 요청':>10}{'캐시 적중':>10}")
+    for name, result in results.items():
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        delta = f"  ({(result['wall'] / base['wall'] - 1) * 100:+.0f}%)" if base and base["wall"] else ""
+        print(f"{name:<14}{result['wall']:>12.2f}{result['cpu']:>10.2f}{result['peak_rss_mb']:>10.1f}"
+              f"{result['llm_requests']:>10}{result['http_requests']:>10}{result['calls'].get('llm_cached', 0):>10}"
+              f"{delta}")
+    for name, result in results.items():
+        stages = ", ".join(f"{key}={count}" for key, count in result["calls"].items())
+        print(f"- {name}: {stages}")
+        if result["llm_synthetic"] or result["http_synthetic"]:
+            print(f"  (기록에 없어 합성 응답 사용: LLM {result['llm_synthetic']}, HTTP {result['http_synthetic']})")
+
+def settings(args) -> dict:
+    """기준값과 비교할 수 있는 실행 설정 (다르면 비교하지 않습니다)"""
+    return {"books": args.books, "workers": args.workers, "llm_latency": args.llm_latency,
+            "http_latency": args.http_latency, "recording": os.path.basename(args.recording or "")}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="쉼표로 구분한 시나리오 이름")
+    parser.add_argument("--books", type=int, default=4, help="batch 시나리오의 책 수")
+    parser.add_argument("--workers", type=int, default=2, help="batch 시나리오의 워커 프로세스 수")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="LLM 요청마다 넣을 지연 시간(초)")
+    parser.add_argument("--http-latency", type=float, default=0.02, help="YES24 요청마다 넣을 지연 시간(초)")
+    parser.add_argument("--recording", default=None, help="재생할 기록 파일 (없으면 합성 응답)")
+    parser.add_argument("--record", metavar="PATH", default=None,
+                        help="실제 OpenAI API와 YES24로 요청을 보내고 응답을 PATH에 기록합니다.")
+    parser.add_argument("--baseline", default=None, help="비교할 기준값 파일")
+    parser.add_argument("--save-baseline", metavar="PATH", default=None, help="이번 결과를 기준값 파일로 저장")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="시간·메모리 지표의 허용 증가 비율")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--result", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        child_main(args.child, args.result, args.books, args.workers)
+        return
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"❌ 알 수 없는 시나리오: {', '.join(unknown)} (가능: {', '.join(SCENARIOS)})")
+    if args.record:
+        args.recording = args.record
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != settings(args):
+            raise SystemExit(f"❌ 기준값의 실행 설정이 다릅니다: {baseline.get('settings')} (현재 {settings(args)})")
+
+    results = {}
+    with ReplayTransport(args.recording, record=bool(args.record), llm_latency=args.llm_latency,
+                         http_latency=args.http_latency) as transport:
+        for name in names:
+            print(f"▶ {name} 실행 중...")
+            results[name] = run_scenario(name, transport, args)
+
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings(args), "scenarios": results}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\n💾 기준값을 저장했습니다: {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ 기준값보다 나빠진 항목이 있습니다:")
+            for line in regressions:
+                print(f"- {line}")
+            sys.exit(1)
+        print("\n✅ 기준값 대비 회귀가 없습니다.")
+
+if __name__ == "__main__":
+    main()
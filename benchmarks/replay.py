@@ -0,0 +1,221 @@
+"""
+벤치마크용 기록/재생 전송 계층
+
+OpenAI API와 YES24 대신 로컬 서버(utils.stub_server)를 띄워 llm_client와 review_crawler가 그쪽으로 요청하게 합니다.
+(OPENAI_BASE_URL, YES24_BASE_URL)
+
+- 재생(기본): 기록 파일에 있는 응답을 돌려주고, 없는 요청은 결정적인 합성 응답으로 채웁니다.
+  기록 파일이 없어도 fixtures/의 YES24 HTML과 합성 LLM 응답만으로 전체 흐름을 실행할 수 있습니다.
+- 기록: 받은 요청을 실제 OpenAI API(OPENAI_API_KEY 필요)와 YES24로 전달하고, 응답을 기록 파일에 저장합니다.
+- 두 경우 모두 latency로 요청마다 지연 시간을 넣어 네트워크 왕복을 흉내 냅니다.
+"""
+import os
+import sys
+import json
+import zlib
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.stub_server import StubLLMServer, FixtureServer
+from utils.response_cache import normalize_prompt
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+OPENAI_UPSTREAM = os.getenv("BENCH_OPENAI_UPSTREAM", "https://api.openai.com/v1")
+YES24_UPSTREAM = os.getenv("BENCH_YES24_UPSTREAM", "https://www.yes24.com")
+
+# review_crawler.HEADERS와 같은 값 (크롤러 모듈 import 없이 실행하기 위해 복사)
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# 합성 응답의 목록 항목 수 (대화형 시나리오가 입력할 답변 수와 맞춰야 합니다)
+SYNTHETIC_ITEMS = 5
+
+def prompt_key(prompt: str) -> str:
+    """기록 파일의 LLM 응답 키 (공백/대소문자 차이는 같은 프롬프트로 봅니다)"""
+    return hashlib.sha1(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+
+def _fixture(name: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+def synthetic_response(prompt: str) -> str:
+    """
+    기록에 없는 프롬프트의 응답. 같은 프롬프트에는 항상 같은 응답을 돌려줍니다.
+    JSON을 요구하는 목록 단계에는 {"items": [...]}를, 나머지(책 정보·챕터 본문)에는 문단을 돌려줍니다.
+    """
+    digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+    if "JSON" in prompt:
+        items = [f"항목 {idx} ({digest[idx * 4:idx * 4 + 4]})" for idx in range(1, SYNTHETIC_ITEMS + 1)]
+        return json.dumps({"items": items}, ensure_ascii=False)
+    sentence = f"이 문단은 벤치마크용 합성 응답입니다 ({digest[:8]}). "
+    return sentence * 12
+
+def synthetic_page(path: str) -> tuple:
+    """
+    기록에 없는 YES24 요청의 응답 (상태 코드, HTML)
+    검색 결과의 상품 번호는 검색어마다 달라서 책마다 따로 수집·저장됩니다.
+    """
+    parts = urlsplit(path)
+    query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+    if parts.path == "/Product/Search":
+        goods_no = str(100000000 + zlib.crc32(query.get("query", "").encode("utf-8")) % 900000000)
+        html = _fixture("yes24_search.html")
+        return 200, html.replace("117014613", goods_no).replace("117014614", str(int(goods_no) + 1))
+    if parts.path.startswith("/Product/communityModules/GoodsReviewList"):
+        page = int(query.get("PageNumber", 1))
+        return 200, _fixture("yes24_review_list.html" if page == 1 else "yes24_review_list_alt.html")
+    if parts.path.startswith("/Product/Goods/"):
+        return 200, _fixture("yes24_review_list_alt.html")
+    return 404, "not found"
+
+class Recording:
+    """
+    기록 파일: {"llm": {프롬프트 키: 응답}, "http": {경로(쿼리 포함): [상태 코드, 본문]}}
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.llm = {}
+        self.http = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.llm = data.get("llm", {})
+            self.http = {key: tuple(value) for key, value in data.get("http", {}).items()}
+
+    def add_llm(self, prompt: str, response: str) -> None:
+        with self._lock:
+            self.llm[prompt_key(prompt)] = response
+
+    def add_http(self, path: str, status: int, body: str) -> None:
+        with self._lock:
+            self.http[path] = (status, body)
+
+    def save(self) -> None:
+        with self._lock:
+            data = {"llm": self.llm, "http": {key: list(value) for key, value in self.http.items()}}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+class ReplayLLMServer(StubLLMServer):
+    """기록된 응답을 돌려주거나(재생), 실제 API로 전달해 응답을 기록하는(record=True) OpenAI 스텁 서버"""
+
+    def __init__(self, recording: Recording, record: bool = False, latency: float = 0.0,
+                 chunk_latency: float = 0.0):
+        super().__init__(latency=latency, chunk_latency=chunk_latency)
+        self.recording = recording
+        self.record = record
+        self.hits = 0
+        self.misses = 0  # 기록에 없어 합성 응답으로 채운 요청 수
+        self._upstream = None
+        if record:
+            from openai import OpenAI
+            self._upstream = OpenAI(api_key=os.environ["OPENAI_API_KEY"], base_url=OPENAI_UPSTREAM)
+
+    def respond(self, body: dict) -> str:
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        if self.record:
+            # 스트리밍 요청도 한 번에 받아 기록하고, 스텁 서버가 다시 조각으로 나눠 보냅니다.
+            extra = {"response_format": body["response_format"]} if body.get("response_format") else {}
+            response = self._upstream.chat.completions.create(
+                model=body.get("model"), messages=body["messages"], temperature=body.get("temperature"),
+                max_tokens=body.get("max_tokens"), **extra
+            )
+            content = response.choices[0].message.content
+            self.recording.add_llm(prompt, content)
+            return content
+        content = self.recording.llm.get(prompt_key(prompt))
+        with self._lock:
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return content if content is not None else synthetic_response(prompt)
+
+class ReplayHTTPServer(FixtureServer):
+    """기록된 YES24 페이지를 돌려주거나(재생), 실제 사이트에서 받아 기록하는(record=True) 픽스처 서버"""
+
+    def __init__(self, recording: Recording, record: bool = False, latency: float = 0.0):
+        super().__init__({}, latency=latency, default=self._lookup)
+        self.recording = recording
+        self.record = record
+        self.misses = 0
+
+    def _lookup(self, path: str) -> tuple:
+        if self.record:
+            import requests
+            response = requests.get(YES24_UPSTREAM.rstrip("/") + path, headers=HEADERS, timeout=30)
+            self.recording.add_http(path, response.status_code, response.text)
+            return response.status_code, response.text
+        recorded = self.recording.http.get(path)
+        if recorded is None:
+            with self._lock:
+                self.misses += 1
+            return synthetic_page(path)
+        return recorded
+
+class ReplayTransport:
+    """
+    LLM 서버와 YES24 서버를 함께 띄우고, 자식 프로세스에 넘길 환경 변수를 만듭니다.
+
+    사용 예:
+        with ReplayTransport(recording_path, llm_latency=0.2) as transport:
+            subprocess.run([...], env=transport.env())
+    """
+
+    def __init__(self, recording_path: str = None, record: bool = False, llm_latency: float = 0.0,
+                 http_latency: float = 0.0, chunk_latency: float = 0.0):
+        if record and not recording_path:
+            raise ValueError("기록하려면 기록 파일 경로가 필요합니다.")
+        self.recording = Recording(recording_path)
+        self.record = record
+        self.llm = ReplayLLMServer(self.recording, record, latency=llm_latency, chunk_latency=chunk_latency)
+        self.http = ReplayHTTPServer(self.recording, record, latency=http_latency)
+
+    def env(self) -> dict:
+        env = dict(os.environ)
+        env.update(
+            OPENAI_BASE_URL=self.llm.base_url,
+            OPENAI_API_KEY="replay",
+            YES24_BASE_URL=self.http.base_url,
+            BOOK_REVIEW_HEADLESS="1",
+        )
+        return env
+
+    def counters(self) -> dict:
+        """지금까지 받은 요청 수와, 기록에 없어 합성 응답을 쓴 요청 수"""
+        return {
+            "llm_requests": len(self.llm.requests), "http_requests": len(self.http.paths),
+            "llm_synthetic": self.llm.misses, "http_synthetic": self.http.misses,
+        }
+
+    def reset_counters(self) -> None:
+        self.llm.requests.clear()
+        self.http.paths.clear()
+        self.llm.hits = self.llm.misses = self.http.misses = 0
+
+    def start(self) -> "ReplayTransport":
+        self.llm.start()
+        self.http.start()
+        return self
+
+    def stop(self) -> None:
+        self.llm.stop()
+        self.http.stop()
+        if self.record:
+            self.recording.save()
+
+    def __enter__(self) -> "ReplayTransport":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
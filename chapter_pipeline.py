@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+import llm_client
+from utils import tasks
+from question_generator import generate_guided_questions
+from review_writer import write_chapter_from_answers
+
+class ChapterPipeline:
+    """
+    선택된 소제목들의 챕터 작성을 겹쳐서 진행하는 파이프라인
+
+    - 생성 즉시 모든 소제목의 가이드 질문을 병렬로 미리 요청합니다.
+    - 한 소제목의 답변이 끝나면 챕터 작성을 워커 풀에 맡기고 바로 다음 소제목으로 넘어갑니다.
+    - 완성된 챕터는 선택한 순서대로 다시 조립됩니다.
+    - writer(ReviewFileWriter)를 지정하면 챕터 내용이 생성되는 대로 파일에 기록됩니다.
+    - prefetched에 이미 요청해 둔 가이드 질문 Future가 있으면 새로 요청하지 않고 그대로 씁니다.
+    - completed에 이미 끝난 챕터(소제목 -> 내용)가 있으면 질문을 요청하지 않고 그 내용을 씁니다.
+    - on_chapter가 주어지면 챕터가 끝날 때마다 (소제목, 내용)으로 호출합니다. (예: 세션 기록)
+    - 워커는 파이프라인의 취소 토큰(만든 쪽 토큰의 하위)으로 실행되므로, shutdown()이나 상위 작업의 취소·마감이
+      진행 중인 질문 생성과 챕터 작성(LLM 스트리밍 포함)까지 멈춥니다.
+    """
+
+    def __init__(self, subtopics: list, book_context: str, review_points: list, max_workers: int = None,
+                 writer=None, prefetched: dict = None, completed: dict = None, on_chapter=None):
+        self.subtopics = list(subtopics)
+        self.book_context = book_context
+        self.review_points = review_points
+        self.writer = writer
+        self.on_chapter = on_chapter
+        self._token = tasks.CancelToken(parent=tasks.current_token())
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or llm_client.MAX_CONCURRENCY,
+            thread_name_prefix="chapter"
+        )
+        prefetched = prefetched or {}
+        completed = completed or {}
+        self._questions = {
+            subtopic: prefetched.get(subtopic)
+            or self._submit(generate_guided_questions, subtopic, book_context, review_points)
+            for subtopic in self.subtopics if subtopic not in completed
+        }
+        self._chapters = {}
+        for subtopic in self.subtopics:
+            if subtopic in completed:
+                self._chapters[subtopic] = completed[subtopic]
+                if self.writer is not None:
+                    self.writer.write_chapter(self.subtopics.index(subtopic), completed[subtopic])
+
+    def _submit(self, func, *args):
+        return self._executor.submit(tasks.bind(self._run), func, *args)
+
+    def _run(self, func, *args):
+        with tasks.scope(token=self._token):
+            return func(*args)
+
+    def is_completed(self, subtopic: str) -> bool:
+        """이미 끝난(completed로 받은) 챕터인지 여부"""
+        return subtopic not in self._questions
+
+    def questions_future(self, subtopic: str):
+        """해당 소제목의 가이드 질문 Future를 반환합니다."""
+        return self._questions[subtopic]
+
+    def skip_questions(self, subtopic: str) -> None:
+        """직접 작성하는 소제목은 아직 시작되지 않은 질문 생성을 취소합니다."""
+        self._questions[subtopic].cancel()
+
+    def add_written(self, subtopic: str, content: str) -> None:
+        """사용자가 직접 작성한 챕터를 등록합니다."""
+        self._chapters[subtopic] = content
+        if self.writer is not None:
+            self.writer.write_chapter(self.subtopics.index(subtopic), content)
+        if self.on_chapter is not None:
+            self.on_chapter(subtopic, content)
+
+    def submit_answers(self, subtopic: str, answers: dict) -> None:
+        """답변이 모인 소제목의 챕터 작성을 워커 풀에 맡깁니다."""
+        self._chapters[subtopic] = self._submit(self._write_chapter, subtopic, answers)
+
+    def _write_chapter(self, subtopic: str, answers: dict) -> str:
+        if self.writer is None:
+            content = write_chapter_from_answers(subtopic, answers, self.book_context, self.review_points)
+        else:
+            sink = self.writer.chapter(self.subtopics.index(subtopic))
+            try:
+                content = write_chapter_from_answers(
+                    subtopic, answers, self.book_context, self.review_points, on_token=sink.write
+                )
+            finally:
+                sink.close()
+        if self.on_chapter is not None:
+            self.on_chapter(subtopic, content)
+        return content
+
+    def pending(self) -> int:
+        """아직 작성 중인 챕터 수"""
+        return sum(1 for c in self._chapters.values() if not isinstance(c, str) and not c.done())
+
+    def collect(self) -> list:
+        """
+        모든 챕터가 완료될 때까지 기다린 뒤 선택 순서대로 챕터 리스트를 반환합니다.
+        기다리는 중에 현재 작업이 취소되거나 마감을 넘기면 남은 챕터 작성을 모두 멈춥니다.
+        """
+        try:
+            chapters = []
+            for subtopic in self.subtopics:
+                content = self._chapters[subtopic]
+                if not isinstance(content, str):
+                    content = tasks.wait_future(content)
+                chapters.append({"title": subtopic, "content": content})
+            return chapters
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """시작하지 않은 작업은 취소하고, 진행 중인 작업은 토큰으로 멈춥니다."""
+        self._token.cancel("챕터 작성이 중단되었습니다.")
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,30 +1,30 @@
-from utils.io import load_text
-import llm_client
+from utils.prompt_builder import build_prompt
+from utils.structured import ask_list
 
 def ask_interview_questions(book_context: str, review_points: list, title: str) -> list:
     """
     유저가 감상을 정리할 수 있도록 돕는 인터뷰 질문을 GPT가 생성합니다.
     """
-    prompt_template = load_text("prompts/interview_questions.txt")
-    formatted_keywords = "\n".join(f"- {kw}" for kw in review_points)
-
-    prompt = prompt_template.format(
+    prompt = build_prompt(
+        "interview_questions",
         title=title,
         book_context=book_context,
-        review_points=formatted_keywords
+        review_points=review_points
     )
 
-    response = llm_client.ask(prompt)
-    questions = [line.strip("- ").strip() for line in response.strip().splitlines() if line.strip()]
+    questions = ask_list(prompt, stage="interview_questions")
 
     print(f"💬 인터뷰 질문 {len(questions)}개 생성됨.")
     return questions
 
-def conduct_interview(book_info_text: str, key_points: list, questions: list) -> list:
+def conduct_interview(book_info_text: str, key_points: list, questions: list, on_answer=None,
+                      answered: list = None) -> list:
     """
     GPT가 생성한 질문을 유저에게 보여주고,
     유저가 직접 답변을 입력하게 한다.
     그 답변을 리스트로 저장하여 이후 리뷰 작성에 활용한다.
+    on_answer가 주어지면 답변이 들어올 때마다 지금까지의 답변 리스트로 호출한다.
+    answered가 주어지면(이어서 진행하는 세션) 그만큼의 질문은 이전 답변을 그대로 쓴다.
     """
     print("\n🗣️ [인터뷰 시작] 아래 질문에 자유롭게 답변해주세요.\n")
 
@@ -33,10 +33,15 @@ def conduct_interview(book_info_text: str, key_points: list, questions: list) ->
     if key_points:
         context += "\n관련 키워드:\n" + "\n".join(f"- {k}" for k in key_points)
 
-    answers = []
+    answers = list(answered or [])[:len(questions)]
     for idx, question in enumerate(questions, start=1):
+        if idx <= len(answers):
+            print(f"{idx}. {question}\n> {answers[idx - 1]} (이전 답변)")
+            continue
         print(f"{idx}. {question}")
         user_answer = input("> ")
         answers.append(user_answer.strip())
+        if on_answer:
+            on_answer(list(answers))
 
     return answers
\ No newline at end of file
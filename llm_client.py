@@ -1,35 +1,477 @@
 import os
-import openai
-from openai import OpenAI  # 최신 SDK 사용
+import asyncio
+import threading
 import time
+from utils import tasks
+from utils.cache import cache
+from utils.response_cache import from_env as _response_cache_from_env
+from utils.rate_limit import from_env as _controller_from_env, CircuitOpenError
+from utils import routing
+from utils.trace import tracer, NO_SPAN
+from utils.prompt_builder import count_tokens, template_version
 
-# OpenAI API 키 설정
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise EnvironmentError("OpenAI API key not found. Please set OPENAI_API_KEY.")
+# openai 패키지는 읽는 데 오래 걸리므로(1초 가까이) import 시점이 아니라 첫 요청에서 읽고 클라이언트를 만듭니다.
+# 덕분에 첫 입력 프롬프트가 바로 뜨고, 배치 워커도 빨리 시작합니다.
+_client = None
+_client_lock = threading.Lock()
 
-client = OpenAI(api_key=openai_api_key)
+def check_api_key() -> str:
+    """
+    OpenAI API 키를 반환합니다. 클라이언트를 만들지 않으므로 시작할 때 설정만 빨리 확인할 수 있습니다.
+
+    :raises EnvironmentError: OPENAI_API_KEY가 없는 경우
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise EnvironmentError("OpenAI API key not found. Please set OPENAI_API_KEY.")
+    return api_key
+
+def get_client():
+    """동기 OpenAI 클라이언트 (스트리밍 요청에 사용, 처음 호출할 때 만듭니다)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+            # 재시도는 RetryController가 맡으므로 SDK 자체 재시도는 끕니다. (겹치면 재시도 횟수가 곱해집니다)
+            _client = OpenAI(api_key=check_api_key(), max_retries=0)
+        return _client
+
+def warm_up() -> None:
+    """
+    첫 요청에서 할 준비(openai 패키지 로드, 클라이언트와 전용 루프 생성)를 미리 해 둡니다.
+    오래 떠 있는 워커(worker_server.py)가 작업을 받기 전에 호출합니다.
+    """
+    get_client()
+    _runtime.submit(_runtime.prepare()).result()
+
+# 동시에 진행할 수 있는 최대 비동기 요청 수
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "5"))
+# 요청 하나의 HTTP 제한 시간 (초). 작업 마감이 더 가까우면 그쪽을 따릅니다.
+REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
 
-def ask(prompt: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7, max_retries: int = 3) -> str:
+# 여러 프로세스가 함께 쓰는 동시 요청 한도 (multiprocessing 세마포어 등, 없으면 None)
+_global_limiter = None
+
+def set_global_limiter(limiter) -> None:
+    """
+    모든 API 호출이 acquire()/release()로 거쳐 갈 공용 세마포어를 지정합니다.
+    배치 모드에서 워커 프로세스 전체의 동시 요청 수를 제한할 때 사용합니다.
+    """
+    global _global_limiter
+    _global_limiter = limiter
+
+# 재시도 백오프, RPM/TPM 제한(프로세스 간 공유), 차단기를 담당하는 컨트롤러 (utils.rate_limit 참고)
+# 같은 모델·파라미터·프롬프트(공백/대소문자 차이 무시)의 응답을 재사용하는 캐시 (utils.response_cache 참고)
+# 둘 다 .cache/ 아래 파일을 쓰므로 클라이언트처럼 처음 쓸 때 만듭니다. (import만 해서는 파일이 생기지 않고,
+# 배치 워커는 포크한 뒤 각자 만듭니다)
+_controller = None
+_responses = None
+_state_lock = threading.Lock()
+
+def _get_controller():
+    global _controller
+    with _state_lock:
+        if _controller is None:
+            _controller = _controller_from_env(cache.cache_dir)
+        return _controller
+
+def _get_responses():
+    global _responses
+    with _state_lock:
+        if _responses is None:
+            _responses = _response_cache_from_env(cache)
+        return _responses
+
+def ask(prompt: str, model: str = None, temperature: float = None, max_retries: int = 3,
+        stage: str = None, response_format: dict = None, max_tokens: int = None) -> str:
     """
     주어진 프롬프트로 OpenAI ChatCompletion API를 호출하고 응답 텍스트를 반환합니다.
-    오류 발생 시 재시도합니다.
+    오류 발생 시 재시도하고, 재시도해도 실패하면 단계의 대체 모델로 다시 요청합니다.
+
+    요청은 공용 비동기 루프에서 실행되므로, 현재 작업이 취소되거나 마감을 넘기면
+    진행 중인 HTTP 요청도 함께 취소됩니다. (utils.tasks 참고)
+
+    :param model: 모델 (None이면 단계의 라우팅 설정을 따릅니다, utils.routing 참고)
+    :param temperature: 샘플링 온도 (None이면 라우팅 설정)
+    :param stage: 프롬프트 템플릿(단계) 이름. 라우팅, 응답 캐시, 단계별 집계에 쓰입니다.
+    :param response_format: 응답 형식 (예: {"type": "json_object"}, utils.structured 참고)
+    :param max_tokens: 응답 최대 토큰 수 (None이면 라우팅 설정)
+    """
+    _shutdown.check()
+    tasks.check()
+    route = routing.resolve(stage, model, temperature, max_tokens)
+    future = _runtime.submit(
+        _ask_routed(prompt, route, stage, max_retries, tasks.remaining(REQUEST_TIMEOUT), response_format)
+    )
+    return tasks.wait_future(future)
+
+def ask_stream(prompt: str, model: str = None, temperature: float = None,
+               max_tokens: int = None, max_retries: int = 3, stage: str = None):
+    """
+    ask()의 스트리밍 버전입니다. 응답 텍스트 조각을 생성되는 대로 yield 합니다.
+    첫 조각을 받기 전의 오류만 재시도(및 대체 모델로 전환)하며, 출력이 시작된 뒤의 오류는 그대로 전달합니다.
+    캐시에 응답이 있으면 요청 없이 한 조각으로 돌려주고, 끝까지 받은 응답만 캐시에 저장합니다.
     """
+    route = routing.resolve(stage, model, temperature, max_tokens)
+    chain = route.chain
+    # 제너레이터는 yield 사이에 호출한 쪽 코드가 실행되므로 with 블록 대신 직접 끝냅니다.
+    span = tracer.span(stage or "llm", "llm", stage=stage, stream=True)
+    try:
+        for idx, model in enumerate(chain):
+            params = {"temperature": route.temperature, "max_tokens": route.max_tokens,
+                      "template": template_version(stage)}
+            cached = _get_responses().get(prompt, model, params, stage)
+            if cached is not None:
+                span.set(model=model, hit=True)
+                yield cached
+                return
+            started = time.perf_counter()
+            pieces = []
+            try:
+                for delta in _stream(prompt, model, route.temperature, route.max_tokens, max_retries, span):
+                    pieces.append(delta)
+                    yield delta
+            except tasks.TaskCancelled:
+                raise
+            except Exception as e:
+                routing.record_failure(stage, model)
+                if pieces or idx == len(chain) - 1 or isinstance(e, CircuitOpenError):
+                    span.set(model=model, error=type(e).__name__)
+                    raise
+                print(f"⚠️ {model} 호출 실패, {chain[idx + 1]} 모델로 다시 시도합니다.")
+                span.add("fallbacks")
+                continue
+            response = "".join(pieces).strip()
+            _record_route(stage, model, started, prompt, response, span=span)
+            _get_responses().set(prompt, model, params, response, stage)
+            return
+    finally:
+        span.finish()
+
+def _stream(prompt: str, model: str, temperature: float, max_tokens: int, max_retries: int, span=NO_SPAN):
+    """모델 하나에 대한 스트리밍 요청 (재시도 포함, 재시도 횟수는 span에 기록)"""
+    import openai
+    controller = _get_controller()
+    reserved = count_tokens(prompt) + max_tokens
     retry_count = 0
-    while retry_count < max_retries:
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=1000
-            )
-            return response.choices[0].message.content.strip()
-        except (openai.APIError, openai.APIConnectionError) as e:
-            retry_count += 1
-            if retry_count == max_retries:
-                raise Exception(f"OpenAI API 호출 실패: {e}")
-            print(f"API 오류, {retry_count}번째 재시도 중...")
-            time.sleep(2)  # 재시도 전 대기
-        except Exception as e:
-            raise Exception(f"예상치 못한 오류: {e}")
\ No newline at end of file
+    while True:
+        started = False
+        _shutdown.check()
+        tasks.check()
+        # 시험 요청(half-open)이 429·취소 등으로 끝나도 attempt()가 차단기의 시험 자격을 돌려놓습니다.
+        with controller.attempt():
+            _sleep(controller.reserve(reserved))
+            try:
+                if _global_limiter is not None:
+                    _global_limiter.acquire()
+                try:
+                    stream = get_client().chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True,
+                        timeout=tasks.remaining(REQUEST_TIMEOUT)
+                    )
+                    for chunk in stream:
+                        if _shutdown.cancelled or _stream_cancelled():
+                            # 취소되면 응답을 끊어 서버 쪽 생성도 멈추게 합니다.
+                            stream.close()
+                            tasks.check()
+                            raise tasks.TaskCancelled("작업이 취소되었습니다.")
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            started = True
+                            yield delta
+                finally:
+                    if _global_limiter is not None:
+                        _global_limiter.release()
+                controller.record_success()
+                return
+            except openai.APIError as e:
+                kind = _failure_kind(e)
+                if kind is None:
+                    raise Exception(f"OpenAI API 호출 실패: {e}")
+                retry_count += 1
+                delay = controller.record_failure(kind, retry_count, _retry_after(e))
+                if started or retry_count >= max_retries:
+                    raise Exception(f"OpenAI API 호출 실패: {e}")
+                controller.record_retry()
+                span.add("retries")
+                print(f"API 오류, {retry_count}번째 재시도 중... ({delay:.1f}초 후)")
+        _sleep(delay)
+
+def _sleep(seconds: float) -> None:
+    """취소를 확인하면서 기다립니다."""
+    deadline = time.monotonic() + seconds
+    while True:
+        _shutdown.check()
+        tasks.check()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, 0.2))
+
+def _stream_cancelled() -> bool:
+    token = tasks.current_token()
+    return token is not None and (token.cancelled or token.expired())
+
+class _AsyncRuntime:
+    """
+    비동기 요청을 처리하는 전용 이벤트 루프(백그라운드 스레드)
+
+    AsyncOpenAI 클라이언트와 그 커넥션 풀, 동시성 세마포어는 모두 이 루프에 묶여 있으므로
+    어느 스레드나 이벤트 루프에서 호출하더라도 같은 연결을 재사용합니다.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._lock = threading.Lock()
+        self._client = None
+        self._semaphore = None
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-client-loop", daemon=True)
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    def _ensure_state(self):
+        # 루프 스레드 안에서만 호출됩니다.
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=check_api_key(), max_retries=0)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def prepare(self):
+        """루프 안에서 클라이언트와 세마포어를 미리 만듭니다. (warm_up 참고)"""
+        self._ensure_state()
+
+    async def _admit(self):
+        """동시성 슬롯을 획득합니다. 레이트 리밋으로 멈춘 동안에는 슬롯을 잡지 않고 기다립니다."""
+        await self._semaphore.acquire()
+        delay = _get_controller().bucket.paused_for()
+        if delay > 0:
+            # 슬롯을 기다리는 사이 레이트 리밋이 걸렸다면 다시 대기합니다.
+            self._semaphore.release()
+            await asyncio.sleep(delay)
+            await self._admit()
+            return
+        if _global_limiter is not None:
+            # 프로세스 간 세마포어는 블로킹 호출이므로 루프를 막지 않게 스레드에서 기다립니다.
+            acquiring = asyncio.ensure_future(asyncio.to_thread(_global_limiter.acquire))
+            try:
+                await asyncio.shield(acquiring)
+            except BaseException:
+                # 취소되더라도 스레드의 acquire는 끝까지 진행되므로, 끝나는 대로 돌려줍니다.
+                self._semaphore.release()
+                acquiring.add_done_callback(
+                    lambda f: f.cancelled() or f.exception() is not None or _global_limiter.release()
+                )
+                raise
+
+    def _release(self):
+        if _global_limiter is not None:
+            _global_limiter.release()
+        self._semaphore.release()
+
+    async def complete(self, prompt: str, model: str, temperature: float, max_tokens: int, max_retries: int,
+                       timeout: float = REQUEST_TIMEOUT, response_format: dict = None) -> tuple:
+        """
+        모델 하나에 요청하고 (응답 텍스트, 사용량)을 반환합니다. 재시도할 수 있는 오류는 재시도합니다.
+        """
+        import openai
+        self._ensure_state()
+        # 형식을 지정하지 않으면 필드 자체를 보내지 않습니다.
+        extra = {"response_format": response_format} if response_format else {}
+        controller = _get_controller()
+        bucket = controller.bucket
+        reserved = count_tokens(prompt) + max_tokens
+        retry_count = 0
+        while True:
+            with controller.attempt():
+                # 속도 제한 대기는 동시성 슬롯을 잡기 전에 합니다.
+                await asyncio.sleep(await _off_loop(bucket.blocking, controller.reserve, reserved))
+                await self._admit()
+                try:
+                    response = await self._client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        timeout=timeout,
+                        **extra
+                    )
+                    usage = getattr(response, "usage", None)
+                    await _off_loop(bucket.blocking, controller.record_success, reserved,
+                                    usage.total_tokens if usage else None)
+                    return response.choices[0].message.content.strip(), usage
+                except openai.APIError as e:
+                    kind = _failure_kind(e)
+                    if kind is None:
+                        raise Exception(f"OpenAI API 호출 실패: {e}")
+                    # 레이트 리밋이면 이 요청만이 아니라 새로 들어오는 요청(다른 프로세스 포함)도 함께 멈춥니다.
+                    retry_count += 1
+                    delay = await _off_loop(kind == "rate_limit" and bucket.state_path is not None,
+                                            controller.record_failure, kind, retry_count, _retry_after(e))
+                    if retry_count >= max_retries:
+                        raise Exception(f"OpenAI API 호출 실패: {e}")
+                    controller.record_retry()
+                    # _ask_routed의 구간 안에서 실행되므로 현재 구간에 재시도를 기록합니다.
+                    tracer.current().add("retries")
+                    if kind != "rate_limit":
+                        print(f"API 오류, {retry_count}번째 재시도 중... ({delay:.1f}초 후)")
+                    else:
+                        delay = 0  # 대기는 다음 reserve에서 공유 정지 시간으로 처리됩니다.
+                finally:
+                    self._release()
+            # 대기하는 동안 슬롯을 점유하지 않도록 반환한 뒤 기다립니다.
+            await asyncio.sleep(delay)
+
+    def submit(self, coro):
+        """
+        코루틴을 전용 루프에 올리고 concurrent.futures.Future를 반환합니다.
+        반환된 Future를 cancel()하면 루프 안의 요청(HTTP 연결 포함)도 취소됩니다.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop())
+
+    def cancel_all(self):
+        """진행 중이거나 대기 중인 모든 요청을 취소합니다."""
+        loop = self._loop
+        if loop is None:
+            return
+
+        def cancel():
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+        loop.call_soon_threadsafe(cancel)
+
+async def _off_loop(blocking: bool, func, *args):
+    """
+    func가 프로세스 간 파일 잠금을 기다릴 수 있으면(blocking) 전용 루프의 다른 요청을 막지 않도록 스레드에서 실행합니다.
+    잠금이 필요 없는 경우(속도 제한을 쓰지 않는 기본 설정)는 바로 호출합니다.
+    """
+    if blocking:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+def _failure_kind(error: Exception):
+    """
+    재시도할 수 있는 오류의 종류를 반환합니다.
+    잘못된 요청·인증 오류 같은 나머지 4xx는 다시 보내도 같으므로 None(재시도하지 않음)입니다.
+    """
+    import openai
+    if isinstance(error, openai.RateLimitError):
+        return "rate_limit"
+    if isinstance(error, openai.APIConnectionError):  # APITimeoutError 포함
+        return "connection"
+    if isinstance(error, openai.APIStatusError):
+        return "server" if error.status_code >= 500 or error.status_code in (408, 409) else None
+    return "server"
+
+def _retry_after(error: Exception):
+    """응답 헤더의 Retry-After 값을 초 단위로 읽습니다. 없으면 None."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+_runtime = _AsyncRuntime(MAX_CONCURRENCY)
+# 프로그램 종료(Ctrl+C) 시 모든 요청을 멈추기 위한 토큰
+_shutdown = tasks.CancelToken()
+
+def cancel_all() -> None:
+    """
+    진행 중인 모든 LLM 요청을 취소합니다. 사용자가 프로그램을 중단할 때 호출하며,
+    이후의 요청은 바로 TaskCancelled로 끝납니다.
+    """
+    _shutdown.cancel("프로그램이 중단되었습니다.")
+    _runtime.cancel_all()
+
+async def _ask_routed(prompt: str, route: routing.Route, stage: str, max_retries: int,
+                      timeout: float, response_format: dict = None) -> str:
+    """route의 모델을 차례로 시도합니다. 공용 루프 안에서 실행됩니다."""
+    chain = route.chain
+    with tracer.span(stage or "llm", "llm", stage=stage) as span:
+        for idx, model in enumerate(chain):
+            params = {"temperature": route.temperature, "max_tokens": route.max_tokens,
+                      "response_format": response_format, "template": template_version(stage)}
+            cached = _get_responses().get(prompt, model, params, stage)
+            if cached is not None:
+                span.set(model=model, hit=True)
+                return cached
+            started = time.perf_counter()
+            try:
+                response, usage = await _runtime.complete(
+                    prompt, model, route.temperature, route.max_tokens, max_retries,
+                    timeout=timeout, response_format=response_format
+                )
+            except Exception as e:
+                routing.record_failure(stage, model)
+                # 차단기가 열린 경우는 모델이 아니라 API 전체의 문제이므로 대체 모델도 시도하지 않습니다.
+                if idx == len(chain) - 1 or isinstance(e, CircuitOpenError):
+                    span.set(model=model)
+                    raise
+                print(f"⚠️ {model} 호출 실패, {chain[idx + 1]} 모델로 다시 시도합니다.")
+                span.add("fallbacks")
+                continue
+            _record_route(stage, model, started, prompt, response, usage, span)
+            _get_responses().set(prompt, model, params, response, stage)
+            return response
+
+def _record_route(stage: str, model: str, started: float, prompt: str, response: str, usage=None,
+                  span=NO_SPAN) -> None:
+    """경로별 소요 시간과 토큰 사용량을 기록합니다. 사용량을 받지 못한 경우(스트리밍)는 추정치를 씁니다."""
+    prompt_tokens = usage.prompt_tokens if usage else count_tokens(prompt)
+    completion_tokens = usage.completion_tokens if usage else count_tokens(response)
+    routing.record(stage, model, time.perf_counter() - started, prompt_tokens, completion_tokens)
+    span.set(model=model, hit=False, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+async def ask_async(prompt: str, model: str = None, temperature: float = None,
+                    max_tokens: int = None, max_retries: int = 3, stage: str = None,
+                    response_format: dict = None) -> str:
+    """
+    ask()의 비동기 버전입니다.
+    요청은 공용 루프에서 커넥션 풀을 재사용하며, 동시에 MAX_CONCURRENCY개까지만 진행됩니다.
+    """
+    route = routing.resolve(stage, model, temperature, max_tokens)
+    coro = _ask_routed(prompt, route, stage, max_retries, REQUEST_TIMEOUT, response_format)
+    if asyncio.get_running_loop() is _runtime.loop():
+        return await coro
+    return await asyncio.wrap_future(_runtime.submit(coro))
+
+async def ask_many(prompts: list, **kwargs) -> list:
+    """
+    여러 프롬프트를 동시에 요청하고, 입력 순서대로 응답 리스트를 반환합니다.
+    전체 소요 시간은 호출 수의 합이 아니라 가장 느린 호출에 가깝습니다.
+    """
+    return list(await asyncio.gather(*(ask_async(prompt, **kwargs) for prompt in prompts)))
+
+def run_sync(coro):
+    """
+    동기 코드에서 ask_async/ask_many 코루틴을 실행하고 결과를 기다립니다.
+    현재 작업이 취소되거나 마감을 넘기면 코루틴(진행 중인 요청 포함)도 취소됩니다.
+    """
+    return tasks.wait_future(_runtime.submit(coro))
+
+def cache_stats() -> dict:
+    """응답 캐시의 단계(프롬프트 템플릿)별 적중/근사 적중/실패 횟수"""
+    return _get_responses().stats()
+
+def reset_cache_stats() -> None:
+    _get_responses().reset_stats()
+
+def metrics() -> dict:
+    """재시도·레이트 리밋·차단기 지표 (utils.rate_limit.RetryController.metrics 참고)"""
+    return _get_controller().metrics()
+
+def reset_metrics() -> None:
+    _get_controller().reset_metrics()
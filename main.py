@@ -1,14 +1,20 @@
 import sys
-import threading
-from book_info import get_book_context
-from review_crawler import get_reviews
-from review_processor import process_reviews
+import argparse
+from concurrent.futures import Future
+from pipeline import startup_pipeline
 from outline_generator import generate_subtopics
-from utils.io import select_items_from_list, save_review_to_file
-from interview import ask_interview_questions, conduct_interview
+from utils.io import select_items_from_list, ReviewFileWriter
+from interview import conduct_interview
 from question_generator import generate_guided_questions
 from review_writer import write_chapter_from_answers
+from chapter_pipeline import ChapterPipeline
+from subtopic_speculator import SubtopicSpeculator
 from utils.progress import Progress
+from utils import tasks, prompt_builder
+from utils.tasks import run_with_progress
+from utils.session import Session
+from utils.trace import tracer, summary_table, TRACE_PATH
+import llm_client
 
 def get_valid_input(prompt: str, error_msg: str = "입력이 올바르지 않습니다. 다시 시도해주세요.") -> str:
     """사용자로부터 유효한 입력을 받습니다."""
@@ -18,42 +24,240 @@ def get_valid_input(prompt: str, error_msg: str = "입력이 올바르지 않습
             return user_input
         print(error_msg)
 
-def async_task_with_progress(task_func, progress_desc, *args, **kwargs):
+def ask_chapter_mode(idx: int, total: int, subtopic: str) -> str:
+    """챕터 작성 방식을 사용자에게 묻고 '1' 또는 '2'를 반환합니다."""
+    print(f"\n[챕터 {idx+1}/{total}: {subtopic}]")
+    print("1. 직접 작성하기")
+    print("2. 질문 받고 작성하기 (GPT가 인터뷰 후 챕터 자동 생성)")
+
+    while True:
+        mode = input("선택 (1 또는 2): ").strip()
+        if mode in ["1", "2"]:
+            return mode
+        print("1 또는 2를 입력해주세요.")
+
+def collect_guided_answers(guided_questions: list) -> dict:
+    """가이드 질문에 대한 사용자 답변을 질문-답변 딕셔너리로 수집합니다."""
+    answers = {}
+    print("\n[아래 질문에 답해주세요:]")
+    for q_idx, q in enumerate(guided_questions, start=1):
+        print(f"\n[{q_idx}/{len(guided_questions)}] {q}")
+        answers[q] = get_valid_input("> ")
+    return answers
+
+def stream_chapter(subtopic: str, answers: dict, book_context: str, review_points: list, sink) -> str:
+    """챕터 본문을 생성되는 대로 터미널에 출력하면서 리뷰 파일에도 바로 기록합니다."""
+    print(f"\n✍️ '{subtopic}' 챕터 작성 중...\n")
+
+    def on_token(piece):
+        sys.stdout.write(piece)
+        sys.stdout.flush()
+        sink.write(piece)
+
+    try:
+        content = write_chapter_from_answers(subtopic, answers, book_context, review_points, on_token=on_token)
+    finally:
+        sink.close()
+        print()
+    return content
+
+def print_resumed(idx: int, total: int, subtopic: str, note: str) -> None:
+    print(f"\n[챕터 {idx+1}/{total}: {subtopic}] {note}")
+
+def write_chapters_sequential(selected_subtopics: list, book_context: str, review_points: list,
+                              writer: ReviewFileWriter, session: Session, prefetched: dict = None) -> list:
     """
-    비동기로 작업을 실행하면서 진행 상태를 표시합니다.
+    소제목마다 질문 생성 → 답변 → 챕터 작성을 차례대로 진행합니다.
+    세션에 기록된 챕터와 답변은 다시 묻거나 작성하지 않습니다.
     """
-    result = [None]
-    exception = [None]
-    completed = [False]
+    chapters = []
+    for idx, subtopic in enumerate(selected_subtopics):
+        content = session.get("chapter", key=subtopic)
+        if content is not None:
+            print_resumed(idx, len(selected_subtopics), subtopic, "(이전 세션에서 작성됨)")
+            writer.write_chapter(idx, content)
+            chapters.append({"title": subtopic, "content": content})
+            continue
+
+        answers = session.get("chapter_answers", key=subtopic)
+        if answers is not None:
+            print_resumed(idx, len(selected_subtopics), subtopic, "(이전 답변으로 작성)")
+        else:
+            mode = ask_chapter_mode(idx, len(selected_subtopics), subtopic)
 
-    def worker():
-        try:
-            result[0] = task_func(*args, **kwargs)
-        except Exception as e:
-            exception[0] = e
-        finally:
-            completed[0] = True
+            if mode == "1":
+                content = get_valid_input(f"\n'{subtopic}'에 대한 내용을 자유롭게 작성해주세요:\n> ")
+                writer.write_chapter(idx, content)
+                session.record("chapter", content, key=subtopic)
+                chapters.append({"title": subtopic, "content": content})
+                continue
+
+            # GPT가 해당 소제목에 대해 질문 생성 (비동기 + 프로그레스 표시)
+            # 인터뷰 중에 미리 요청해 둔 질문이 있으면 그 결과를 씁니다.
+            future = (prefetched or {}).get(subtopic)
+            if future is not None:
+                guided_questions = run_with_progress(tasks.wait_future, f"'{subtopic}' 주제 질문 생성 중", future)
+            else:
+                guided_questions = run_with_progress(
+                    generate_guided_questions,
+                    f"'{subtopic}' 주제 질문 생성 중",
+                    subtopic,
+                    book_context,
+                    review_points
+                )
+            session.record("guided_questions", guided_questions, key=subtopic)
 
-    # 작업 스레드 시작
-    thread = threading.Thread(target=worker)
-    thread.daemon = True
-    thread.start()
+            # 사용자 답변 수집 (동기식)
+            answers = collect_guided_answers(guided_questions)
+            session.record("chapter_answers", answers, key=subtopic)
 
-    # 진행 상태 표시
-    Progress.indeterminate(desc=progress_desc, callback=lambda: completed[0])
+        # 챕터 작성 (스트리밍 출력 + 파일 기록)
+        content = stream_chapter(subtopic, answers, book_context, review_points, writer.chapter(idx))
+        session.record("chapter", content, key=subtopic)
+        chapters.append({"title": subtopic, "content": content})
 
-    # 예외 발생 확인
-    if exception[0]:
-        raise exception[0]
+    return chapters
 
-    return result[0]
+def write_chapters_parallel(selected_subtopics: list, book_context: str, review_points: list,
+                            writer: ReviewFileWriter, session: Session, prefetched: dict = None) -> list:
+    """
+    모든 소제목의 가이드 질문을 미리 병렬 생성하고,
+    답변이 끝난 챕터부터 백그라운드에서 작성하는 동안 다음 소제목 답변을 받습니다.
+    작성되는 챕터 내용은 차례가 되는 대로 리뷰 파일에 바로 기록되고,
+    끝난 챕터는 다음 질문 전에, 마지막 답변 뒤에는 남은 챕터가 생성되는 대로 터미널에도 출력됩니다.
+    세션에 기록된 챕터와 답변은 다시 묻거나 작성하지 않습니다.
+    """
+    completed = {}
+    for subtopic in selected_subtopics:
+        content = session.get("chapter", key=subtopic)
+        if content is not None:
+            completed[subtopic] = content
+    pipeline = ChapterPipeline(
+        selected_subtopics, book_context, review_points, writer=writer, prefetched=prefetched,
+        completed=completed, on_chapter=lambda subtopic, content: session.record("chapter", content, key=subtopic)
+    )
+    try:
+        for idx, subtopic in enumerate(selected_subtopics):
+            # 그사이 다 써진 챕터를 다음 질문으로 넘어가기 전에 보여줍니다.
+            writer.show_finished()
+            if pipeline.is_completed(subtopic):
+                print_resumed(idx, len(selected_subtopics), subtopic, "(이전 세션에서 작성됨)")
+                continue
+            answers = session.get("chapter_answers", key=subtopic)
+            if answers is not None:
+                print_resumed(idx, len(selected_subtopics), subtopic, "(이전 답변으로 작성)")
+                pipeline.submit_answers(subtopic, answers)
+                continue
+
+            mode = ask_chapter_mode(idx, len(selected_subtopics), subtopic)
 
-def main():
+            if mode == "1":
+                pipeline.skip_questions(subtopic)
+                content = get_valid_input(f"\n'{subtopic}'에 대한 내용을 자유롭게 작성해주세요:\n> ")
+                pipeline.add_written(subtopic, content)
+            else:
+                future = pipeline.questions_future(subtopic)
+                if future.done():
+                    guided_questions = future.result()
+                else:
+                    guided_questions = run_with_progress(
+                        tasks.wait_future,
+                        f"'{subtopic}' 주제 질문 생성 중",
+                        future
+                    )
+
+                session.record("guided_questions", guided_questions, key=subtopic)
+
+                answers = collect_guided_answers(guided_questions)
+                session.record("chapter_answers", answers, key=subtopic)
+                pipeline.submit_answers(subtopic, answers)
+
+        # 남은 챕터는 차례가 된 것부터 생성되는 대로 터미널에 출력합니다.
+        pending = pipeline.pending()
+        if pending:
+            print(f"\n✍️ 남은 챕터 {pending}개 작성 중...\n")
+        writer.follow()
+        try:
+            return run_with_progress(pipeline.collect, f"남은 챕터 {pending}개 작성 중", quiet=True)
+        finally:
+            print()
+    finally:
+        pipeline.shutdown()
+
+def finish_trace(path: str) -> None:
+    """기록한 구간을 파일로 내보내고 구간별 요약표를 출력합니다."""
+    spans = tracer.spans()
+    tracer.export(path, spans)
+    print(f"\n🔎 구간별 소요 시간·토큰·비용 (트레이스: {path})")
+    print(summary_table(spans))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="책 리뷰 생성기")
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="챕터 질문 생성과 작성을 미리 병렬로 진행하지 않고 하나씩 차례대로 진행합니다."
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="각 단계(책 정보 수집, 소제목 생성 등)의 최대 대기 시간(초). 넘기면 진행 중인 요청을 취소합니다."
+    )
+    parser.add_argument(
+        "--no-speculate",
+        action="store_true",
+        help="인터뷰 답변 중에 소제목 후보를 미리 만들지 않고, 인터뷰가 끝난 뒤 생성합니다."
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="SESSION",
+        default=None,
+        help="중단된 세션(ID 또는 latest)을 이어서 진행합니다. 끝난 단계와 답변은 다시 하지 않습니다."
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        default=TRACE_PATH or None,
+        help="LLM 호출·크롤링·캐시 조회·단계별 구간을 기록해 파일로 내보내고 요약표를 출력합니다. "
+             ".json이면 Chrome 트레이스(chrome://tracing, Perfetto), 아니면 JSONL 형식입니다."
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # 클라이언트는 첫 요청에서 만들어지므로, 입력을 받기 전에 API 키 설정만 먼저 확인합니다.
+    # 잘못된 프롬프트 템플릿도 크롤링·LLM 호출을 시작하기 전에 드러나도록 여기서 모두 읽고 검사합니다.
+    try:
+        llm_client.check_api_key()
+        prompt_builder.preload_templates()
+    except Exception as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    tasks.set_default_timeout(args.timeout)
+    if args.trace:
+        tracer.enable()
     print("📘 책 리뷰 생성기에 오신 걸 환영합니다!")
 
-    # 1. 책 정보 입력
-    title = get_valid_input("책 제목을 입력하세요: ", "책 제목은 필수입니다.")
-    author = get_valid_input("저자명을 입력하세요: ", "저자명은 필수입니다.")
+    # 1. 책 정보 입력 (이어서 진행하면 세션에 기록된 값을 씁니다)
+    # 단계별 결과는 세션 파일에 바로 기록되므로, 중간에 실패해도 --resume으로 남은 단계만 다시 할 수 있습니다.
+    if args.resume:
+        try:
+            session = Session.open(args.resume)
+        except Exception as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        book = session.get("session") or {}
+        if not book.get("title") or not book.get("author"):
+            print(f"❌ 세션 {session.id}에 책 정보가 기록되어 있지 않아 이어서 진행할 수 없습니다.")
+            sys.exit(1)
+        title, author = book["title"], book["author"]
+        print(f"🔁 세션 {session.id}을(를) 이어서 진행합니다: 『{title}』 ({author})")
+    else:
+        title = get_valid_input("책 제목을 입력하세요: ", "책 제목은 필수입니다.")
+        author = get_valid_input("저자명을 입력하세요: ", "저자명은 필수입니다.")
+        session = Session.create(title=title, author=author)
+        print(f"🗂️ 세션 ID: {session.id}")
 
     # 진행 단계 정의
     steps = [
@@ -70,145 +274,132 @@ def main():
         # 진행 상태 표시 시작
         Progress.step_progress(steps, 0)
 
-        # 2. 책 정보 요약 (비동기 + 프로그레스 표시)
-        book_context = async_task_with_progress(
-            get_book_context, 
-            f"'{title}' 책 정보 수집 중",
-            title, 
-            author
-        )
-
-        if not book_context:
-            raise Exception("책 정보를 가져오는데 실패했습니다.")
-
-        Progress.step_progress(steps, 1)
-
-        # 3. 리뷰 수집 및 키워드 추출 (비동기 + 프로그레스 표시)
-        reviews = async_task_with_progress(
-            get_reviews,
-            f"'{title}' 리뷰 수집 중",
-            title,
-            author
-        )
-        if not reviews:
-            print("\n⚠️ 리뷰를 수집하지 못했습니다. 리뷰가 없는 책일 수 있습니다.")
-            review_points=[]
-        else:
-            Progress.step_progress(steps, 2)
-            # 리뷰 분석
-            review_points = async_task_with_progress(
-                process_reviews,
-                "리뷰 분석 중",
-                title,
-                reviews
+        # 2~5. 책 정보 요약, 리뷰 수집·분석, 인터뷰 질문 생성 (의존성 그래프로 병렬 실행)
+        # 책 정보와 리뷰 수집은 서로 독립이므로 동시에 진행됩니다.
+        # 세션에 기록된 단계는 입력으로 넘겨 다시 실행하지 않습니다.
+        with tracer.span("startup", "step"):
+            inputs = {"title": title, "author": author}
+            for name in startup_pipeline.stages:
+                if session.has(name):
+                    inputs[name] = session.get(name)
+            run = run_with_progress(
+                startup_pipeline.run,
+                f"'{title}' 책 정보·리뷰 수집 및 인터뷰 질문 생성 중",
+                inputs,
+                on_result=session.record
             )
 
-        Progress.step_progress(steps, 3)
+        book_context = run["book_info"]
+        review_points = run["review_analysis"]
+        questions = run["interview_questions"]
+        if not run["reviews"]:
+            print("\n⚠️ 리뷰를 수집하지 못했습니다. 리뷰가 없는 책일 수 있습니다.")
 
-        # 5. 인터뷰 질문 생성 (비동기 + 프로그레스 표시)
-        questions = async_task_with_progress(
-            ask_interview_questions,
-            "인터뷰 질문 생성 중",
-            book_context,
-            review_points,
-            title
-        )
+        if run.timings:
+            print("\n⏱️ 준비 단계 소요 시간")
+            print(run.report())
+
+        Progress.step_progress(steps, 3)
 
         # 유저 인터뷰 진행 (동기식 - 사용자 입력 필요)
-        user_responses = conduct_interview(book_context, review_points, questions)
+        # 답변이 들어오는 동안 소제목 후보를 백그라운드에서 미리 만들어 둡니다.
+        with tracer.span("interview", "step"):
+            answered = session.get("interview_answers", inputs=questions, default=[])
+            speculator = None
+            if not args.no_speculate and len(answered) < len(questions):
+                speculator = SubtopicSpeculator(book_context, review_points, title, total_answers=len(questions))
+
+            def on_answer(answers):
+                session.record("interview_answers", answers, inputs=questions)
+                if speculator:
+                    speculator.on_answer(answers)
+
+            user_responses = conduct_interview(
+                book_context, review_points, questions, on_answer=on_answer, answered=answered
+            )
 
         Progress.step_progress(steps, 4)
 
         # 6. 소제목 후보 생성 (비동기 + 프로그레스 표시)
-        subtopic_candidates = async_task_with_progress(
-            generate_subtopics,
-            "소제목 후보 생성 중",
-            user_responses,
-            book_context,
-            review_points,
-            title
-        )
-
-        if not subtopic_candidates:
-            raise Exception("소제목 생성에 실패했습니다.")
-
-        # 7. 유저가 소제목 선택 (동기식 - 사용자 입력 필요)
-        selected_subtopics = select_items_from_list(
-            subtopic_candidates,
-            "리뷰에 포함할 소제목을 2~5개 선택해주세요:",
-            min_select=2,
-            max_select=5
-        )
-
-        Progress.step_progress(steps, 5)
-
-        # 8. 각 챕터 작성
-        chapters = []
-        for idx, subtopic in enumerate(selected_subtopics):
-            print(f"\n[챕터 {idx+1}/{len(selected_subtopics)}: {subtopic}]")
-            print("1. 직접 작성하기")
-            print("2. 질문 받고 작성하기 (GPT가 인터뷰 후 챕터 자동 생성)")
-
-            while True:
-                mode = input("선택 (1 또는 2): ").strip()
-                if mode in ["1", "2"]:
-                    break
-                print("1 또는 2를 입력해주세요.")
-
-            if mode == "1":
-                content = get_valid_input(f"\n'{subtopic}'에 대한 내용을 자유롭게 작성해주세요:\n> ")
-                chapters.append({"title": subtopic, "content": content})
-            else:
-                # GPT가 해당 소제목에 대해 질문 생성 (비동기 + 프로그레스 표시)
-                guided_questions = async_task_with_progress(
-                    generate_guided_questions,
-                    f"'{subtopic}' 주제 질문 생성 중",
-                    subtopic,
-                    book_context,
-                    review_points
+        with tracer.span("subtopics", "step"):
+            subtopic_candidates = session.get("subtopics", inputs=user_responses)
+            resumed = subtopic_candidates is not None
+            if resumed:
+                print(f"🧩 이전 세션의 소제목 후보 {len(subtopic_candidates)}개를 사용합니다.")
+            elif speculator:
+                subtopic_candidates = run_with_progress(
+                    speculator.result,
+                    "소제목 후보 정리 중",
+                    user_responses
                 )
-
-                # 사용자 답변 수집 (동기식)
-                answers = {}
-                print("\n[아래 질문에 답해주세요:]")
-                for q_idx, q in enumerate(guided_questions, start=1):
-                    print(f"\n[{q_idx}/{len(guided_questions)}] {q}")
-                    ans = get_valid_input("> ")
-                    answers[q] = ans
-
-                # 챕터 작성 (비동기 + 프로그레스 표시)
-                content = async_task_with_progress(
-                    write_chapter_from_answers,
-                    f"'{subtopic}' 챕터 작성 중",
-                    subtopic,
-                    answers,
+            else:
+                subtopic_candidates = run_with_progress(
+                    generate_subtopics,
+                    "소제목 후보 생성 중",
+                    user_responses,
                     book_context,
-                    review_points
+                    review_points,
+                    title
                 )
 
-                chapters.append({"title": subtopic, "content": content})
+            if not subtopic_candidates:
+                raise Exception("소제목 생성에 실패했습니다.")
+            if not resumed:
+                session.record("subtopics", subtopic_candidates, inputs=user_responses)
 
-        Progress.step_progress(steps, 6)
+        # 7. 유저가 소제목 선택 (동기식 - 사용자 입력 필요)
+        with tracer.span("select_subtopics", "step"):
+            selected_subtopics = session.get("selected_subtopics", inputs=subtopic_candidates)
+            if selected_subtopics is None:
+                selected_subtopics = select_items_from_list(
+                    subtopic_candidates,
+                    "리뷰에 포함할 소제목을 2~5개 선택해주세요:",
+                    min_select=2,
+                    max_select=5
+                )
+                session.record("selected_subtopics", selected_subtopics, inputs=subtopic_candidates)
 
-        # 10. 리뷰 조립 및 저장
-        final_review = f"# 『{title}』 리뷰\n\n"
-        for chapter in chapters:
-            final_review += f"## {chapter['title']}\n{chapter['content']}\n\n"
+        Progress.step_progress(steps, 5)
 
+        # 8. 각 챕터 작성 (완성되는 내용은 바로 리뷰 파일에 기록)
         filename = f"{title}_review.txt"
-        save_review_to_file(final_review, filename=filename)
+        with tracer.span("chapters", "step"):
+            with ReviewFileWriter(title, selected_subtopics, filename=filename) as writer:
+                prefetched = speculator.take_questions(selected_subtopics) if speculator else {}
+                if speculator:
+                    speculator.shutdown()
+                # 세션에 기록된 가이드 질문은 다시 요청하지 않습니다.
+                for subtopic in selected_subtopics:
+                    recorded = session.get("guided_questions", key=subtopic)
+                    if recorded is not None:
+                        prefetched[subtopic] = Future()
+                        prefetched[subtopic].set_result(recorded)
+                if args.sequential:
+                    write_chapters_sequential(selected_subtopics, book_context, review_points, writer, session, prefetched)
+                else:
+                    write_chapters_parallel(selected_subtopics, book_context, review_points, writer, session, prefetched)
+
+                Progress.step_progress(steps, 6)
 
         Progress.step_progress(steps, 7)  # 완료
+        session.record("done", filename)
 
         print("\n✅ 리뷰가 성공적으로 생성되어 저장되었습니다!")
         print(f"📄 파일명: {filename}")
 
     except KeyboardInterrupt:
+        # 백그라운드에서 진행 중인 LLM 요청까지 모두 취소합니다.
+        llm_client.cancel_all()
         print("\n\n프로그램이 사용자에 의해 중단되었습니다.")
+        print(f"💾 이어서 하려면: python main.py --resume {session.id}")
         sys.exit(0)
     except Exception as e:
         print(f"\n❌ 오류 발생: {e}")
+        print(f"💾 진행 상황이 저장되었습니다. 이어서 하려면: python main.py --resume {session.id}")
         sys.exit(1)
+    finally:
+        if args.trace:
+            finish_trace(args.trace)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,24 +1,22 @@
-from utils.io import load_text
-import llm_client
+from utils.prompt_builder import build_prompt
+from utils.structured import ask_list
 
-def generate_subtopics(user_responses: list, book_context: str, review_points: list, title: str) -> list:
+def generate_subtopics(user_responses: list, book_context: str, review_points: list, title: str,
+                       verbose: bool = True) -> list:
     """
     유저의 감상, 책 정보, 리뷰 키워드를 종합해 GPT에게 리뷰용 소제목 후보를 요청합니다.
+    verbose=False면 백그라운드 호출이 입력 화면을 어지럽히지 않도록 결과를 출력하지 않습니다.
     """
-    prompt_template = load_text("prompts/subtopics.txt")
-
-    formatted_responses = "\n".join(f"- {resp}" for resp in user_responses)
-    formatted_keywords = "\n".join(f"- {rp}" for rp in review_points)
-
-    prompt = prompt_template.format(
+    prompt = build_prompt(
+        "subtopics",
         title=title,
         book_context=book_context,
-        review_points=formatted_keywords,
-        user_responses=formatted_responses
+        review_points=review_points,
+        user_responses=user_responses
     )
 
-    response = llm_client.ask(prompt)
-    subtopics = [line.strip("- ").strip() for line in response.strip().splitlines() if line.strip()]
+    subtopics = ask_list(prompt, stage="subtopics")
 
-    print(f"🧩 소제목 후보 {len(subtopics)}개 생성됨.")
+    if verbose:
+        print(f"🧩 소제목 후보 {len(subtopics)}개 생성됨.")
     return subtopics
\ No newline at end of file
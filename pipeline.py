@@ -0,0 +1,177 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils import tasks
+from utils.trace import tracer
+from book_info import get_book_context
+from review_crawler import get_reviews
+from review_processor import process_reviews
+from review_filter import clean_reviews
+from interview import ask_interview_questions
+
+# 분석할 최대 리뷰 수. 리뷰가 많으면 review_processor가 묶음별 맵리듀스로 분석합니다.
+MAX_REVIEWS = int(os.getenv("MAX_REVIEWS", "10"))
+
+class Stage:
+    """
+    파이프라인 그래프의 노드 하나
+
+    :param name: 단계 이름 (결과를 참조할 때 쓰는 키)
+    :param func: 실행할 함수. deps에 적힌 값들이 순서대로 위치 인자로 전달됩니다.
+    :param deps: 다른 단계 이름 또는 실행 시 넘기는 입력 이름의 리스트
+    :param desc: 진행 상태 표시에 쓸 설명
+    """
+
+    def __init__(self, name: str, func, deps: list = (), desc: str = None):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.desc = desc or name
+
+class PipelineRun:
+    """파이프라인 한 번 실행의 결과와 단계별 시간 기록"""
+
+    def __init__(self, inputs: dict):
+        self.results = dict(inputs)
+        self.timings = {}    # 단계 이름 -> 소요 시간(초)
+        self.started = {}    # 단계 이름 -> 실행 시작으로부터의 시작 시점(초)
+        self.running = set()
+        self.elapsed = 0.0
+        self.done = threading.Event()
+
+    def __getitem__(self, name: str):
+        return self.results[name]
+
+    def running_desc(self, pipeline: "Pipeline") -> str:
+        """지금 실행 중인 단계들의 설명"""
+        return ", ".join(pipeline.stages[name].desc for name in sorted(self.running)) or "대기 중"
+
+    def report(self) -> str:
+        """단계별 시작 시점과 소요 시간을 표로 만듭니다."""
+        lines = [f"{'단계':<22}{'시작(초)':>10}{'소요(초)':>10}"]
+        for name in sorted(self.timings, key=lambda n: self.started[n]):
+            lines.append(f"{name:<22}{self.started[name]:>10.2f}{self.timings[name]:>10.2f}")
+        lines.append(f"{'total':<22}{'':>10}{self.elapsed:>10.2f}")
+        return "\n".join(lines)
+
+class Pipeline:
+    """
+    단계(Stage)의 의존성 그래프를 실행하는 스케줄러
+
+    - 의존하는 단계가 모두 끝난 단계는 바로 스레드 풀에 넣어, 서로 독립인 단계가 동시에 실행됩니다.
+    - 한 단계라도 실패하면 아직 시작하지 않은 단계를 취소하고 그 예외를 다시 발생시킵니다.
+    - 대화형 실행(main.py)과 배치 실행(batch.py)이 같은 그래프를 공유합니다.
+    """
+
+    def __init__(self, stages: list):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"중복된 단계 이름입니다: {stage.name}")
+            self.stages[stage.name] = stage
+
+    def _order(self, inputs: dict, targets: list = None) -> list:
+        """targets에 필요한 단계만 골라 의존성 순서로 정렬합니다."""
+        order, visiting = [], set()
+
+        def visit(name):
+            if name in order or name in inputs:
+                return
+            if name not in self.stages:
+                raise ValueError(f"알 수 없는 단계 또는 입력입니다: {name}")
+            if name in visiting:
+                raise ValueError(f"단계 의존성에 순환이 있습니다: {name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in targets or self.stages:
+            visit(name)
+        return order
+
+    def start(self, inputs: dict, targets: list = None, max_workers: int = None, on_result=None) -> tuple:
+        """
+        그래프 실행을 백그라운드에서 시작합니다.
+        inputs에 단계 이름이 들어 있으면 그 단계는 이미 끝난 것으로 보고 실행하지 않습니다.
+
+        :param on_result: 단계가 끝날 때마다 (단계 이름, 결과)로 호출할 함수 (예: 세션 기록)
+        :return: (PipelineRun, 완료 시 PipelineRun을 돌려주는 Future)
+        """
+        order = self._order(inputs, targets)
+        run = PipelineRun(inputs)
+        runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline")
+        # 단계들은 호출한 쪽의 취소 토큰(utils.tasks)을 이어받습니다.
+        future = runner.submit(tasks.bind(self._execute), run, order, max_workers, on_result)
+        runner.shutdown(wait=False)
+        return run, future
+
+    def run(self, inputs: dict, targets: list = None, max_workers: int = None, on_result=None) -> PipelineRun:
+        """그래프를 실행하고 끝날 때까지 기다립니다."""
+        _, future = self.start(inputs, targets, max_workers, on_result)
+        return future.result()
+
+    def _execute(self, run: PipelineRun, order: list, max_workers: int = None, on_result=None) -> PipelineRun:
+        pending = list(order)
+        origin = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(order) or 1, thread_name_prefix="stage")
+        futures = {}
+
+        def call(stage):
+            started = time.perf_counter()
+            run.started[stage.name] = started - origin
+            run.running.add(stage.name)
+            try:
+                with tracer.span(stage.name, "stage"):
+                    return stage.func(*(run.results[dep] for dep in stage.deps))
+            finally:
+                run.running.discard(stage.name)
+                run.timings[stage.name] = time.perf_counter() - started
+
+        try:
+            while pending or futures:
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if all(dep in run.results for dep in stage.deps):
+                        pending.remove(name)
+                        futures[executor.submit(tasks.bind(call), stage)] = name
+
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = futures.pop(future)
+                    run.results[name] = future.result()
+                    if on_result is not None:
+                        on_result(name, run.results[name])
+            return run
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            run.elapsed = time.perf_counter() - origin
+            run.done.set()
+
+def _book_context(title: str, author: str) -> str:
+    book_context = get_book_context(title, author)
+    if not book_context:
+        raise Exception("책 정보를 가져오는데 실패했습니다.")
+    return book_context
+
+def _reviews(title: str, author: str) -> list:
+    return get_reviews(title, author, max_reviews=MAX_REVIEWS)
+
+def _review_points(title: str, reviews: list) -> list:
+    return process_reviews(title, reviews) if reviews else []
+
+# 책 정보 수집과 리뷰 수집은 서로 독립이므로 동시에 실행되고,
+# 수집한 리뷰는 로컬 필터(중복·광고·저품질 제거)를 거쳐 분석됩니다.
+# 인터뷰 질문은 두 갈래가 모두 끝난 뒤 생성됩니다.
+STARTUP_STAGES = [
+    Stage("book_info", _book_context, ["title", "author"], desc="책 정보 수집"),
+    Stage("reviews", _reviews, ["title", "author"], desc="리뷰 수집"),
+    Stage("review_filter", clean_reviews, ["reviews"], desc="리뷰 정리"),
+    Stage("review_analysis", _review_points, ["title", "review_filter"], desc="리뷰 분석"),
+    Stage("interview_questions", ask_interview_questions, ["book_info", "review_analysis", "title"],
+          desc="인터뷰 질문 생성"),
+]
+
+startup_pipeline = Pipeline(STARTUP_STAGES)
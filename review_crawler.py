@@ -1,114 +1,329 @@
-import requests
-from bs4 import BeautifulSoup
-import re
+import os
+import math
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from typing import Optional
 from utils.cache import cache
+from utils import tasks
+from utils.trace import tracer
+from utils.html_extract import SelectorExtractor, find_first_attribute
+from review_store import ReviewStore, review_hash
 
-@cache.cached
-def get_reviews(title: str, author: str, max_reviews: int = 10, timeout: int = 10) -> list:
+# 크롤링 대상 주소 (로컬 픽스처 서버로 바꿔 테스트할 수 있도록 환경 변수로 지정 가능)
+BASE_URL = os.getenv("YES24_BASE_URL", "https://www.yes24.com").rstrip("/")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# 리뷰 목록 한 페이지에 보통 담기는 리뷰 수 (첫 페이지 결과로 다시 계산합니다)
+REVIEWS_PER_PAGE = 5
+# 한 번에 가져올 최대 리뷰 페이지 수
+MAX_PAGES = 50
+
+# 이 시간(초) 안에 수집한 책은 새 리뷰를 확인하지 않고 저장된 리뷰를 사용
+REFRESH_INTERVAL = 6 * 3600
+
+# 호스트별 동시 요청 수와 요청 시작 간격(초)
+HOST_MAX_CONCURRENT = 6
+HOST_MIN_INTERVAL = 0.05
+
+# 다양한 가능한 선택자로 리뷰 찾기
+POSSIBLE_SELECTORS = [
+    "div.reviewInfoBot.cropContentsReview",  # 원래 선택자
+    "div.review_cont",                       # 내용 컨테이너
+    "ul.reviewList li p.review_cont",        # 리스트 형태 선택자
+    "div.reviewInfoBot p",                   # 정보 블록 내 단락
+    "div.reviewInfoWrap div.reviewInfoBot",  # 래퍼 내부 선택자
+    "p.reviewContent"                        # 내용 단락
+]
+
+class HostLimiter:
+    """
+    호스트별 예의(politeness) 제한
+    같은 호스트에 동시에 보내는 요청 수와 요청 시작 간격을 제한합니다.
     """
-    주어진 책 제목을 기반으로 YES24 검색 결과에서 리뷰 텍스트를 크롤링합니다.
-    책 ID를 추출하여 리뷰 페이지에 직접 접근하는 방식으로 개선되었습니다.
-    결과는 캐시되어 동일한 요청에 대해 재사용됩니다.
+
+    def __init__(self, max_concurrent: int = HOST_MAX_CONCURRENT, min_interval: float = HOST_MIN_INTERVAL):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._hosts = {}  # host -> [세마포어, 다음 요청 가능 시각]
+
+    def _state(self, host: str) -> list:
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = [threading.BoundedSemaphore(self.max_concurrent), 0.0]
+            return self._hosts[host]
+
+    def acquire(self, host: str) -> None:
+        state = self._state(host)
+        state[0].acquire()
+        with self._lock:
+            start_at = max(state[1], time.monotonic())
+            state[1] = start_at + self.min_interval
+        delay = start_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def release(self, host: str) -> None:
+        self._state(host)[0].release()
+
+def _make_session() -> "requests.Session":
+    """TCP/TLS 연결을 재사용하는 커넥션 풀 세션을 만듭니다."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+# requests는 읽는 데 시간이 걸리므로 세션은 첫 요청에서 만듭니다. (시작 직후 입력 프롬프트를 빨리 띄우기 위해)
+# 추출기와 리뷰 저장소도 .cache/ 아래 파일을 쓰므로 처음 쓸 때 만듭니다. (배치 워커는 포크한 뒤 각자 엽니다)
+_session = None
+_session_lock = threading.Lock()
+_extractor = None
+_store = None
+_state_lock = threading.Lock()
+_host_limiter = HostLimiter()
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="crawler")
+
+def _get_session() -> "requests.Session":
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _make_session()
+        return _session
+
+def _get_extractor() -> SelectorExtractor:
+    global _extractor
+    with _state_lock:
+        if _extractor is None:
+            _extractor = SelectorExtractor(POSSIBLE_SELECTORS)
+        return _extractor
+
+def _get_store() -> ReviewStore:
+    global _store
+    with _state_lock:
+        if _store is None:
+            _store = ReviewStore(os.path.join(cache.cache_dir, "reviews.sqlite3"))
+        return _store
+
+def _fetch(url: str, timeout: int, params: dict = None) -> "requests.Response":
+    """
+    공용 세션과 호스트별 제한을 거쳐 GET 요청을 보냅니다.
+    작업이 취소되었으면 요청하지 않고, 작업 마감이 가까우면 제한 시간을 그만큼 줄입니다.
+    """
+    tasks.check()
+    host = urlsplit(url).netloc
+    with tracer.span(host, "crawl", path=urlsplit(url).path) as span:
+        _host_limiter.acquire(host)
+        try:
+            response = _get_session().get(url, params=params, timeout=tasks.remaining(timeout))
+        finally:
+            _host_limiter.release(host)
+        span.set(status=response.status_code, bytes=len(response.content))
+        return response
+
+def _extract_reviews(html: str, label: str = "") -> list:
+    """
+    페이지 HTML을 한 번만 훑어 가능한 선택자를 모두 평가하고 리뷰 텍스트를 추출합니다.
+    이 사이트에서 마지막으로 성공한 선택자를 가장 먼저 사용합니다.
+    """
+    selector, texts, count = _get_extractor().extract(html)
+    if selector:
+        print(f"✓ {label}선택자 '{selector}'로 리뷰 요소 {count}개를 찾았습니다.")
+    return texts
+
+def _review_page_url(goods_id: str, alternate: bool) -> tuple:
+    """리뷰 목록 URL과 기본 쿼리 파라미터를 반환합니다."""
+    if alternate:
+        return f"{BASE_URL}/Product/communityModules/GoodsReviewList", {"GoodsNumber": goods_id}
+    return f"{BASE_URL}/Product/communityModules/GoodsReviewList/{goods_id}", {}
+
+def _fetch_review_page(goods_id: str, page: int, alternate: bool, timeout: int) -> list:
+    """
+    리뷰 목록 한 페이지의 리뷰를 반환합니다. 빈 리스트는 정상 응답에 리뷰가 없다는 뜻(목록의 끝)입니다.
+
+    :raises requests.HTTPError: 200이 아닌 응답 (일시적인 503 등을 목록의 끝으로 오해하지 않도록)
+    """
+    url, params = _review_page_url(goods_id, alternate)
+    if page > 1:
+        params = dict(params, PageNumber=page)
+    res = _fetch(url, timeout, params=params)
+    if res.status_code != 200:
+        import requests
+        raise requests.HTTPError(f"{page}페이지 응답 코드 {res.status_code}", response=res)
+    return _extract_reviews(res.text, label=f"{page}페이지 ")
+
+def _resolve_goods_id(title: str, author: str, timeout: int) -> Optional[str]:
+    """
+    제목/저자로 상품 ID를 찾습니다. 이전에 찾은 적이 있으면 검색 페이지를 요청하지 않습니다.
+    검색 결과가 없으면 None, 상품 ID를 읽을 수 없으면 빈 문자열을 반환합니다.
+    """
+    goods_id = _get_store().resolve(title, author)
+    if goods_id:
+        return goods_id
+
+    # 검색 페이지 접근
+    search_res = _fetch(
+        f"{BASE_URL}/Product/Search", timeout,
+        params={"domain": "BOOK", "query": f"{author} {title}"}
+    )
+    search_res.raise_for_status()  # HTTP 오류 확인
+
+    # 검색 결과에서 첫 번째 책의 data-goods-no 속성 찾기 (찾는 즉시 파싱 중단)
+    goods_id = find_first_attribute(search_res.text, "li", "data-goods-no")
+    if goods_id:
+        _get_store().save_resolution(title, author, goods_id)
+    return goods_id
+
+def _crawl(goods_id: str, max_reviews: int, timeout: int) -> None:
+    """
+    저장소에 없는 리뷰만 수집해 저장합니다.
+
+    - 최신 리뷰: 1페이지부터 읽다가 이미 저장된 리뷰를 만나면 멈춥니다.
+    - 오래된 리뷰: 저장된 수가 max_reviews에 못 미치면 필요한 뒤쪽 페이지를 병렬로 요청합니다.
+    """
+    store = _get_store()
+    _, complete, known_count = store.crawl_state(goods_id)
+    known = store.known_hashes(goods_id)
+
+    book_url = f"{BASE_URL}/Product/Goods/{goods_id}"
+    review_url, _ = _review_page_url(goods_id, alternate=False)
+    print(f"✓ 책 URL: {book_url}")
+    print(f"✓ 리뷰 URL: {review_url}")
+
+    # 1. 첫 리뷰 페이지 요청 (처음 수집하는 책이면 상세 페이지 대체 경로도 동시에 요청)
+    first_page = _executor.submit(tasks.bind(_fetch), review_url, timeout)
+    detail_page = _executor.submit(tasks.bind(_fetch), book_url, timeout) if not known_count else None
+
+    review_res = first_page.result()
+    alternate = review_res.status_code != 200
+    if alternate:
+        # 첫 번째 시도가 실패하면 대체 URL 형식 시도
+        url, params = _review_page_url(goods_id, alternate=True)
+        print(f"✓ 대체 리뷰 URL 시도: {url}")
+        review_res = _fetch(url, timeout, params=params)
+        review_res.raise_for_status()
+
+    page_reviews = _extract_reviews(review_res.text)
+    per_page = max(len(page_reviews), REVIEWS_PER_PAGE)
+
+    # 2. 이미 저장된 리뷰가 나올 때까지 최신 리뷰 수집
+    newer, page = [], 1
+    while True:
+        for review in page_reviews:
+            if review_hash(review) in known:
+                break
+            newer.append(review)
+        else:
+            if known_count and page_reviews and page < MAX_PAGES:
+                # 한 페이지 전체가 새 리뷰이면 다음 페이지까지 이어서 확인합니다.
+                page += 1
+                page_reviews = _fetch_review_page(goods_id, page, alternate, timeout)
+                continue
+        break
+
+    # 3. 리뷰 목록에서 찾지 못한 경우, 미리 받아 둔 상세 페이지에서 시도
+    if not newer and not known_count:
+        print("ℹ️ 리뷰 페이지에서 리뷰를 찾지 못했습니다. 상세 페이지에서 시도합니다.")
+        newer = _extract_reviews(detail_page.result().text, label="상세 페이지에서 ")
+        if not newer:
+            print("❌ 웹페이지에서 리뷰를 찾을 수 없습니다.")
+            # 디버깅 파일 저장
+            from bs4 import BeautifulSoup
+            with open("review_page_debug.html", "w", encoding="utf-8") as f:
+                f.write(BeautifulSoup(review_res.text, "html.parser").prettify())
+            print("ℹ️ 디버깅을 위해 review_page_debug.html 파일에 페이지를 저장했습니다.")
+        store.add_reviews(goods_id, newer)
+        store.mark_crawled(goods_id, complete=True)
+        return
+    if detail_page is not None:
+        detail_page.cancel()
+
+    # 4. 목표 개수에 못 미치면 더 오래된 리뷰가 있는 페이지를 병렬로 요청
+    older = []
+    total = known_count + len(newer)
+    if total < max_reviews and not complete and page_reviews:
+        first_older = max(page + 1, total // per_page + 1)
+        last_page = min(math.ceil(max_reviews / per_page), MAX_PAGES)
+        pages = [
+            (p, _executor.submit(tasks.bind(_fetch_review_page), goods_id, p, alternate, timeout))
+            for p in range(first_older, last_page + 1)
+        ]
+        # 한 페이지가 실패해도 최신 리뷰와 그 앞 페이지까지는 저장합니다. 저장소의 순서(seq)에 빈틈이 생기지 않도록
+        # 실패한 페이지 뒤쪽은 버리며, 다음 수집이 저장된 개수를 기준으로 실패한 페이지부터 다시 요청합니다.
+        for p, future in pages:
+            try:
+                reviews = future.result()
+            except tasks.TaskCancelled:
+                raise
+            except Exception as e:
+                print(f"⚠️ {p}페이지를 가져오지 못해 이후 페이지는 다음 수집에서 다시 확인합니다: {e}")
+                break
+            if not reviews:
+                # 정상 응답에 리뷰가 없는 페이지만 목록의 끝으로 봅니다. (complete는 저장소에서 되돌릴 수 없습니다)
+                complete = True
+                break
+            older.extend(reviews)
+        for _, future in pages:
+            future.cancel()  # 아직 시작하지 않은 뒤쪽 페이지 요청
+
+    added = store.add_reviews(goods_id, newer, older)
+    store.mark_crawled(goods_id, complete=complete or not page_reviews)
+    print(f"✓ 새 리뷰 {added}건 저장 (최신 {len(newer)}건, 이전 페이지 {len(older)}건 확인)")
+
+def get_reviews(title: str, author: str, max_reviews: int = 10, timeout: int = 10, skip_cache: bool = False) -> list:
+    """
+    주어진 책 제목을 기반으로 YES24 리뷰 텍스트를 최신순으로 반환합니다.
+    리뷰는 상품 ID 기준의 로컬 저장소에 쌓이며, 최근에 수집한 책은 HTTP 요청 없이 저장소에서 반환하고
+    그 외에는 마지막 수집 이후의 새 리뷰(와 부족한 만큼의 이전 리뷰)만 수집합니다.
+
+    :param skip_cache: True이면 최근에 수집했더라도 새 리뷰를 확인합니다.
     """
     if not title:
         print("❌ 책 제목이 입력되지 않았습니다.")
         return []
 
-    print("📡 YES24에서 리뷰를 수집 중입니다...")
-
+    import requests  # 아래 예외 처리에 필요합니다. (모듈 import 시점에는 읽지 않습니다)
     try:
-        # 1. 검색 페이지 접근
-        search_url = f"https://www.yes24.com/Product/Search?domain=BOOK&query={author}%20{title}"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-
-        search_res = requests.get(search_url, headers=headers, timeout=timeout)
-        search_res.raise_for_status()  # HTTP 오류 확인
+        # 1. 상품 ID 확인 (저장된 값이 없을 때만 검색 페이지 요청)
+        goods_id = _resolve_goods_id(title, author, timeout)
 
-        # 2. 검색 결과 파싱하여 첫 번째 책의 data-goods-no 속성 찾기
-        soup = BeautifulSoup(search_res.text, "html.parser")
-        first_item = soup.select_one("li[data-goods-no]")
-
-        if not first_item:
+        if goods_id is None:
             print("❌ 책을 찾을 수 없습니다. 검색 결과가 없거나 웹사이트 구조가 변경되었습니다.")
             return []
 
-        # 3. data-goods-no 속성에서 상품 ID 추출
-        goods_id = first_item.get("data-goods-no")
         if not goods_id:
             print("❌ 상품 ID를 추출할 수 없습니다.")
             return []
 
         print(f"✓ 상품 ID: {goods_id}")
 
-        # 4. 책 상세 URL 생성
-        book_url = f"https://www.yes24.com/Product/Goods/{goods_id}"
-        print(f"✓ 책 URL: {book_url}")
-
-        # 5. 리뷰 페이지 직접 접근
-        review_url = f"https://www.yes24.com/Product/communityModules/GoodsReviewList/{goods_id}"
-        print(f"✓ 리뷰 URL: {review_url}")
-
-        review_res = requests.get(review_url, headers=headers, timeout=timeout)
-        if review_res.status_code != 200:
-            # 첫 번째 시도가 실패하면 대체 URL 형식 시도
-            review_url = f"https://www.yes24.com/Product/communityModules/GoodsReviewList?GoodsNumber={goods_id}"
-            print(f"✓ 대체 리뷰 URL 시도: {review_url}")
-            review_res = requests.get(review_url, headers=headers, timeout=timeout)
-            review_res.raise_for_status()
-
-        # 5. 리뷰 페이지 파싱
-        review_soup = BeautifulSoup(review_res.text, "html.parser")
-
-        # 6. 다양한 가능한 선택자로 리뷰 찾기
-        possible_selectors = [
-            "div.reviewInfoBot.cropContentsReview",  # 원래 선택자
-            "div.review_cont",                       # 내용 컨테이너
-            "ul.reviewList li p.review_cont",        # 리스트 형태 선택자
-            "div.reviewInfoBot p",                   # 정보 블록 내 단락
-            "div.reviewInfoWrap div.reviewInfoBot",  # 래퍼 내부 선택자
-            "p.reviewContent"                        # 내용 단락
-        ]
+        # 2. 최근에 충분히 수집해 둔 책이면 저장소에서 바로 반환
+        store = _get_store()
+        last_crawled, complete, count = store.crawl_state(goods_id)
+        fresh = last_crawled is not None and time.time() - last_crawled < REFRESH_INTERVAL
+        if fresh and (count >= max_reviews or complete) and not skip_cache:
+            print(f"[캐시] 저장된 리뷰 {min(count, max_reviews)}건을 사용합니다.")
+            return store.latest(goods_id, max_reviews)
 
-        reviews = []
-        for selector in possible_selectors:
-            review_elements = review_soup.select(selector)
-            if review_elements:
-                print(f"✓ 선택자 '{selector}'로 리뷰 요소 {len(review_elements)}개를 찾았습니다.")
-                temp_reviews = [r.get_text(strip=True) for r in review_elements if r.get_text(strip=True)]
-                if temp_reviews:
-                    reviews = temp_reviews
-                    break
-
-        # 7. 여전히 리뷰를 찾지 못한 경우, 상세 페이지 접근하여 시도
-        if not reviews:
-            print("ℹ️ 리뷰 페이지에서 리뷰를 찾지 못했습니다. 상세 페이지에서 시도합니다.")
-            book_res = requests.get(book_url, headers=headers, timeout=timeout)
-            book_soup = BeautifulSoup(book_res.text, "html.parser")
-
-            # 상세 페이지에서 리뷰 섹션 찾기
-            for selector in possible_selectors:
-                review_elements = book_soup.select(selector)
-                if review_elements:
-                    print(f"✓ 상세 페이지에서 선택자 '{selector}'로 리뷰 찾음")
-                    temp_reviews = [r.get_text(strip=True) for r in review_elements if r.get_text(strip=True)]
-                    if temp_reviews:
-                        reviews = temp_reviews
-                        break
-
-        # 8. 결과 반환
+        # 3. 새 리뷰만 수집 (같은 책을 동시에 수집하지 않도록 합침)
+        print("📡 YES24에서 리뷰를 수집 중입니다...")
+        cache.singleflight.do(f"reviews:{goods_id}", lambda: _crawl(goods_id, max_reviews, timeout))
+
+        reviews = store.latest(goods_id, max_reviews)
         if reviews:
             print(f"✅ 리뷰 {len(reviews)}건 수집 완료.")
-            return reviews[:max_reviews]  # 최대 max_reviews개만 반환
-        else:
-            print("❌ 웹페이지에서 리뷰를 찾을 수 없습니다.")
-            # 디버깅 파일 저장
-            with open("review_page_debug.html", "w", encoding="utf-8") as f:
-                f.write(review_soup.prettify())
-            print("ℹ️ 디버깅을 위해 review_page_debug.html 파일에 페이지를 저장했습니다.")
-            return []
+        return reviews
 
+    except tasks.TaskCancelled:
+        raise
     except requests.exceptions.Timeout:
         print("❌ 리뷰 수집 시간이 초과되었습니다.")
         return []
@@ -123,4 +338,4 @@ def get_reviews(title: str, author: str, max_reviews: int = 10, timeout: int = 1
         # 오류의 세부 정보 출력
         import traceback
         print(traceback.format_exc())
-        return []
\ No newline at end of file
+        return []
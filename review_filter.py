@@ -0,0 +1,139 @@
+import os
+import re
+import hashlib
+import unicodedata
+
+# 공백을 뺀 글자 수가 이보다 적은 리뷰는 버립니다. ('정말 좋았어요' 같은 짧은 감상은 남깁니다)
+MIN_CHARS = int(os.getenv("REVIEW_MIN_CHARS", "5"))
+# 글자(한글/영문/숫자) 비율이 이보다 낮으면 이모티콘·기호 위주의 리뷰로 봅니다.
+MIN_LETTER_RATIO = 0.5
+# 서로 다른 글자 수 / 전체 글자 수가 이보다 낮으면 'ㅋㅋㅋㅋ' 같은 반복 리뷰로 봅니다.
+MIN_UNIQUE_RATIO = 0.15
+# SimHash 해밍 거리가 이 값 이하이고 shingle 자카드 유사도가 NEAR_DUP_JACCARD 이상이면 유사 중복입니다.
+# (리뷰처럼 짧은 글은 몇 글자만 바뀌어도 SimHash가 10비트 가까이 달라지므로 넉넉하게 잡습니다.)
+NEAR_DUP_DISTANCE = 12
+NEAR_DUP_JACCARD = 0.6
+SHINGLE_SIZE = 3
+
+# 책 내용과 무관한 광고 문구
+BOILERPLATE_PATTERNS = [
+    re.compile(r"https?://|www\.", re.IGNORECASE),
+    re.compile(r"오픈\s*채팅|카톡\s*문의|010[-\s]?\d{3,4}[-\s]?\d{4}"),
+]
+# 첫 문장의 배송·포장 문구. 그 문장 뒤에 남는 내용이 MIN_CHARS보다 짧을 때만 배송 리뷰로 봅니다.
+SHIPPING_PATTERN = re.compile(r"^[^.!?\n]{0,40}(배송|포장|택배)[^.!?\n]{0,20}(빠르|좋|왔|완료|감사)[^.!?\n]*")
+
+FILTERS = ["too_short", "low_quality", "boilerplate", "duplicate", "near_duplicate"]
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+def _shingles(text: str) -> set:
+    """공백을 뺀 글자 단위 n-gram 집합 (한국어는 띄어쓰기 차이가 잦아 글자 단위가 안정적입니다)"""
+    compact = re.sub(r"\W+", "", text)
+    if len(compact) <= SHINGLE_SIZE:
+        return {compact} if compact else set()
+    return {compact[i:i + SHINGLE_SIZE] for i in range(len(compact) - SHINGLE_SIZE + 1)}
+
+def simhash(shingles: set) -> int:
+    """
+    shingle 집합의 64비트 SimHash
+
+    각 shingle 해시를 64자리 비트 문자열로 만든 뒤 zip으로 자리별 열을 한 번에 뽑아
+    '1'의 개수를 세므로, 비트마다 파이썬 루프를 도는 것보다 훨씬 빠릅니다.
+    """
+    if not shingles:
+        return 0
+    rows = [
+        format(int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for s in shingles
+    ]
+    half = len(rows) / 2
+    bits = "".join("1" if column.count("1") > half else "0" for column in zip(*rows))
+    return int(bits, 2)
+
+def _quality_issue(text: str):
+    """길이·품질·광고 필터에 걸리면 필터 이름을 반환합니다."""
+    chars = [c for c in text if not c.isspace()]
+    if len(chars) < MIN_CHARS:
+        return "too_short"
+    letters = sum(1 for c in chars if c.isalnum())
+    if letters / len(chars) < MIN_LETTER_RATIO or len(set(chars)) / len(chars) < MIN_UNIQUE_RATIO:
+        return "low_quality"
+    if any(pattern.search(text) for pattern in BOILERPLATE_PATTERNS):
+        return "boilerplate"
+    shipping = SHIPPING_PATTERN.search(text)
+    if shipping and sum(1 for c in text[shipping.end():] if c.isalnum()) < MIN_CHARS:
+        return "boilerplate"
+    return None
+
+def _near_duplicates(items: list) -> set:
+    """
+    (shingle 집합, simhash) 리스트에서 앞선 항목과 유사 중복인 항목의 인덱스를 찾습니다.
+
+    남긴 항목과 모두 비교하되, 해밍 거리로 먼저 거른 쌍만 자카드 유사도를 계산합니다.
+    (NEAR_DUP_DISTANCE가 커서 비트 구간 LSH로는 후보가 거의 줄지 않고,
+    책 한 권의 리뷰 수는 크롤러가 MAX_PAGES로 제한하므로 전체 비교로 충분합니다.)
+    """
+    kept = []
+    dropped = set()
+    for idx, (shingles, fingerprint) in enumerate(items):
+        for other_shingles, other_fingerprint in kept:
+            if bin(fingerprint ^ other_fingerprint).count("1") > NEAR_DUP_DISTANCE:
+                continue
+            union = len(shingles | other_shingles)
+            if union and len(shingles & other_shingles) / union >= NEAR_DUP_JACCARD:
+                dropped.add(idx)
+                break
+        else:
+            kept.append((shingles, fingerprint))
+    return dropped
+
+def filter_reviews(reviews: list) -> tuple:
+    """
+    LLM 분석 전에 리뷰 묶음 전체를 로컬에서 정리합니다.
+
+    - 너무 짧거나, 기호·반복 글자 위주이거나, 광고·배송 문구인 리뷰를 뺍니다.
+    - 정규화한 본문이 같은 리뷰와, SimHash + 자카드 유사도로 찾은 유사 중복 리뷰를 뺍니다.
+    - 순서는 유지하며, 중복이면 앞(최신) 리뷰를 남깁니다.
+
+    :return: (남은 리뷰 리스트, 필터별 제외 건수 딕셔너리)
+    """
+    dropped = {name: 0 for name in FILTERS}
+    kept, seen = [], set()
+    for review in reviews:
+        text = review.strip()
+        issue = _quality_issue(text)
+        if issue:
+            dropped[issue] += 1
+            continue
+        key = _normalize(text)
+        if key in seen:
+            dropped["duplicate"] += 1
+            continue
+        seen.add(key)
+        kept.append(text)
+
+    items = []
+    for text in kept:
+        shingles = _shingles(_normalize(text))
+        items.append((shingles, simhash(shingles)))
+    near = _near_duplicates(items)
+    dropped["near_duplicate"] = len(near)
+    kept = [text for idx, text in enumerate(kept) if idx not in near]
+    return kept, dropped
+
+def clean_reviews(reviews: list) -> list:
+    """filter_reviews를 실행하고 필터별 제외 건수를 출력합니다."""
+    if not reviews:
+        return []
+    kept, dropped = filter_reviews(reviews)
+    removed = len(reviews) - len(kept)
+    if removed:
+        labels = {
+            "too_short": "짧음", "low_quality": "품질", "boilerplate": "광고·배송",
+            "duplicate": "중복", "near_duplicate": "유사 중복"
+        }
+        detail = ", ".join(f"{labels[name]} {count}" for name, count in dropped.items() if count)
+        print(f"🧹 리뷰 {len(reviews)}건 중 {removed}건 제외 ({detail}), {len(kept)}건 분석")
+    return kept
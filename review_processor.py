@@ -1,19 +1,84 @@
-from utils.io import load_text, parse_list
+import os
+import hashlib
+from utils.prompt_builder import build_prompt, count_tokens, dedupe, template_version
+from utils.cache import cache
+from utils.structured import ask_list, ask_list_many
+from review_store import review_hash
 import llm_client
 
+# 리뷰 묶음 하나의 최대 토큰 수. 전체 리뷰가 이보다 크면 맵리듀스로 분석합니다.
+CHUNK_TOKENS = int(os.getenv("REVIEW_CHUNK_TOKENS", "2500"))
+# 리뷰 해시가 이 값으로 나누어떨어지면 그 리뷰 뒤에서 묶음을 나눕니다. (평균 묶음 크기)
+CHUNK_BOUNDARY = int(os.getenv("REVIEW_CHUNK_BOUNDARY", "16"))
+
 def process_reviews(title: str, reviews: list) -> list:
     """
     수집된 리뷰 텍스트를 요약하고, 자주 언급되는 핵심 의견을 추출합니다.
+    중복 리뷰는 빼고, 리뷰가 많으면 묶음별로 나눠 동시에 분석한 뒤 결과를 합칩니다(맵리듀스).
     """
     if not reviews:
         # 리뷰가 없는 경우 빈 리스트 반환
         return []
-    # 리뷰들을 하나의 문자열로 정리 (번호 포함)
-    reviews_text = ""
-    for idx, rev in enumerate(reviews, start=1):
-        reviews_text += f"리뷰 {idx}: {rev}\n"
-    prompt_template = load_text("prompts/review_keywords.txt")
-    prompt = prompt_template.format(title=title, reviews=reviews_text.strip())
-    result = llm_client.ask(prompt)
-    points = parse_list(result)
-    return points
+
+    reviews = dedupe(reviews)
+    if sum(count_tokens(r) for r in reviews) <= CHUNK_TOKENS:
+        # 리뷰들을 '리뷰 N: ...' 형식으로 나열 (최신순)
+        prompt = build_prompt("review_keywords", title=title, reviews=reviews)
+        return ask_list(prompt, stage="review_keywords")
+
+    return _map_reduce(title, reviews)
+
+def chunk_reviews(reviews: list, max_tokens: int = CHUNK_TOKENS, boundary: int = CHUNK_BOUNDARY) -> list:
+    """
+    리뷰를 토큰 수가 max_tokens를 넘지 않는 묶음으로 나눕니다.
+
+    경계는 리뷰 내용 해시로 정하고(content-defined chunking) 오래된 리뷰부터 묶으므로,
+    새 리뷰가 추가되어도 기존 묶음은 그대로 유지되고 마지막 묶음만 바뀝니다.
+
+    :param reviews: 최신순 리뷰 리스트
+    :return: 묶음 리스트 (각 묶음은 최신순 리뷰 리스트, 묶음 순서도 최신 묶음부터)
+    """
+    chunks, current, tokens = [], [], 0
+    for review in reversed(reviews):
+        size = count_tokens(review)
+        if current and tokens + size > max_tokens:
+            chunks.append(current)
+            current, tokens = [], 0
+        current.append(review)
+        tokens += size
+        if int(review_hash(review)[:8], 16) % boundary == 0:
+            chunks.append(current)
+            current, tokens = [], 0
+    if current:
+        chunks.append(current)
+    return [list(reversed(chunk)) for chunk in reversed(chunks)]
+
+def _chunk_key(title: str, chunk: list) -> str:
+    digest = hashlib.sha1()
+    # 템플릿이 바뀌면 예전 템플릿으로 분석한 결과를 쓰지 않습니다.
+    digest.update(template_version("review_chunk").encode("ascii"))
+    digest.update(title.encode("utf-8"))
+    for review in chunk:
+        digest.update(review_hash(review).encode("ascii"))
+    return f"review_chunk:{digest.hexdigest()}"
+
+def _map_reduce(title: str, reviews: list) -> list:
+    chunks = chunk_reviews(reviews)
+
+    # 맵: 캐시에 없는 묶음만 동시에 분석합니다.
+    results = [cache.get(_chunk_key(title, chunk)) for chunk in chunks]
+    missing = [idx for idx, points in enumerate(results) if points is None]
+    if missing:
+        prompts = [build_prompt("review_chunk", title=title, reviews=chunks[idx]) for idx in missing]
+        responses = llm_client.run_sync(ask_list_many(prompts, stage="review_chunk"))
+        for idx, points in zip(missing, responses):
+            results[idx] = points
+            cache.set(_chunk_key(title, chunks[idx]), results[idx])
+    print(f"🧮 리뷰 {len(reviews)}건을 {len(chunks)}개 묶음으로 분석했습니다. (새로 분석 {len(missing)}개)")
+
+    # 리듀스: 묶음별 키워드를 합쳐 중복을 정리합니다.
+    chunk_points = dedupe(point for points in results for point in points)
+    if len(chunks) == 1:
+        return chunk_points
+    prompt = build_prompt("review_merge", title=title, chunk_points=chunk_points)
+    return ask_list(prompt, stage="review_merge")
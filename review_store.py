@@ -0,0 +1,140 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import Optional
+
+def normalize_query(title: str, author: str) -> str:
+    """
+    제목/저자 표기 차이(대소문자, 전각/반각, 공백, 문장부호)를 없앤 검색 키를 만듭니다.
+    """
+    text = unicodedata.normalize("NFKC", f"{title} {author}").casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+def review_hash(text: str) -> str:
+    """공백 차이를 무시한 리뷰 본문의 내용 해시"""
+    normalized = " ".join(unicodedata.normalize("NFKC", text).split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+class ReviewStore:
+    """
+    YES24 상품 ID(goods ID) 기준의 로컬 리뷰 저장소
+
+    - 제목/저자 → 상품 ID 변환 결과를 기억해 검색 페이지 요청을 생략합니다.
+    - 리뷰는 상품 ID와 내용 해시 기준으로 한 번만 저장됩니다.
+    - seq가 클수록 최신 리뷰이며, 마지막 수집 시각으로 증분 갱신 여부를 판단합니다.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS resolutions (
+        query TEXT PRIMARY KEY,
+        goods_id TEXT NOT NULL,
+        resolved_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS goods (
+        goods_id TEXT PRIMARY KEY,
+        last_crawled REAL NOT NULL,
+        complete INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS reviews (
+        goods_id TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        text TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        first_seen REAL NOT NULL,
+        PRIMARY KEY (goods_id, hash)
+    );
+    CREATE INDEX IF NOT EXISTS reviews_seq ON reviews(goods_id, seq);
+    """
+
+    def __init__(self, path: str = ".cache/reviews.sqlite3"):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def resolve(self, title: str, author: str) -> Optional[str]:
+        """저장된 상품 ID를 반환합니다. 없으면 None."""
+        row = self._conn().execute(
+            "SELECT goods_id FROM resolutions WHERE query = ?", (normalize_query(title, author),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def save_resolution(self, title: str, author: str, goods_id: str) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO resolutions (query, goods_id, resolved_at) VALUES (?, ?, ?)",
+                (normalize_query(title, author), goods_id, time.time())
+            )
+
+    def crawl_state(self, goods_id: str) -> tuple:
+        """(마지막 수집 시각, 끝 페이지까지 수집했는지, 저장된 리뷰 수)를 반환합니다."""
+        conn = self._conn()
+        row = conn.execute("SELECT last_crawled, complete FROM goods WHERE goods_id = ?", (goods_id,)).fetchone()
+        count = conn.execute("SELECT COUNT(*) FROM reviews WHERE goods_id = ?", (goods_id,)).fetchone()[0]
+        if row is None:
+            return None, False, count
+        return row[0], bool(row[1]), count
+
+    def known_hashes(self, goods_id: str) -> set:
+        rows = self._conn().execute("SELECT hash FROM reviews WHERE goods_id = ?", (goods_id,))
+        return {row[0] for row in rows}
+
+    def add_reviews(self, goods_id: str, newer: list, older: list = None) -> int:
+        """
+        새로 찾은 리뷰를 저장합니다. 이미 저장된 리뷰(같은 내용 해시)는 건너뜁니다.
+
+        :param newer: 기존 리뷰보다 최신인 리뷰 (최신순)
+        :param older: 기존 리뷰보다 오래된 리뷰 (최신순)
+        :return: 새로 저장된 리뷰 수
+        """
+        now = time.time()
+        added = 0
+        with self._conn() as conn:
+            top, bottom = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0), COALESCE(MIN(seq), 1) FROM reviews WHERE goods_id = ?", (goods_id,)
+            ).fetchone()
+            # 최신 리뷰는 현재 최대 seq 위로, 오래된 리뷰는 최소 seq 아래로 붙입니다.
+            for offset, text in enumerate(reversed(newer), start=1):
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO reviews (goods_id, hash, text, seq, first_seen) VALUES (?, ?, ?, ?, ?)",
+                    (goods_id, review_hash(text), text, top + offset, now)
+                )
+                added += cursor.rowcount
+            for offset, text in enumerate(older or [], start=1):
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO reviews (goods_id, hash, text, seq, first_seen) VALUES (?, ?, ?, ?, ?)",
+                    (goods_id, review_hash(text), text, bottom - offset, now)
+                )
+                added += cursor.rowcount
+        return added
+
+    def mark_crawled(self, goods_id: str, complete: bool = False) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO goods (goods_id, last_crawled, complete) VALUES (?, ?, ?) "
+                "ON CONFLICT(goods_id) DO UPDATE SET last_crawled = excluded.last_crawled, "
+                "complete = MAX(goods.complete, excluded.complete)",
+                (goods_id, time.time(), int(complete))
+            )
+
+    def latest(self, goods_id: str, limit: int) -> list:
+        """최신순으로 최대 limit개의 리뷰를 반환합니다."""
+        rows = self._conn().execute(
+            "SELECT text FROM reviews WHERE goods_id = ? ORDER BY seq DESC LIMIT ?", (goods_id, limit)
+        )
+        return [row[0] for row in rows]
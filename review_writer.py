@@ -1,22 +1,29 @@
-from utils.io import load_text
+from utils.prompt_builder import build_prompt
 import llm_client
 
-def write_chapter_from_answers(subtopic: str, answers: dict, book_context: str, review_points: list) -> str:
+def write_chapter_from_answers(subtopic: str, answers: dict, book_context: str, review_points: list,
+                               on_token=None) -> str:
     """
     소제목과 질문-응답을 기반으로 하나의 리뷰 챕터(본문)를 생성합니다.
+    on_token을 지정하면 응답을 스트리밍으로 받아 조각이 도착할 때마다 on_token(조각)을 호출합니다.
     """
-    prompt_template = load_text("prompts/write_chapter.txt")
-
     formatted_qa = "\n".join([f"질문: {q}\n답변: {a}" for q, a in answers.items()])
-    formatted_keywords = "\n".join(f"- {kw}" for kw in review_points)
 
-    prompt = prompt_template.format(
+    prompt = build_prompt(
+        "write_chapter",
         subtopic=subtopic,
         answers=formatted_qa,
         book_context=book_context,
-        review_points=formatted_keywords
+        review_points=review_points
     )
 
-    response = llm_client.ask(prompt)
+    if on_token is None:
+        response = llm_client.ask(prompt, stage="write_chapter")
+    else:
+        pieces = []
+        for piece in llm_client.ask_stream(prompt, stage="write_chapter"):
+            pieces.append(piece)
+            on_token(piece)
+        response = "".join(pieces)
     print(f"✍️ '{subtopic}' 챕터 생성 완료")
     return response.strip()
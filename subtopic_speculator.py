@@ -0,0 +1,176 @@
+import os
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils import tasks
+from outline_generator import generate_subtopics
+from question_generator import generate_guided_questions
+
+# 이 비율 이상의 답변으로 만든 초안을 전체 답변 초안이 실패했을 때의 대안으로 미리 만들어 둡니다.
+ACCEPT_RATIO = float(os.getenv("SPECULATIVE_ACCEPT_RATIO", "0.8"))
+# 전체 답변 초안을 기다릴 최대 시간(초). 넘기면 미리 만든 초안을 씁니다. (0이면 제한 없음)
+FULL_DRAFT_TIMEOUT = float(os.getenv("SPECULATIVE_FULL_DRAFT_TIMEOUT", "30"))
+# 채택한 소제목 후보 중 앞쪽 몇 개의 가이드 질문을 미리 생성할지
+PREFETCH_QUESTIONS = int(os.getenv("SPECULATIVE_PREFETCH_QUESTIONS", "3"))
+
+class SubtopicSpeculator:
+    """
+    인터뷰 답변이 모이는 동안 소제목 후보를 미리 만들어 두는 추측 실행기
+
+    - 답변이 들어올 때마다 지금까지의 답변으로 소제목 후보 초안을 백그라운드에서 요청합니다.
+    - 아직 시작되지 않은 이전 초안은 새 답변이 오면 취소되고 최신 답변 기준 초안으로 교체됩니다.
+    - 인터뷰가 끝나면 전체 답변 초안을 채택합니다. 충분한 답변(ACCEPT_RATIO 이상)으로 만든 초안은
+      전체 답변 초안이 실패하거나 FULL_DRAFT_TIMEOUT 안에 끝나지 않을 때만 대신 씁니다.
+    - 채택된 후보 중 앞쪽 PREFETCH_QUESTIONS개의 가이드 질문을 미리 요청해 챕터 파이프라인에 넘깁니다.
+    - 백그라운드 요청은 각자의 취소 토큰으로 실행되므로, 필요 없어진 요청은 진행 중인 LLM 호출까지 취소됩니다.
+    """
+
+    def __init__(self, book_context: str, review_points: list, title: str, total_answers: int,
+                 accept_ratio: float = ACCEPT_RATIO, prefetch_questions: int = PREFETCH_QUESTIONS,
+                 full_draft_timeout: float = FULL_DRAFT_TIMEOUT):
+        self.book_context = book_context
+        self.review_points = review_points
+        self.title = title
+        self.total_answers = total_answers
+        self.accept_ratio = accept_ratio
+        self.prefetch_questions = prefetch_questions
+        self.full_draft_timeout = full_draft_timeout
+        # 초안 작성 1개 + 최신 초안 대기 1개면 충분하므로 워커는 2개
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculate")
+        self._lock = threading.Lock()
+        self._drafts = {}     # 사용한 답변 수 -> 소제목 후보 Future
+        self._questions = {}  # 소제목 -> 가이드 질문 Future
+        self._tokens = {}     # 아직 끝나지 않은 Future -> 그 요청의 취소 토큰
+
+    def min_answers(self) -> int:
+        """채택 가능한 초안에 필요한 최소 답변 수"""
+        return max(1, math.ceil(self.total_answers * self.accept_ratio))
+
+    def on_answer(self, answers: list) -> None:
+        """
+        conduct_interview의 답변 콜백. 새 답변이 들어올 때마다 초안을 갱신합니다.
+
+        :param answers: 지금까지 모인 답변 리스트
+        """
+        count = len(answers)
+        if not answers[-1]:
+            return  # 빈 답변은 초안을 바꾸지 않습니다.
+
+        with self._lock:
+            # 아직 시작되지 않은 이전 초안은 더 이상 쓸모가 없으므로 취소합니다.
+            for used, future in list(self._drafts.items()):
+                if future.cancel():
+                    del self._drafts[used]
+            if count < self.min_answers() and count < self.total_answers:
+                return
+            self._drafts[count] = self._submit(
+                generate_subtopics, list(answers), self.book_context, self.review_points, self.title, verbose=False
+            )
+
+    def result(self, answers: list) -> list:
+        """
+        인터뷰가 끝난 뒤 사용할 소제목 후보를 반환합니다.
+        전체 답변 초안을 기다리고, 그 초안이 실패하거나 full_draft_timeout 안에 끝나지 않을 때만
+        충분한 답변으로 만든 초안 중 답변이 가장 많은 것을 대신 씁니다. 그런 초안이 없으면 제한 시간 없이 기다립니다.
+
+        :param answers: 최종 답변 리스트
+        """
+        count = len(answers)
+        with self._lock:
+            full = self._drafts.get(count)
+            if full is None or full.cancelled():
+                full = self._drafts[count] = self._submit(
+                    generate_subtopics, list(answers), self.book_context, self.review_points, self.title,
+                    verbose=False
+                )
+            partials = {
+                used: future for used, future in self._drafts.items()
+                if self.min_answers() <= used < count and not future.cancelled()
+            }
+
+        used = count
+        # 대신 쓸 초안이 없으면 제한 시간 없이 기다립니다. (취소와 단계의 마감은 그대로 따릅니다)
+        timeout = (self.full_draft_timeout or None) if partials else None
+        try:
+            subtopics = tasks.wait_future(full, timeout=timeout)
+        except Exception as e:
+            # 사용자가 취소한 경우와 대신 쓸 초안이 없는 경우는 그대로 실패합니다.
+            if not partials or (isinstance(e, tasks.TaskCancelled) and not isinstance(e, tasks.TaskTimeout)):
+                raise
+            self._cancel(full)
+            used, subtopics = self._fallback(partials, e)
+        for draft, future in partials.items():
+            if draft != used:
+                self._cancel(future)
+
+        if used < count:
+            print(f"⚡ 전체 답변 초안을 받지 못해 답변 {used}/{count}개로 미리 만든 소제목 후보 {len(subtopics)}개를 사용합니다.")
+        else:
+            print(f"🧩 소제목 후보 {len(subtopics)}개 생성됨.")
+        self._prefetch(subtopics)
+        return subtopics
+
+    def _fallback(self, partials: dict, error: Exception) -> tuple:
+        """
+        전체 답변 초안 대신 쓸 부분 초안을 답변이 많은 것부터 기다려 (사용한 답변 수, 소제목 후보)를 반환합니다.
+        모두 실패하면 전체 답변 초안의 오류를 다시 발생시킵니다.
+        """
+        for used in sorted(partials, reverse=True):
+            try:
+                return used, tasks.wait_future(partials[used])
+            except tasks.TaskCancelled:
+                raise
+            except Exception:
+                continue
+        raise error
+
+    def _submit(self, func, *args, **kwargs):
+        """
+        func를 자기 취소 토큰 아래에서 실행하도록 워커에 넘깁니다.
+        부모 토큰은 걸지 않으므로 이 요청을 취소할 수 있는 것은 _cancel과 프로그램 종료뿐입니다.
+        """
+        token = tasks.CancelToken()
+
+        def run():
+            with tasks.scope(token=token):
+                return func(*args, **kwargs)
+
+        future = self._executor.submit(tasks.bind(run))
+        self._tokens[future] = token
+        future.add_done_callback(lambda f: self._tokens.pop(f, None))
+        return future
+
+    def _cancel(self, future) -> None:
+        """시작 전이면 Future를, 실행 중이면 토큰을 취소해 진행 중인 LLM 호출까지 멈춥니다."""
+        future.cancel()
+        token = self._tokens.pop(future, None)
+        if token is not None:
+            token.cancel("추측 실행 결과가 더 이상 필요 없습니다.")
+
+    def _prefetch(self, subtopics: list) -> None:
+        for subtopic in subtopics[:self.prefetch_questions]:
+            self._questions[subtopic] = self._submit(
+                generate_guided_questions, subtopic, self.book_context, self.review_points, verbose=False
+            )
+
+    def take_questions(self, selected: list) -> dict:
+        """
+        선택된 소제목의 미리 요청한 가이드 질문 Future를 넘겨주고, 선택되지 않은 것은 진행 중인 요청까지 취소합니다.
+        """
+        taken = {s: f for s, f in self._questions.items() if s in selected}
+        for subtopic, future in self._questions.items():
+            if subtopic not in taken:
+                self._cancel(future)
+        self._questions = {}
+        return taken
+
+    def shutdown(self) -> None:
+        """
+        남은 초안과 넘겨주지 않은 가이드 질문 요청을 진행 중인 것까지 취소합니다.
+        take_questions로 넘겨준 가이드 질문 Future는 계속 진행됩니다.
+        """
+        with self._lock:
+            for future in list(self._drafts.values()) + list(self._questions.values()):
+                self._cancel(future)
+            self._questions = {}
+        self._executor.shutdown(wait=False)
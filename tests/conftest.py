@@ -0,0 +1,41 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope="session", autouse=True)
+def workdir(tmp_path_factory):
+    """.cache/·.sessions/ 같은 실행 파일이 저장소에 생기지 않도록 임시 디렉토리에서 테스트합니다."""
+    previous = os.getcwd()
+    path = tmp_path_factory.mktemp("work")
+    os.chdir(path)
+    yield path
+    os.chdir(previous)
+
+@pytest.fixture
+def llm(monkeypatch):
+    """
+    스텁 서버(utils.stub_server)를 향하는 llm_client
+    클라이언트·전용 루프·재시도 컨트롤러를 테스트마다 새로 만들고 응답 캐시는 끕니다.
+    차단기 설정을 바꾸려면 llm_client._controller를 다시 지정합니다.
+    """
+    import llm_client
+    from utils.rate_limit import TokenBucket, CircuitBreaker, RetryController
+    from utils.response_cache import ResponseCache
+    from utils.stub_server import StubLLMServer
+
+    server = StubLLMServer().start()
+    runtime = llm_client._AsyncRuntime(4)
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(llm_client, "_client", None)
+    monkeypatch.setattr(llm_client, "_runtime", runtime)
+    monkeypatch.setattr(llm_client, "_controller", RetryController(
+        TokenBucket(), CircuitBreaker(threshold=0), base_delay=0.01, max_delay=0.05
+    ))
+    monkeypatch.setattr(llm_client, "_responses", ResponseCache(None, enabled=False))
+    yield server
+    if runtime._loop is not None:
+        runtime._loop.call_soon_threadsafe(runtime._loop.stop)
+    server.stop()
@@ -0,0 +1,14 @@
+from batch import pair_answers, select_subtopics
+
+def test_pair_answers_keeps_extra_answers(capsys):
+    qa = pair_answers(["질문1", "질문2"], ["답1", "", "답3", "답4"], "제목")
+    assert qa == {"질문1": "답1", "추가 답변 1": "답3", "추가 답변 2": "답4"}
+    assert "답변이 질문보다 2개 많아" in capsys.readouterr().out
+
+def test_pair_answers_with_fewer_answers():
+    assert pair_answers(["질문1", "질문2"], ["답1"]) == {"질문1": "답1"}
+
+def test_select_subtopics_by_number_or_text():
+    candidates = ["가", "나", "다", "라"]
+    assert select_subtopics(candidates) == ["가", "나", "다"]
+    assert select_subtopics(candidates, [2, "직접 쓴 소제목", 9]) == ["나", "직접 쓴 소제목"]
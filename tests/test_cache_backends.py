@@ -0,0 +1,67 @@
+import time
+from utils.cache_backends import SQLiteBackend, MemoryBackend, TieredBackend
+
+def test_sqlite_evicts_least_recently_used_entry(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    backend.set("a", {"value": 1})
+    backend.set("b", {"value": 2})
+    assert backend.get("a") == {"value": 1}  # a를 최근에 사용
+    backend.set("c", {"value": 3})
+
+    assert backend.get("b") is None
+    assert backend.get("a") == {"value": 1}
+    assert backend.get("c") == {"value": 3}
+    stats = backend.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+def test_sqlite_evicts_by_total_bytes(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes=25)
+    backend.set("a", "x" * 10)  # JSON 문자열이라 따옴표까지 12바이트
+    backend.set("b", "y" * 10)
+    backend.set("c", "z" * 10)
+
+    assert backend.get("a") is None
+    assert backend.stats()["bytes"] <= 25
+
+def test_sqlite_entries_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteBackend(path).set("key", ["값"])
+    assert SQLiteBackend(path).get("key") == ["값"]
+
+def test_memory_evicts_and_expires():
+    backend = MemoryBackend(max_entries=2, ttl=0.1)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    assert backend.get("b") is None
+    assert backend.stats()["evictions"] == 1
+    time.sleep(0.15)
+    assert backend.get("a") is None
+
+def test_memory_returns_copies():
+    backend = MemoryBackend()
+    backend.set("key", {"items": [1]})
+    backend.get("key")["items"].append(2)
+    assert backend.get("key") == {"items": [1]}
+
+def test_tiered_promotes_persistent_hit(tmp_path):
+    persistent = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    persistent.set("key", "값")
+    backend = TieredBackend(MemoryBackend(), persistent)
+    assert backend.get("key") == "값"
+    assert backend.get("key") == "값"
+    stats = backend.stats()
+    assert stats["tiers"]["persistent"]["hits"] == 1
+    assert stats["tiers"]["memory"]["hits"] == 1
+
+def test_tiered_promotion_keeps_original_timestamp(tmp_path):
+    persistent = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    persistent.set("key", "값")
+    time.sleep(0.2)
+    backend = TieredBackend(MemoryBackend(), persistent)
+    assert backend.get("key", max_age=1) == "값"
+    # 메모리로 올린 뒤에도 처음 저장된 시각 기준으로 만료됩니다.
+    assert backend.memory.get("key", max_age=0.1) is None
+    assert backend.get("key", max_age=0.1) is None
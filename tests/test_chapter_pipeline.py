@@ -0,0 +1,74 @@
+import io
+import time
+import pytest
+from utils import tasks
+from utils.io import ReviewFileWriter
+from chapter_pipeline import ChapterPipeline
+
+@pytest.fixture
+def slow_llm(llm):
+    """가이드 질문은 바로, 챕터 본문은 천천히(약 2.5초) 스트리밍하는 스텁 서버"""
+    llm.responder = lambda prompt: "1. 첫 질문\n2. 둘째 질문\n" + "본문 " * 40
+    llm.chunk_latency = 0.05
+    return llm
+
+def test_chapters_written_in_order(llm, tmp_path):
+    llm.responder = lambda prompt: "1. 첫 질문\n2. 둘째 질문"
+    path = tmp_path / "review.txt"
+    with ReviewFileWriter("제목", ["가", "나"], filename=str(path)) as writer:
+        pipeline = ChapterPipeline(["가", "나"], "책 정보", ["키워드"], writer=writer)
+        assert pipeline.questions_future("가").result(timeout=3) == ["첫 질문", "둘째 질문"]
+        pipeline.submit_answers("나", {"질문": "답"})
+        pipeline.submit_answers("가", {"질문": "답"})
+        chapters = pipeline.collect()
+    assert [c["title"] for c in chapters] == ["가", "나"]
+    text = path.read_text(encoding="utf-8")
+    assert text.index("## 가") < text.index("## 나")
+
+def test_workers_inherit_caller_deadline(slow_llm, tmp_path):
+    with ReviewFileWriter("제목", ["가"], filename=str(tmp_path / "review.txt")) as writer:
+        with tasks.scope(timeout=0.3):
+            pipeline = ChapterPipeline(["가"], "책 정보", ["키워드"], writer=writer)
+            pipeline.submit_answers("가", {"질문": "답"})
+        chapter = pipeline._chapters["가"]
+        assert isinstance(chapter.exception(timeout=1.5), tasks.TaskCancelled)
+        pipeline.shutdown()
+
+def test_collect_timeout_stops_running_writers(slow_llm, tmp_path):
+    with ReviewFileWriter("제목", ["가"], filename=str(tmp_path / "review.txt")) as writer:
+        pipeline = ChapterPipeline(["가"], "책 정보", ["키워드"], writer=writer)
+        pipeline.submit_answers("가", {"질문": "답"})
+        with pytest.raises(tasks.TaskTimeout):
+            with tasks.scope(timeout=0.3):
+                pipeline.collect()
+        started = time.monotonic()
+        assert isinstance(pipeline._chapters["가"].exception(timeout=1.5), tasks.TaskCancelled)
+        assert time.monotonic() - started < 1.0
+
+def test_writer_ignores_late_chunks_after_close(tmp_path):
+    path = tmp_path / "review.txt"
+    writer = ReviewFileWriter("제목", ["가"], filename=str(path))
+    sink = writer.chapter(0)
+    sink.write("앞부분")
+    writer.close()
+    sink.write("늦은 내용")
+    sink.close()
+    assert "늦은 내용" not in path.read_text(encoding="utf-8")
+
+def test_writer_echoes_finished_chapters_then_follows(tmp_path):
+    out = io.StringIO()
+    writer = ReviewFileWriter("제목", ["가", "나"], filename=str(tmp_path / "review.txt"))
+    second = writer.chapter(1)
+    second.write("둘째 본문")
+    first = writer.chapter(0)
+    first.write("첫째 본문")
+    writer.show_finished(out)
+    assert out.getvalue() == ""  # 끝나지 않은 챕터는 답변 도중에 보여주지 않습니다.
+    first.close()
+    writer.show_finished(out)
+    assert out.getvalue() == "## 가\n첫째 본문\n\n"
+    writer.follow(out)
+    second.write(" 이어서")
+    assert out.getvalue().endswith("## 나\n둘째 본문 이어서")
+    second.close()
+    writer.close()
@@ -0,0 +1,19 @@
+from utils.html_extract import SelectorExtractor, find_first_attribute
+
+def test_first_selector_in_priority_order_wins():
+    extractor = SelectorExtractor(["div.review_cont", "p.review"])
+    both = '<div class="review_cont">첫째</div><p class="review">둘째</p>'
+    assert extractor.extract(both) == ("div.review_cont", ["첫째"], 1)
+    assert extractor.extract('<p class="review">둘째</p>') == ("p.review", ["둘째"], 1)
+    # 앞서 다른 선택자가 성공했어도 다음 문서에서는 다시 선언 순서대로 고릅니다.
+    assert extractor.extract(both)[0] == "div.review_cont"
+
+def test_nested_text_and_skipped_elements():
+    extractor = SelectorExtractor(["div.box p"])
+    html = '<div class="box"><p>가 <b>나</b><script>x()</script></p></div><p>밖</p>'
+    assert extractor.extract(html) == ("div.box p", ["가나"], 1)
+    assert extractor.extract("<p>없음</p>") == (None, [], 0)
+
+def test_find_first_attribute():
+    assert find_first_attribute('<a href="/x">a</a><a href="/y">b</a>', "a", "href") == "/x"
+    assert find_first_attribute("<p>없음</p>", "a", "href") is None
@@ -0,0 +1,14 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import bench_import
+
+@pytest.mark.parametrize("module", bench_import.MODULES)
+def test_import_stays_light(module):
+    result = bench_import.measure(module, repeat=3)
+    assert result["loaded"] == [], "import 시점에 무거운 패키지를 읽었습니다."
+    assert result["created"] == [], "import만으로 작업 디렉토리에 파일이 생겼습니다."
+    assert result["median"] < bench_import.BUDGET_MS
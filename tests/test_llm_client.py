@@ -0,0 +1,28 @@
+import time
+import llm_client
+
+def test_ask_returns_response(llm):
+    assert llm_client.ask("안녕", model="stub") == "stub: 안녕"
+    assert llm.requests[-1]["model"] == "stub"
+
+def test_ask_many_runs_concurrently_in_order(llm):
+    llm.latency = 0.2
+    started = time.perf_counter()
+    responses = llm_client.run_sync(llm_client.ask_many(["가", "나", "다"], model="stub"))
+    assert responses == ["stub: 가", "stub: 나", "stub: 다"]
+    assert llm.max_in_flight == 3
+    assert time.perf_counter() - started < 0.5
+
+def test_ask_many_respects_concurrency_limit(llm):
+    # conftest의 llm 픽스처는 동시 요청을 4개로 제한한 루프를 씁니다.
+    llm.latency = 0.1
+    prompts = [f"질문 {idx}" for idx in range(8)]
+    responses = llm_client.run_sync(llm_client.ask_many(prompts, model="stub"))
+    assert responses == [f"stub: {prompt}" for prompt in prompts]
+    assert llm.max_in_flight == 4
+
+def test_ask_stream_yields_chunks(llm):
+    llm.chunk_size = 3
+    pieces = list(llm_client.ask_stream("안녕하세요", model="stub"))
+    assert len(pieces) > 1
+    assert "".join(pieces) == "stub: 안녕하세요"
@@ -0,0 +1,172 @@
+import time
+import pytest
+import llm_client
+from utils import tasks
+from utils.rate_limit import TokenBucket, CircuitBreaker, RetryController, CircuitOpenError
+
+def _controller(threshold: int = 2, reset_timeout: float = 0.1) -> RetryController:
+    return RetryController(TokenBucket(), CircuitBreaker(threshold, reset_timeout), base_delay=0.01, max_delay=0.05)
+
+def _wait_until(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "시간 안에 조건을 만족하지 않았습니다."
+        time.sleep(0.01)
+
+def _open_breaker(controller: RetryController) -> None:
+    for attempt in (1, 2):
+        with controller.attempt():
+            controller.record_failure("server", attempt)
+    assert controller.breaker.state == "open"
+    time.sleep(controller.breaker.reset_timeout + 0.05)
+    assert controller.breaker.state == "half_open"
+
+def test_breaker_opens_after_threshold_and_rejects():
+    controller = _controller()
+    for attempt in (1, 2):
+        with controller.attempt():
+            controller.record_failure("server", attempt)
+    with pytest.raises(CircuitOpenError):
+        with controller.attempt():
+            pass
+    assert controller.metrics()["rejected"] == 1
+
+def test_probe_released_after_rate_limit():
+    controller = _controller()
+    _open_breaker(controller)
+    with controller.attempt():
+        controller.record_failure("rate_limit", 1, retry_after=0)
+    # 429는 서버 장애가 아니므로 다음 요청이 다시 시험할 수 있어야 합니다.
+    with controller.attempt():
+        controller.record_success()
+    assert controller.breaker.state == "closed"
+
+def test_probe_released_when_attempt_raises():
+    controller = _controller()
+    _open_breaker(controller)
+    with pytest.raises(ValueError):
+        with controller.attempt():
+            raise ValueError("400 Bad Request")
+    with controller.attempt():
+        pass
+
+def test_concurrent_request_does_not_release_active_probe():
+    controller = _controller()
+    _open_breaker(controller)
+    probe = controller.breaker.before_request()
+    controller.breaker.release_probe(probe - 1)  # 다른(이미 끝난) 시험 요청 번호
+    with pytest.raises(CircuitOpenError):
+        controller.breaker.before_request()
+    controller.breaker.release_probe(probe)
+    assert controller.breaker.before_request() is not None
+
+@pytest.mark.parametrize("failure", [(429, 0), 400])
+def test_stub_probe_not_counted_keeps_breaker_usable(llm, failure, monkeypatch):
+    controller = _controller()
+    monkeypatch.setattr(llm_client, "_controller", controller)
+    llm.fail_next(500, 500)
+    with pytest.raises(Exception):
+        llm_client.ask("안녕", model="stub", max_retries=2)
+    assert controller.breaker.state == "open"
+    time.sleep(0.15)
+
+    llm.fail_next(failure)
+    with pytest.raises(Exception):
+        llm_client.ask("안녕", model="stub", max_retries=1)
+    assert llm_client.ask("안녕", model="stub") == "stub: 안녕"
+    assert controller.breaker.state == "closed"
+
+def test_stub_probe_server_error_reopens(llm, monkeypatch):
+    controller = _controller()
+    monkeypatch.setattr(llm_client, "_controller", controller)
+    llm.fail_next(500, 500)
+    with pytest.raises(Exception):
+        llm_client.ask("안녕", model="stub", max_retries=2)
+    time.sleep(0.15)
+
+    llm.fail_next(500)
+    with pytest.raises(Exception):
+        llm_client.ask("안녕", model="stub", max_retries=1)
+    with pytest.raises(CircuitOpenError):
+        llm_client.ask("안녕", model="stub")
+    assert controller.breaker.opens == 2
+    time.sleep(0.15)
+    assert llm_client.ask("안녕", model="stub") == "stub: 안녕"
+
+def test_stub_cancelled_probe_is_released(llm, monkeypatch):
+    controller = _controller()
+    monkeypatch.setattr(llm_client, "_controller", controller)
+    llm.fail_next(500, 500)
+    with pytest.raises(Exception):
+        llm_client.ask("안녕", model="stub", max_retries=2)
+    time.sleep(0.15)
+
+    llm.latency = 1.0
+    with pytest.raises(tasks.TaskTimeout):
+        with tasks.scope(timeout=0.2):
+            llm_client.ask("안녕", model="stub")
+    # 취소된 요청의 정리는 전용 루프에서 끝나므로 시험 자격이 풀릴 때까지 기다립니다.
+    _wait_until(lambda: not controller.breaker._probe)
+    llm.latency = 0.0
+    assert llm_client.ask("안녕", model="stub") == "stub: 안녕"
+
+def test_stub_stream_probe_released_after_rate_limit(llm, monkeypatch):
+    controller = _controller()
+    monkeypatch.setattr(llm_client, "_controller", controller)
+    llm.fail_next(500, 500)
+    with pytest.raises(Exception):
+        "".join(llm_client.ask_stream("안녕", model="stub", max_retries=2))
+    time.sleep(0.15)
+
+    llm.fail_next((429, 0))
+    with pytest.raises(Exception):
+        "".join(llm_client.ask_stream("안녕", model="stub", max_retries=1))
+    assert "".join(llm_client.ask_stream("안녕", model="stub")) == "stub: 안녕"
+
+def test_unlimited_bucket_does_not_touch_state_file(tmp_path):
+    state_path = tmp_path / "ratelimit" / "bucket.json"
+    bucket = TokenBucket(state_path=str(state_path))
+    assert not bucket.blocking
+    assert bucket.reserve(1000) == 0.0
+    assert bucket.paused_for() == 0.0
+    assert not (tmp_path / "ratelimit").exists()
+
+def test_pause_is_shared_between_buckets(tmp_path):
+    state_path = str(tmp_path / "ratelimit" / "bucket.json")
+    first, second = TokenBucket(state_path=state_path), TokenBucket(state_path=state_path)
+    assert second.paused_for() == 0.0
+    first.pause(5)
+    assert 4 < second.paused_for() <= 5
+    assert 4 < second.reserve() <= 5
+    # 짧은 정지가 먼저 걸린 긴 정지를 줄이지 않습니다.
+    second.pause(1)
+    assert first.paused_for() > 4
+
+def test_limited_bucket_throttles_across_instances(tmp_path):
+    state_path = str(tmp_path / "bucket.json")
+    first, second = TokenBucket(rpm=60, state_path=state_path), TokenBucket(rpm=60, state_path=state_path)
+    assert first.blocking
+    for _ in range(60):
+        assert first.reserve() == 0.0
+    assert 0.5 < second.reserve() <= 1.0
+
+@pytest.mark.parametrize("failure, kind", [(500, "server"), ((429, 0), "rate_limit")])
+def test_stub_retries_injected_failure(llm, failure, kind):
+    llm.fail_next(failure)
+    assert llm_client.ask("안녕", model="stub") == "stub: 안녕"
+    metrics = llm_client.metrics()
+    assert metrics[kind] == 1
+    assert metrics["retries"] == 1
+    assert len(llm.requests) == 2
+
+def test_stub_stream_retries_server_error(llm):
+    llm.fail_next(500)
+    assert "".join(llm_client.ask_stream("안녕", model="stub")) == "stub: 안녕"
+    assert llm_client.metrics()["server"] == 1
+
+def test_stub_gives_up_after_max_retries(llm):
+    llm.fail_next(500, 500, 500)
+    with pytest.raises(Exception):
+        llm_client.ask("안녕", model="stub", max_retries=2)
+    assert len(llm.requests) == llm.failed == 2
+    assert llm_client.metrics()["successes"] == 0
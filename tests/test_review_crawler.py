@@ -0,0 +1,76 @@
+import pytest
+import review_crawler
+from review_store import ReviewStore
+from utils.stub_server import FixtureServer
+
+GOODS_ID = "123"
+PER_PAGE = 5
+
+def _page_html(page: int) -> str:
+    items = "".join(f'<div class="review_cont">{page}페이지의 {idx}번째 리뷰입니다.</div>' for idx in range(PER_PAGE))
+    return f"<html><body>{items}</body></html>"
+
+@pytest.fixture
+def yes24(monkeypatch, tmp_path):
+    """
+    상품 하나의 리뷰 목록을 돌려주는 픽스처 서버
+    server.status[페이지]로 페이지별 응답 코드를, server.last_page로 리뷰가 있는 마지막 페이지를 바꿉니다.
+    """
+    def review_list(query):
+        page = int(query.get("PageNumber", 1))
+        status = server.status.get(page, 200)
+        if status != 200:
+            return status, "busy"
+        return _page_html(page) if page <= server.last_page else "<html><body></body></html>"
+
+    server = FixtureServer({
+        "/Product/Search": f'<ul><li data-goods-no="{GOODS_ID}">책</li></ul>',
+        f"/Product/communityModules/GoodsReviewList/{GOODS_ID}": review_list,
+        f"/Product/Goods/{GOODS_ID}": "<html></html>",
+    }).start()
+    server.status = {}
+    server.last_page = 10
+    monkeypatch.setattr(review_crawler, "BASE_URL", server.base_url)
+    monkeypatch.setattr(review_crawler, "_store", ReviewStore(str(tmp_path / "reviews.sqlite3")))
+    yield server
+    server.stop()
+
+def _pages_requested(server) -> list:
+    pages = []
+    for path in server.paths:
+        if "GoodsReviewList" in path:
+            pages.append(int(path.split("PageNumber=")[1]) if "PageNumber=" in path else 1)
+    return sorted(pages)
+
+def test_transient_error_does_not_mark_book_complete(yes24):
+    yes24.status = {2: 503}
+    review_crawler.get_reviews("책", "저자", max_reviews=20)
+    _, complete, _ = review_crawler._store.crawl_state(GOODS_ID)
+    assert not complete
+
+    # 오류가 났던 페이지는 다음 수집에서 다시 요청합니다.
+    yes24.status = {}
+    yes24.paths.clear()
+    reviews = review_crawler.get_reviews("책", "저자", max_reviews=20, skip_cache=True)
+    assert 2 in _pages_requested(yes24)
+    assert len(reviews) == 20
+
+def test_empty_page_marks_book_complete(yes24):
+    yes24.last_page = 2
+    reviews = review_crawler.get_reviews("책", "저자", max_reviews=20)
+    assert len(reviews) == 2 * PER_PAGE
+    _, complete, _ = review_crawler._store.crawl_state(GOODS_ID)
+    assert complete
+
+def test_failed_page_keeps_collected_reviews(yes24):
+    yes24.status = {3: 503}
+    reviews = review_crawler.get_reviews("책", "저자", max_reviews=20)
+    # 1페이지(최신)와 실패 전의 2페이지는 저장되고, 실패한 3페이지 뒤쪽은 다음 수집으로 미룹니다.
+    assert len(reviews) == 2 * PER_PAGE
+    assert reviews[0].startswith("1페이지")
+
+    yes24.status = {}
+    yes24.paths.clear()
+    reviews = review_crawler.get_reviews("책", "저자", max_reviews=20)
+    assert 3 in _pages_requested(yes24)
+    assert [review.split("페이지")[0] for review in reviews[::PER_PAGE]] == ["1", "2", "3", "4"]
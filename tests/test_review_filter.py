@@ -0,0 +1,30 @@
+from review_filter import filter_reviews
+
+def test_short_praise_is_kept():
+    kept, dropped = filter_reviews(["정말 좋았어요", "굿"])
+    assert kept == ["정말 좋았어요"]
+    assert dropped["too_short"] == 1
+
+def test_shipping_clause_only_drops_when_nothing_else_remains():
+    reviews = [
+        "배송 빠르고 포장도 좋아요!!",
+        "배송 빠르고 좋아요. 주인공이 상처를 마주하는 과정이 오래 마음에 남았습니다.",
+    ]
+    kept, dropped = filter_reviews(reviews)
+    assert kept == reviews[1:]
+    assert dropped["boilerplate"] == 1
+
+def test_ads_are_dropped_anywhere():
+    kept, dropped = filter_reviews(["좋은 책이에요. 자세한 후기는 https://example.com 에서 보세요"])
+    assert kept == []
+    assert dropped["boilerplate"] == 1
+
+def test_near_duplicates_keep_first_review():
+    reviews = [
+        "주인공이 상처를 마주하는 과정이 오래 마음에 남았습니다. 추천합니다!",
+        "주인공이 상처를 마주하는 과정이 오래 마음에 남았어요. 추천합니다",
+        "문장이 담백해서 출퇴근길에 조금씩 읽기 좋았습니다.",
+    ]
+    kept, dropped = filter_reviews(reviews)
+    assert kept == [reviews[0], reviews[2]]
+    assert dropped["near_duplicate"] == 1
@@ -0,0 +1,46 @@
+import pytest
+from utils.session import Session, list_sessions
+
+def test_resume_returns_recorded_outputs(tmp_path):
+    session = Session.create(str(tmp_path), title="제목", author="저자")
+    session.record("questions", ["질문1", "질문2"], inputs="책 정보")
+    session.record("chapter", "본문", key="소제목")
+
+    resumed = Session.open("latest", str(tmp_path))
+    assert resumed.id == session.id
+    assert resumed.get("session") == {"title": "제목", "author": "저자"}
+    assert resumed.get("questions", inputs="책 정보") == ["질문1", "질문2"]
+    assert resumed.get("questions", inputs="다른 책 정보") is None
+    assert resumed.get("chapter", key="소제목") == "본문"
+    assert list_sessions(str(tmp_path)) == [session.id]
+
+def test_open_missing_session_raises(tmp_path):
+    with pytest.raises(Exception, match="이어서 진행할 세션이 없습니다"):
+        Session.open("latest", str(tmp_path))
+    with pytest.raises(Exception, match="세션을 찾을 수 없습니다"):
+        Session.open("없는-세션", str(tmp_path))
+
+def test_torn_last_line_is_truncated_on_load(tmp_path):
+    session = Session.create(str(tmp_path), title="제목", author="저자")
+    session.record("questions", ["질문1"])
+    with open(session.path, "a", encoding="utf-8") as f:
+        f.write('{"stage":"subtopics","key":null,"out')  # 기록 도중 중단된 줄
+
+    resumed = Session.open(session.id, str(tmp_path))
+    assert not resumed.has("subtopics")
+    resumed.record("subtopics", ["소제목"])
+
+    reloaded = Session.open(session.id, str(tmp_path))
+    assert reloaded.get("subtopics") == ["소제목"]
+    assert reloaded.get("questions") == ["질문1"]
+
+def test_resume_without_book_record_exits_cleanly(tmp_path, monkeypatch, capsys):
+    import main
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    session = Session("빈-세션")
+    session.record("questions", ["질문1"])
+    with pytest.raises(SystemExit) as exc:
+        main.main(["--resume", session.id])
+    assert exc.value.code == 1
+    assert "책 정보가 기록되어 있지 않아" in capsys.readouterr().out
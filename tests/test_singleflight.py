@@ -0,0 +1,95 @@
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from utils import tasks
+from utils.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return {"value": 1}
+
+    with ThreadPoolExecutor(5) as pool:
+        futures = [pool.submit(flight.do, "key", compute) for _ in range(5)]
+        while flight.stats()["coalesced"] < 4:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result(timeout=2) for future in futures]
+
+    assert results == [{"value": 1}] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "coalesced_external": 0, "in_flight": 0}
+
+def test_cancelled_follower_leaves_leader_running():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(2)
+        return "결과"
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "key", compute)
+        while flight.stats()["in_flight"] == 0:
+            time.sleep(0.01)
+        with pytest.raises(tasks.TaskTimeout):
+            with tasks.scope(timeout=0.1):
+                flight.do("key", compute)
+        follower = pool.submit(flight.do, "key", compute)
+        release.set()
+        assert leader.result(timeout=2) == "결과"
+        assert follower.result(timeout=2) == "결과"
+
+def test_process_lock_wait_honors_token(tmp_path):
+    # 잠금 파일은 인스턴스마다 따로 열기 때문에, 두 인스턴스로 두 프로세스를 흉내 냅니다.
+    holder, waiter = SingleFlight(str(tmp_path)), SingleFlight(str(tmp_path))
+    stored = {}
+    release = threading.Event()
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(2)
+        stored["key"] = "결과"
+        return "결과"
+
+    with ThreadPoolExecutor(1) as pool:
+        first = pool.submit(holder.do, "key", compute)
+        started.wait(2)
+        begin = time.monotonic()
+        with pytest.raises(tasks.TaskTimeout):
+            with tasks.scope(timeout=0.2):
+                waiter.do("key", compute, recheck=lambda: stored.get("key"))
+        assert time.monotonic() - begin < 1.0
+        release.set()
+        assert first.result(timeout=2) == "결과"
+
+
+def test_process_lock_waiter_reuses_stored_result(tmp_path):
+    holder, waiter = SingleFlight(str(tmp_path)), SingleFlight(str(tmp_path))
+    stored = {}
+    release = threading.Event()
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(2)
+        stored["key"] = "결과"
+        return "결과"
+
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(holder.do, "key", compute)
+        started.wait(2)
+        second = pool.submit(waiter.do, "key", compute, lambda: stored.get("key"))
+        time.sleep(0.1)
+        release.set()
+        assert first.result(timeout=2) == second.result(timeout=2) == "결과"
+
+    assert waiter.stats()["executed"] == 0
+    assert waiter.stats()["coalesced_external"] == 1
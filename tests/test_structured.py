@@ -0,0 +1,31 @@
+import pytest
+from utils.structured import parse_items, ask_list, StructuredOutputError
+
+@pytest.mark.parametrize("text", [
+    '{"items": ["첫 질문", "둘째 질문"]}',
+    '다음은 목록입니다.\n```json\n["첫 질문", "둘째 질문"]\n```',
+    '결과: {"questions": [{"question": "1. 첫 질문"}, {"question": "둘째 질문"}]} 입니다.',
+    '다음은 질문입니다:\n1. 첫 질문\n2) "둘째 질문"\n- 첫 질문',
+])
+def test_parse_items_accepts_common_shapes(text):
+    assert parse_items(text) == ["첫 질문", "둘째 질문"]
+
+@pytest.mark.parametrize("text", ["", "   ", "목록을 만들 수 없습니다."])
+def test_parse_items_without_items_raises(text):
+    with pytest.raises(StructuredOutputError):
+        parse_items(text)
+
+def test_ask_list_repairs_malformed_response(llm):
+    def respond(prompt):
+        if "형식이 잘못되었습니다" in prompt:
+            return '{"items": ["첫 질문", "둘째 질문"]}'
+        return "첫 질문, 둘째 질문"
+    llm.responder = respond
+    assert ask_list("질문 목록을 JSON으로 주세요", min_items=2) == ["첫 질문", "둘째 질문"]
+    assert len(llm.requests) == 2
+    # 복구 요청에는 원래 프롬프트가 아니라 잘못된 응답만 담습니다.
+    assert "첫 질문, 둘째 질문" in llm.requests[1]["messages"][-1]["content"]
+
+def test_ask_list_falls_back_to_lines_when_repair_fails(llm):
+    llm.responder = lambda prompt: "형식 없음" if "형식이 잘못되었습니다" in prompt else "첫 질문\n둘째 질문"
+    assert ask_list("질문 목록을 JSON으로 주세요") == ["첫 질문", "둘째 질문"]
@@ -0,0 +1,95 @@
+import time
+import pytest
+import subtopic_speculator
+from utils import tasks
+from subtopic_speculator import SubtopicSpeculator
+
+def _wait_until(condition, timeout: float = 3.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "시간 안에 조건을 만족하지 않았습니다."
+        time.sleep(0.01)
+
+def test_unselected_prefetch_is_cancelled_in_flight(llm, capsys):
+    llm.responder = lambda prompt: "1. 첫 질문\n2. 둘째 질문"
+    llm.latency = 1.0
+    speculator = SubtopicSpeculator("책 정보", ["키워드"], "제목", total_answers=1)
+    speculator._prefetch(["선택한 소제목", "버린 소제목"])
+    _wait_until(lambda: len(llm.requests) == 2)
+    dropped = speculator._questions["버린 소제목"]
+
+    taken = speculator.take_questions(["선택한 소제목"])
+    speculator.shutdown()
+    assert taken["선택한 소제목"].result(timeout=3) == ["첫 질문", "둘째 질문"]
+    assert isinstance(dropped.exception(timeout=3), tasks.TaskCancelled)
+    # 버린 요청은 응답을 받기 전에 연결을 끊었어야 합니다.
+    _wait_until(lambda: llm.disconnects == 1)
+    assert len(llm.requests) == 2
+    assert "다시 시도" not in capsys.readouterr().out
+
+def _fake_generate(delays: dict, failures: tuple = (), cancelled: list = None):
+    """답변 수별로 delays만큼 걸려 '답변 N개 후보'를 돌려주는 generate_subtopics 대역"""
+    def generate(answers, book_context, review_points, title, verbose=True):
+        token = tasks.current_token()
+        deadline = time.monotonic() + delays.get(len(answers), 0)
+        while time.monotonic() < deadline:
+            if token.cancelled:
+                cancelled.append(len(answers))
+                raise tasks.TaskCancelled(token.reason)
+            time.sleep(0.01)
+        if len(answers) in failures:
+            raise Exception("소제목 생성 실패")
+        return [f"답변 {len(answers)}개 후보"]
+    return generate
+
+def _interview(speculator, count: int) -> list:
+    answers = []
+    for idx in range(count):
+        answers.append(f"답변{idx + 1}")
+        speculator.on_answer(list(answers))
+    return answers
+
+@pytest.fixture
+def speculator(monkeypatch):
+    monkeypatch.setattr(SubtopicSpeculator, "_prefetch", lambda self, subtopics: None)
+    speculator = SubtopicSpeculator("책 정보", ["키워드"], "제목", total_answers=5, accept_ratio=0.8,
+                                    full_draft_timeout=2)
+    yield speculator
+    speculator.shutdown()
+
+def test_full_draft_preferred_over_finished_partial(speculator, monkeypatch):
+    monkeypatch.setattr(subtopic_speculator, "generate_subtopics", _fake_generate({5: 0.3}))
+    answers = _interview(speculator, 5)
+    time.sleep(0.1)  # 부분 초안(답변 4개)이 먼저 끝나 있어도
+    assert speculator.result(answers) == ["답변 5개 후보"]
+
+def test_partial_used_when_full_draft_fails(speculator, monkeypatch):
+    monkeypatch.setattr(subtopic_speculator, "generate_subtopics", _fake_generate({}, failures=(5,)))
+    assert speculator.result(_interview(speculator, 5)) == ["답변 4개 후보"]
+
+def test_partial_used_when_full_draft_times_out(speculator, monkeypatch):
+    cancelled = []
+    monkeypatch.setattr(subtopic_speculator, "generate_subtopics", _fake_generate({5: 5}, cancelled=cancelled))
+    speculator.full_draft_timeout = 0.2
+    assert speculator.result(_interview(speculator, 5)) == ["답변 4개 후보"]
+    # 포기한 전체 답변 초안은 토큰으로 취소됩니다.
+    _wait_until(lambda: cancelled == [5])
+
+def test_full_draft_failure_without_partial_raises(speculator, monkeypatch):
+    monkeypatch.setattr(subtopic_speculator, "generate_subtopics", _fake_generate({}, failures=(4, 5)))
+    with pytest.raises(Exception, match="소제목 생성 실패"):
+        speculator.result(_interview(speculator, 5))
+
+def test_full_draft_without_partial_waits_past_timeout(speculator, monkeypatch):
+    monkeypatch.setattr(subtopic_speculator, "generate_subtopics", _fake_generate({5: 0.5}))
+    speculator.full_draft_timeout = 0.1
+    answers = ["답변1", "답변2", "답변3", "", "답변5"]  # 빈 답변은 초안을 만들지 않으므로 부분 초안이 없습니다.
+    for idx in range(len(answers)):
+        speculator.on_answer(answers[:idx + 1])
+    assert speculator.result(answers) == ["답변 5개 후보"]
+
+def test_full_draft_wait_honors_cancellation(speculator, monkeypatch):
+    monkeypatch.setattr(subtopic_speculator, "generate_subtopics", _fake_generate({5: 5}))
+    with pytest.raises(tasks.TaskTimeout):
+        with tasks.scope(timeout=0.2):
+            speculator.result(["답변1", "답변2", "답변3", "", "답변5"])
@@ -0,0 +1,88 @@
+import os
+import pytest
+from utils.templates import TemplateRegistry
+
+def _write(directory, name: str, text: str, mtime: float) -> None:
+    path = os.path.join(directory, f"{name}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.utime(path, (mtime, mtime))  # 파일 시스템의 수정 시각 해상도와 관계없이 바뀐 것으로 보이게 합니다.
+
+@pytest.fixture
+def registry(tmp_path):
+    _write(tmp_path, "greeting", "안녕하세요 {name}님", 1000)
+    return TemplateRegistry(str(tmp_path), hot_reload=True, reload_interval=0)
+
+def test_render_reports_missing_fields(registry):
+    template = registry.get("greeting")
+    assert template.fields == {"name"}
+    assert template.render(name="독자") == "안녕하세요 독자님"
+    with pytest.raises(Exception, match="필요한 값이 없습니다: name"):
+        template.render()
+
+def test_broken_edit_keeps_previous_template(registry, tmp_path, capsys):
+    previous = registry.get("greeting")
+    _write(tmp_path, "greeting", "안녕하세요 {name님", 2000)
+    assert registry.get("greeting") is previous
+    assert registry.get("greeting") is previous
+    assert capsys.readouterr().err.count("이전 템플릿을 계속 씁니다") == 1
+
+    _write(tmp_path, "greeting", "반갑습니다 {name}님", 3000)
+    assert registry.get("greeting").render(name="독자") == "반갑습니다 독자님"
+
+def test_new_and_deleted_templates_are_picked_up(registry, tmp_path):
+    registry.get("greeting")
+    _write(tmp_path, "farewell", "잘 가요 {name}님", 1000)
+    assert registry.get("farewell").render(name="독자") == "잘 가요 독자님"
+
+    os.remove(tmp_path / "greeting.txt")
+    with pytest.raises(Exception, match="찾을 수 없습니다"):
+        registry.get("greeting")
+    assert set(registry.versions()) == {"farewell"}
+
+def test_reload_rejects_placeholder_callers_do_not_fill(registry, tmp_path, capsys):
+    registry.expect("greeting", ["name"])
+    previous = registry.get("greeting")
+    _write(tmp_path, "greeting", "안녕하세요 {name}님, {age}살", 2000)
+    assert registry.get("greeting") is previous
+    assert "age" in capsys.readouterr().err
+
+def test_expected_template_is_kept_when_deleted(registry, tmp_path, capsys):
+    registry.expect("greeting", ["name"])
+    previous = registry.get("greeting")
+    os.remove(tmp_path / "greeting.txt")
+    assert registry.get("greeting") is previous
+    assert registry.get("greeting") is previous
+    assert capsys.readouterr().err.count("이전 템플릿을 계속 씁니다") == 1
+
+def test_load_all_checks_expected_fields(tmp_path):
+    registry = TemplateRegistry(str(tmp_path))
+    registry.expect("greeting", ["name"])
+    with pytest.raises(Exception, match="찾을 수 없습니다: greeting"):
+        registry.load_all()
+    _write(tmp_path, "greeting", "안녕하세요 {nmae}님", 1000)
+    with pytest.raises(Exception, match="채워지지 않는 자리표시자가 있습니다.*nmae"):
+        registry.load_all()
+
+@pytest.fixture
+def prompt_dir(tmp_path, monkeypatch):
+    """저장소의 prompts/를 복사한 디렉토리를 전역 템플릿 저장소에 연결합니다."""
+    import shutil
+    from utils import prompt_builder
+    for name in os.listdir(prompt_builder.templates.directory):
+        shutil.copy(os.path.join(prompt_builder.templates.directory, name), tmp_path)
+    monkeypatch.setattr(prompt_builder.templates, "directory", str(tmp_path))
+    yield tmp_path
+    monkeypatch.undo()
+    prompt_builder.templates.load_all()
+
+def test_main_rejects_bad_template_before_any_work(prompt_dir, monkeypatch, capsys):
+    import main
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr("builtins.input", lambda prompt="": pytest.fail("입력을 받기 전에 끝나야 합니다."))
+    with open(prompt_dir / "write_chapter.txt", "a", encoding="utf-8") as f:
+        f.write("\n{chapter_title}")
+    with pytest.raises(SystemExit) as exc:
+        main.main([])
+    assert exc.value.code == 1
+    assert "chapter_title" in capsys.readouterr().out
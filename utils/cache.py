@@ -1,27 +1,60 @@
 import os
-import json
 import hashlib
-import time
-from typing import Any, Optional
+import threading
+from typing import Any, Callable, Optional
+from utils.cache_backends import CacheBackend, MemoryBackend, SQLiteBackend, TieredBackend
+from utils.singleflight import SingleFlight
+from utils.trace import tracer
 
 class Cache:
     """
     캐싱 기능을 제공하는 클래스
+    실제 저장소는 교체 가능한 백엔드(CacheBackend)가 담당합니다.
     """
 
-    def __init__(self, cache_dir: str = ".cache", expiry_time: int = 86400):
+    def __init__(self, cache_dir: str = ".cache", expiry_time: int = 86400,
+                 backend: Optional[CacheBackend] = None, max_entries: Optional[int] = 10000,
+                 max_bytes: Optional[int] = 100 * 1024 * 1024, memory_entries: int = 256,
+                 memory_ttl: Optional[float] = 300):
         """
         캐시 초기화
 
         :param cache_dir: 캐시 파일을 저장할 디렉토리
         :param expiry_time: 캐시 만료 시간 (초 단위, 기본 24시간)
+        :param backend: 사용할 저장소 백엔드 (기본값: 메모리 LRU + cache_dir 안의 SQLite 단일 파일, 처음 쓸 때 만듭니다)
+        :param max_entries: 기본 백엔드의 최대 항목 수 (초과 시 LRU 축출)
+        :param max_bytes: 기본 백엔드의 최대 저장 용량 (초과 시 LRU 축출)
+        :param memory_entries: 기본 백엔드 메모리 계층의 최대 항목 수 (0이면 메모리 계층 미사용)
+        :param memory_ttl: 메모리 계층 항목의 유효 시간 (초)
         """
         self.cache_dir = cache_dir
         self.expiry_time = expiry_time
 
-        # 캐시 디렉토리가 없으면 생성
-        if not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
+        self._backend = backend
+        self._backend_options = (max_entries, max_bytes, memory_entries, memory_ttl)
+        self._backend_lock = threading.Lock()
+
+        # 같은 키를 동시에 계산하지 않도록 프로세스 내/프로세스 간 호출을 합칩니다.
+        self.singleflight = SingleFlight(lock_dir=os.path.join(cache_dir, "locks"))
+
+    @property
+    def backend(self) -> CacheBackend:
+        """
+        저장소 백엔드. 기본 백엔드는 처음 쓸 때 만들므로 전역 인스턴스를 import만 해서는
+        cache_dir에 파일이 생기지 않고, 배치 워커는 포크한 뒤 각자 SQLite 파일을 엽니다.
+        """
+        with self._backend_lock:
+            if self._backend is None:
+                max_entries, max_bytes, memory_entries, memory_ttl = self._backend_options
+                backend = SQLiteBackend(
+                    os.path.join(self.cache_dir, "cache.sqlite3"),
+                    max_entries=max_entries,
+                    max_bytes=max_bytes
+                )
+                if memory_entries:
+                    backend = TieredBackend(MemoryBackend(memory_entries, memory_ttl), backend)
+                self._backend = backend
+            return self._backend
 
     def _get_cache_key(self, *args, **kwargs) -> str:
         """
@@ -37,15 +70,6 @@ class Cache:
         # SHA-256 해시 사용
         return hashlib.sha256(key_str.encode('utf-8')).hexdigest()
 
-    def _get_cache_path(self, cache_key: str) -> str:
-        """
-        주어진 캐시 키에 대한 파일 경로 반환
-
-        :param cache_key: 캐시 키
-        :return: 캐시 파일 경로
-        """
-        return os.path.join(self.cache_dir, f"{cache_key}.json")
-
     def get(self, key: str) -> Optional[Any]:
         """
         캐시에서 값을 가져옴
@@ -53,28 +77,11 @@ class Cache:
         :param key: 캐시 키
         :return: 캐시된 값 또는 None (캐시 미스)
         """
-        cache_path = self._get_cache_path(key)
-
-        if not os.path.exists(cache_path):
-            return None
-
-        try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-
-            # 만료 시간 확인
-            if time.time() - cache_data['timestamp'] > self.expiry_time:
-                # 만료된 캐시 삭제
-                os.remove(cache_path)
-                return None
-
-            return cache_data['value']
-
-        except (json.JSONDecodeError, KeyError):
-            # 잘못된 형식의 캐시 파일이면 삭제
-            if os.path.exists(cache_path):
-                os.remove(cache_path)
-            return None
+        # 'llm:...', 'review_chunk:...'처럼 접두사가 있는 키는 접두사별로, 나머지(@cached 함수)는 함께 집계됩니다.
+        with tracer.span(key.split(":", 1)[0] if ":" in key else "cached", "cache") as span:
+            value = self.backend.get(key, max_age=self.expiry_time)
+            span.set(hit=value is not None)
+            return value
 
     def set(self, key: str, value: Any) -> None:
         """
@@ -83,23 +90,20 @@ class Cache:
         :param key: 캐시 키
         :param value: 저장할 값
         """
-        cache_path = self._get_cache_path(key)
-
-        cache_data = {
-            'timestamp': time.time(),
-            'value': value
-        }
+        self.backend.set(key, value)
 
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-
-    def cached(self, func):
+    def cached(self, func=None, *, version: Callable[[], str] = None):
         """
         함수 결과를 캐싱하는 데코레이터
 
         :param func: 캐싱할 함수
+        :param version: 캐시 키에 넣을 버전을 반환하는 함수 (예: 함수가 쓰는 프롬프트 템플릿의 해시).
+                        버전이 바뀌면 이전 결과를 쓰지 않습니다. @cache.cached(version=...) 형태로 사용합니다.
         :return: 캐싱 적용된 함수
         """
+        if func is None:
+            return lambda f: self.cached(f, version=version)
+
         def wrapper(*args, **kwargs):
             # 캐시 비활성화 플래그 확인
             skip_cache = kwargs.pop('skip_cache', False)
@@ -108,7 +112,10 @@ class Cache:
                 return func(*args, **kwargs)
 
             # 캐시 키 생성
-            cache_key = self._get_cache_key(func.__name__, *args, **kwargs)
+            if version is None:
+                cache_key = self._get_cache_key(func.__name__, *args, **kwargs)
+            else:
+                cache_key = self._get_cache_key(func.__name__, version(), *args, **kwargs)
 
             # 캐시에서 값 가져오기
             cached_result = self.get(cache_key)
@@ -117,43 +124,32 @@ class Cache:
                 print(f"[캐시] '{func.__name__}' 함수 결과를 캐시에서 로드했습니다.")
                 return cached_result
 
-            # 함수 실행 및 결과 캐싱
-            result = func(*args, **kwargs)
-            self.set(cache_key, result)
+            # 함수 실행 및 결과 캐싱 (같은 키의 동시 호출은 하나의 실행 결과를 공유)
+            def compute():
+                result = func(*args, **kwargs)
+                self.set(cache_key, result)
+                return result
 
-            return result
+            return self.singleflight.do(cache_key, compute, recheck=lambda: self.get(cache_key))
 
         return wrapper
 
     def clear(self, older_than: Optional[int] = None) -> int:
         """
-        캐시 파일 정리
+        캐시 항목 정리
 
         :param older_than: 지정된 시간(초)보다 오래된 캐시만 삭제, None이면 모든 캐시 삭제
-        :return: 삭제된 파일 수
+        :return: 삭제된 항목 수
         """
-        count = 0
-        current_time = time.time()
-
-        for filename in os.listdir(self.cache_dir):
-            if not filename.endswith('.json'):
-                continue
+        return self.backend.clear(older_than)
 
-            file_path = os.path.join(self.cache_dir, filename)
-
-            if older_than is not None:
-                # 파일 수정 시간 확인
-                file_age = current_time - os.path.getmtime(file_path)
-                if file_age <= older_than:
-                    continue
-
-            try:
-                os.remove(file_path)
-                count += 1
-            except OSError:
-                continue
-
-        return count
+    def stats(self) -> dict:
+        """
+        캐시 적중/실패/축출 횟수 등 백엔드 통계와 중복 호출 생략 횟수를 반환
+        """
+        stats = self.backend.stats()
+        stats["singleflight"] = self.singleflight.stats()
+        return stats
 
 # 전역 캐시 인스턴스 생성
-cache = Cache()
\ No newline at end of file
+cache = Cache()
@@ -0,0 +1,404 @@
+import os
+import copy
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+class CacheBackend:
+    """
+    캐시 저장소 인터페이스
+    Cache는 키 생성과 데코레이터만 담당하고, 실제 저장/조회/만료/축출은 백엔드가 처리합니다.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """
+        값을 가져옴. 없거나 max_age(초)보다 오래되었으면 None을 반환합니다.
+        """
+        entry = self.get_entry(key, max_age)
+        return None if entry is None else entry[1]
+
+    def get_entry(self, key: str, max_age: Optional[float] = None) -> Optional[tuple]:
+        """
+        get()과 같지만 값이 저장된 시각도 함께 (저장 시각, 값)으로 반환합니다.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        """값을 저장합니다."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """값을 삭제합니다."""
+        raise NotImplementedError
+
+    def clear(self, older_than: Optional[float] = None) -> int:
+        """
+        older_than(초)보다 오래된 항목을 삭제합니다. None이면 모두 삭제합니다.
+
+        :return: 삭제된 항목 수
+        """
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """조회 적중/실패/축출 횟수를 반환합니다."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + n)
+
+class JsonFileBackend(CacheBackend):
+    """
+    키마다 JSON 파일 하나를 저장하는 기존 방식의 백엔드
+    """
+
+    def __init__(self, cache_dir: str = ".cache"):
+        super().__init__()
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _get_cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get_entry(self, key: str, max_age: Optional[float] = None) -> Optional[tuple]:
+        cache_path = self._get_cache_path(key)
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache_data = json.load(f)
+
+            if max_age is not None and time.time() - cache_data['timestamp'] > max_age:
+                # 만료된 캐시 삭제
+                self.delete(key)
+                self._count("misses")
+                return None
+
+            self._count("hits")
+            return cache_data['timestamp'], cache_data['value']
+
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        except (json.JSONDecodeError, KeyError):
+            # 잘못된 형식의 캐시 파일이면 삭제
+            self.delete(key)
+            self._count("misses")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        cache_data = {
+            'timestamp': time.time(),
+            'value': value
+        }
+        # 임시 파일에 쓴 뒤 교체하여 다른 프로세스가 반쯤 쓰인 파일을 읽지 않도록 합니다.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(cache_data, f, ensure_ascii=False)
+            os.replace(tmp_path, self._get_cache_path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._get_cache_path(key))
+        except OSError:
+            pass
+
+    def clear(self, older_than: Optional[float] = None) -> int:
+        count = 0
+        current_time = time.time()
+
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.json'):
+                continue
+
+            file_path = os.path.join(self.cache_dir, filename)
+
+            if older_than is not None:
+                # 파일 수정 시간 확인
+                file_age = current_time - os.path.getmtime(file_path)
+                if file_age <= older_than:
+                    continue
+
+            try:
+                os.remove(file_path)
+                count += 1
+            except OSError:
+                continue
+
+        return count
+
+class SQLiteBackend(CacheBackend):
+    """
+    단일 SQLite 파일에 모든 항목을 저장하는 인덱스 기반 백엔드
+
+    - 기본 키 인덱스로 한 번에 조회합니다.
+    - max_entries / max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 축출합니다(LRU).
+    - 쓰기는 트랜잭션(BEGIN IMMEDIATE)으로 처리되어 여러 프로세스가 함께 사용해도 안전합니다.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created REAL NOT NULL,
+        accessed REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed);
+    CREATE INDEX IF NOT EXISTS entries_created ON entries(created);
+    CREATE TABLE IF NOT EXISTS totals (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        entries INTEGER NOT NULL,
+        bytes INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+    CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+        UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+        UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+        UPDATE totals SET bytes = bytes - OLD.size + NEW.size WHERE id = 0;
+    END;
+    """
+
+    def __init__(self, path: str = ".cache/cache.sqlite3", max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        :param path: SQLite 파일 경로
+        :param max_entries: 최대 항목 수 (None이면 제한 없음)
+        :param max_bytes: 저장된 값의 최대 총 바이트 수 (None이면 제한 없음)
+        """
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 연결은 스레드 간에 공유하지 않으므로 스레드마다 하나씩 엽니다.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._conn())
+
+    def get_entry(self, key: str, max_age: Optional[float] = None) -> Optional[tuple]:
+        conn = self._conn()
+        row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+
+        value, created = row
+        now = time.time()
+        if max_age is not None and now - created > max_age:
+            self.delete(key)
+            self._count("misses")
+            return None
+
+        try:
+            result = json.loads(value)
+        except json.JSONDecodeError:
+            self.delete(key)
+            self._count("misses")
+            return None
+
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return created, result
+
+    def set(self, key: str, value: Any) -> None:
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode('utf-8'))
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "created = excluded.created, accessed = excluded.accessed",
+                (key, data, size, now, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """용량 제한을 넘는 동안 가장 오래 사용되지 않은 항목을 삭제합니다."""
+        if self.max_entries is None and self.max_bytes is None:
+            return
+
+        entries, total_bytes = conn.execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+        over_entries = entries - self.max_entries if self.max_entries is not None else 0
+        over_bytes = total_bytes - self.max_bytes if self.max_bytes is not None else 0
+        if over_entries <= 0 and over_bytes <= 0:
+            return
+
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if over_entries <= 0 and over_bytes <= 0:
+                break
+            victims.append((key,))
+            over_entries -= 1
+            over_bytes -= size
+
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._count("evictions", len(victims))
+
+    def delete(self, key: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self, older_than: Optional[float] = None) -> int:
+        with self._transaction() as conn:
+            if older_than is None:
+                cursor = conn.execute("DELETE FROM entries")
+            else:
+                cursor = conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - older_than,))
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        entries, total_bytes = self._conn().execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+        stats = super().stats()
+        stats.update(entries=entries, bytes=total_bytes)
+        return stats
+
+class MemoryBackend(CacheBackend):
+    """
+    프로세스 메모리에 값을 보관하는 LRU 백엔드
+    max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 축출하고, ttl(초)이 지나면 만료됩니다.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = 300):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (저장 시각, 값)
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: str, max_age: Optional[float] = None) -> Optional[tuple]:
+        limits = [age for age in (max_age, self.ttl) if age is not None]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and limits and time.time() - entry[0] > min(limits):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # 호출자가 결과를 수정해도 캐시된 값이 바뀌지 않도록 복사본을 반환합니다.
+        return entry[0], copy.deepcopy(entry[1])
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        """
+        :param stored_at: 저장 시각 (기본값: 현재 시각). 다른 저장소에서 옮겨 온 값은 원래 시각을 넘겨 만료 시점을 유지합니다.
+        """
+        with self._lock:
+            self._entries[key] = (stored_at if stored_at is not None else time.time(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, older_than: Optional[float] = None) -> int:
+        with self._lock:
+            if older_than is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            threshold = time.time() - older_than
+            expired = [key for key, (stored, _) in self._entries.items() if stored < threshold]
+            for key in expired:
+                del self._entries[key]
+            return len(expired)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["entries"] = len(self._entries)
+        return stats
+
+class TieredBackend(CacheBackend):
+    """
+    메모리 LRU 계층을 영구 저장소 앞에 두는 2단계 백엔드
+
+    - 조회는 메모리 → 영구 저장소 순으로 하고, 영구 저장소에서 찾은 값은 메모리로 올립니다.
+      이때 원래 저장 시각을 그대로 옮겨 max_age/ttl 만료가 늦춰지지 않게 합니다.
+    - 저장은 두 계층에 모두 기록합니다(write-through).
+    """
+
+    def __init__(self, memory: MemoryBackend, persistent: CacheBackend):
+        super().__init__()
+        self.memory = memory
+        self.persistent = persistent
+
+    def get_entry(self, key: str, max_age: Optional[float] = None) -> Optional[tuple]:
+        entry = self.memory.get_entry(key, max_age)
+        if entry is not None:
+            return entry
+        entry = self.persistent.get_entry(key, max_age)
+        if entry is not None:
+            self.memory.set(key, entry[1], stored_at=entry[0])
+        return entry
+
+    def set(self, key: str, value: Any) -> None:
+        self.persistent.set(key, value)
+        self.memory.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        self.persistent.delete(key)
+
+    def clear(self, older_than: Optional[float] = None) -> int:
+        self.memory.clear(older_than)
+        return self.persistent.clear(older_than)
+
+    def stats(self) -> dict:
+        memory = self.memory.stats()
+        persistent = self.persistent.stats()
+        return {
+            "hits": memory["hits"] + persistent["hits"],
+            "misses": persistent["misses"],
+            "evictions": persistent["evictions"],
+            "tiers": {"memory": memory, "persistent": persistent}
+        }
+
+class _Transaction:
+    """BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡는 트랜잭션 컨텍스트"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
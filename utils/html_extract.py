@@ -0,0 +1,161 @@
+from html.parser import HTMLParser
+
+# 닫는 태그가 없는 요소
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr"
+}
+# 텍스트 추출에서 제외할 요소
+SKIP_TEXT_ELEMENTS = {"script", "style", "template"}
+
+def compile_selector(selector: str) -> tuple:
+    """
+    'div.a.b p.c' 형태의 CSS 선택자(태그/클래스 + 자손 결합자)를
+    ((태그, {클래스}), ...) 단계 튜플로 컴파일합니다.
+    """
+    steps = []
+    for part in selector.split():
+        tag, *classes = part.split(".")
+        steps.append((tag.lower() or None, frozenset(classes)))
+    if not steps:
+        raise ValueError(f"빈 선택자입니다: {selector!r}")
+    return tuple(steps)
+
+def _step_matches(step: tuple, tag: str, classes: frozenset) -> bool:
+    step_tag, step_classes = step
+    return (step_tag is None or step_tag == tag) and step_classes <= classes
+
+class _SelectorScanner(HTMLParser):
+    """
+    HTML을 트리로 만들지 않고 한 번 훑으면서 모든 선택자를 동시에 평가하는 토크나이저
+    일치한 요소마다 BeautifulSoup의 get_text(strip=True)와 같은 방식으로 텍스트를 모읍니다.
+    """
+
+    def __init__(self, compiled: list):
+        super().__init__(convert_charrefs=True)
+        self.compiled = compiled
+        self.results = [[] for _ in compiled]  # 선택자별 일치 요소의 텍스트
+        self._stack = []    # (태그, 클래스 집합, 이 요소에서 시작된 캡처 목록)
+        self._active = []   # 진행 중인 캡처: [선택자 번호, 텍스트 조각 리스트]
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        classes = frozenset()
+        for name, value in attrs:
+            if name == "class" and value:
+                classes = frozenset(value.split())
+                break
+
+        started = []
+        for idx, steps in enumerate(self.compiled):
+            if _step_matches(steps[-1], tag, classes) and self._ancestors_match(steps[:-1]):
+                capture = [idx, []]
+                started.append(capture)
+                self._active.append(capture)
+
+        self._stack.append((tag, classes, started))
+        if tag in SKIP_TEXT_ELEMENTS:
+            self._skip_depth += 1
+
+    def _ancestors_match(self, steps: tuple) -> bool:
+        """남은 선택자 단계가 열린 조상 요소들에 순서대로 일치하는지 확인합니다."""
+        i = len(steps) - 1
+        for tag, classes, _ in reversed(self._stack):
+            if i < 0:
+                break
+            if _step_matches(steps[i], tag, classes):
+                i -= 1
+        return i < 0
+
+    def handle_endtag(self, tag):
+        # 짝이 맞지 않는 닫는 태그는 무시하고, 맞는 태그까지 열린 요소를 모두 닫습니다.
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                while len(self._stack) > depth:
+                    self._close(self._stack.pop())
+                return
+
+    def _close(self, element: tuple):
+        tag, _, started = element
+        if tag in SKIP_TEXT_ELEMENTS:
+            self._skip_depth -= 1
+        for capture in started:
+            self._active.remove(capture)
+            idx, parts = capture
+            self.results[idx].append("".join(parts))
+
+    def handle_data(self, data):
+        if self._skip_depth or not self._active:
+            return
+        text = data.strip()
+        if text:
+            for _, parts in self._active:
+                parts.append(text)
+
+    def finish(self) -> list:
+        self.close()
+        while self._stack:
+            self._close(self._stack.pop())
+        return self.results
+
+class SelectorExtractor:
+    """
+    여러 후보 선택자를 한 번의 파싱으로 평가하고, 선언된 우선순위에서 가장 앞선 일치 결과를 고르는 추출기
+    """
+
+    def __init__(self, selectors: list):
+        """
+        :param selectors: 우선순위 순서의 후보 선택자 목록
+        """
+        self.selectors = list(selectors)
+        self._compiled = [compile_selector(s) for s in self.selectors]
+
+    def extract(self, html: str) -> tuple:
+        """
+        HTML에서 텍스트가 있는 요소를 찾은 첫 번째 선택자의 결과를 반환합니다.
+
+        :return: (선택자, 텍스트 리스트, 일치한 요소 수) — 찾지 못하면 (None, [], 0)
+        """
+        scanner = _SelectorScanner(self._compiled)
+        scanner.feed(html)
+        results = scanner.finish()
+
+        for selector, matches in zip(self.selectors, results):
+            texts = [t for t in matches if t]
+            if texts:
+                return selector, texts, len(matches)
+        return None, [], 0
+
+class _AttributeFinder(HTMLParser):
+    class _Found(Exception):
+        pass
+
+    def __init__(self, tag: str, attr: str):
+        super().__init__(convert_charrefs=True)
+        self.tag = tag
+        self.attr = attr
+        self.value = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == self.tag:
+            for name, value in attrs:
+                if name == self.attr:
+                    self.value = value or ""
+                    raise self._Found()
+
+    handle_startendtag = handle_starttag
+
+def find_first_attribute(html: str, tag: str, attr: str):
+    """
+    attr 속성을 가진 첫 번째 tag 요소의 속성 값을 반환합니다. (select_one("tag[attr]")와 같은 역할)
+    찾는 즉시 파싱을 멈추며, 요소가 없으면 None, 속성 값이 비어 있으면 빈 문자열을 반환합니다.
+    """
+    finder = _AttributeFinder(tag, attr)
+    try:
+        finder.feed(html)
+        finder.close()
+    except _AttributeFinder._Found:
+        pass
+    return finder.value
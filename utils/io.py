@@ -1,4 +1,6 @@
 import re
+import sys
+import threading
 
 def load_text(filepath: str) -> str:
     """텍스트 파일을 읽어 문자열로 반환합니다."""
@@ -10,23 +12,6 @@ def load_text(filepath: str) -> str:
     except Exception as e:
         raise Exception(f"파일 로드 중 오류 발생: {e}")
 
-def parse_list(text: str) -> list:
-    """
-    정규 표현식을 사용하여 문자열에서 번호 매긴 항목이나 불릿 포인트를 리스트로 파싱합니다.
-    """
-    if not text:
-        return []
-
-    # 숫자 + 점(.) + 공백으로 시작하거나, 불릿(-,*,•) + 공백으로 시작하는 라인 찾기
-    pattern = r'(?:^|\n)(?:\d+\.\s+|\-\s+|\*\s+|•\s+)(.*?)(?=\n|$)'
-    matches = re.findall(pattern, text)
-
-    if matches:
-        return [match.strip() for match in matches]
-    else:
-        # 패턴 매칭 실패 시 줄바꿈으로 분리된 비어있지 않은 라인을 반환
-        return [line.strip() for line in text.strip().split('\n') if line.strip()]
-
 def select_items_from_list(items: list, prompt_text: str, min_select: int = 1, max_select: int = None) -> list:
     """
     사용자에게 리스트에서 항목을 선택하게 하고 선택된 항목들을 반환합니다.
@@ -70,6 +55,15 @@ def select_items_from_list(items: list, prompt_text: str, min_select: int = 1, m
         except Exception as e:
             print(f"오류 발생: {e}")
 
+def format_review(title: str, chapters: list) -> str:
+    """
+    챕터 리스트({"title", "content"})를 최종 리뷰 문서 형식으로 조립합니다.
+    """
+    final_review = f"# 『{title}』 리뷰\n\n"
+    for chapter in chapters:
+        final_review += f"## {chapter['title']}\n{chapter['content']}\n\n"
+    return final_review
+
 def save_review_to_file(review_text: str, filename: str = "review_output.txt") -> bool:
     """
     생성된 리뷰를 텍스트 파일로 저장합니다.
@@ -80,4 +74,141 @@ def save_review_to_file(review_text: str, filename: str = "review_output.txt") -
         return True
     except Exception as e:
         print(f"파일 저장 중 오류 발생: {e}")
-        return False
\ No newline at end of file
+        return False
+
+class ReviewFileWriter:
+    """
+    최종 리뷰를 챕터 단위로 바로바로 파일에 기록하는 작성기
+
+    - 챕터는 선택한 순서대로 기록되며, 차례가 된 챕터의 내용은 도착하는 즉시 기록·flush 됩니다.
+    - 앞 챕터가 끝나기 전에 도착한 뒤 챕터의 내용은 메모리에 두었다가 차례가 되면 기록합니다.
+    - 중간에 프로그램이 멈춰도 그때까지 기록된 내용은 파일에 남습니다.
+    - 기록한 챕터 내용은 show_finished()/follow()로 터미널에도 같은 순서로 보여줄 수 있습니다.
+    """
+
+    def __init__(self, title: str, chapter_titles: list, filename: str = "review_output.txt"):
+        self.filename = filename
+        self._titles = list(chapter_titles)
+        self._buffers = [[] for _ in self._titles]
+        self._finished = [False] * len(self._titles)
+        self._head = 0
+        self._lock = threading.Lock()
+        self._unshown = []  # 파일에는 기록했지만 아직 터미널에 보여주지 않은 내용
+        self._ready = 0     # _unshown 중 끝난 챕터에 속하는 조각 수
+        self._echo = None   # follow() 이후 기록과 동시에 출력할 스트림
+        self._file = open(filename, 'w', encoding='utf-8')
+        self._file.write(f"# 『{title}』 리뷰\n\n")
+        if self._titles:
+            self._write(f"## {self._titles[0]}\n")
+
+    def _write(self, text: str) -> None:
+        self._file.write(text)
+        self._file.flush()
+        if self._echo is not None:
+            self._echo.write(text)
+            self._echo.flush()
+        else:
+            self._unshown.append(text)
+
+    def show_finished(self, out=None) -> None:
+        """
+        끝난 챕터 중 아직 보여주지 않은 내용을 출력합니다.
+        답변을 받는 도중에는 입력과 섞이지 않도록, 질문 사이의 정해진 시점에만 호출합니다.
+        :param out: 출력할 스트림 (기본값: sys.stdout)
+        """
+        out = out or sys.stdout
+        with self._lock:
+            if self._ready:
+                out.write("".join(self._unshown[:self._ready]))
+                out.flush()
+                del self._unshown[:self._ready]
+                self._ready = 0
+
+    def follow(self, out=None) -> None:
+        """
+        남은 내용을 모두 출력하고, 이후 차례가 된 챕터 내용은 기록하는 즉시 함께 출력합니다.
+        :param out: 출력할 스트림 (기본값: sys.stdout)
+        """
+        out = out or sys.stdout
+        with self._lock:
+            out.write("".join(self._unshown))
+            out.flush()
+            self._unshown = []
+            self._ready = 0
+            self._echo = out
+
+    def chapter(self, index: int) -> "ChapterSink":
+        """index번째 챕터 내용을 받을 싱크를 반환합니다."""
+        return ChapterSink(self, index)
+
+    def write_chapter(self, index: int, content: str) -> None:
+        """완성된 챕터 내용을 한 번에 기록합니다."""
+        sink = self.chapter(index)
+        sink.write(content)
+        sink.close()
+
+    def _append(self, index: int, text: str) -> None:
+        with self._lock:
+            if self._file.closed:
+                return  # 중단된 뒤 늦게 도착한 내용은 버립니다.
+            if index == self._head:
+                self._write(text)
+            else:
+                self._buffers[index].append(text)
+
+    def _finish(self, index: int) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self._finished[index] = True
+            # 끝난 챕터를 닫고, 다음 챕터의 제목과 그동안 모인 내용을 기록합니다.
+            while self._head < len(self._titles) and self._finished[self._head]:
+                self._write("\n\n")
+                self._ready = len(self._unshown)
+                self._head += 1
+                if self._head < len(self._titles):
+                    self._write(f"## {self._titles[self._head]}\n" + "".join(self._buffers[self._head]))
+                    self._buffers[self._head] = []
+
+    def close(self) -> None:
+        """남은 내용을 모두 기록하고 파일을 닫습니다."""
+        with self._lock:
+            if self._file.closed:
+                return
+            for index in range(self._head + 1, len(self._titles)):
+                self._write("\n\n" + f"## {self._titles[index]}\n" + "".join(self._buffers[index]))
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ChapterSink:
+    """
+    ReviewFileWriter의 한 챕터에 내용을 흘려 넣는 객체
+    앞뒤 공백은 완성 본문의 strip()과 같도록 정리합니다.
+    """
+
+    def __init__(self, writer: ReviewFileWriter, index: int):
+        self._writer = writer
+        self._index = index
+        self._started = False
+        self._pending = ""  # 아직 기록하지 않은 끝부분 공백
+
+    def write(self, text: str) -> None:
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return
+            self._started = True
+        body = text.rstrip()
+        if body:
+            self._writer._append(self._index, self._pending + body)
+            self._pending = text[len(body):]
+        else:
+            self._pending += text
+
+    def close(self) -> None:
+        self._writer._finish(self._index)
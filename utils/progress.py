@@ -1,6 +1,5 @@
 import time
 import sys
-from tqdm import tqdm
 
 class Progress:
     """
@@ -35,6 +34,7 @@ class Progress:
     @staticmethod
     def progress_bar(iterable=None, desc="진행 중", total=None):
         """tqdm을 사용한 프로그레스 바를 반환합니다."""
+        from tqdm import tqdm  # 프로그레스 바를 쓸 때만 읽습니다.
         return tqdm(
             iterable=iterable, 
             desc=desc, 
@@ -93,4 +93,28 @@ class Progress:
 
         if current_step >= total_steps:
             sys.stdout.write("\n")
-            sys.stdout.flush()
\ No newline at end of file
+            sys.stdout.flush()
+
+    @staticmethod
+    def follow(desc, done, succeeded=None):
+        """
+        done 이벤트가 설정될 때까지 진행 상태를 표시합니다.
+        완료 여부를 폴링하지 않고 이벤트를 기다리므로 작업이 끝나는 즉시 표시를 멈춥니다.
+        succeeded 함수가 False를 반환하면 완료 대신 중단으로 표시합니다.
+        """
+        start_time = time.time()
+        stages = ["⣾", "⣽", "⣻", "⢿", "⡿", "⣟", "⣯", "⣷"]
+        i = 0
+
+        while not done.is_set():
+            minutes, seconds = divmod(int(time.time() - start_time), 60)
+            sys.stdout.write(f"\r{stages[i % len(stages)]} {desc} ({minutes:02d}:{seconds:02d}) ")
+            sys.stdout.flush()
+            done.wait(0.1)
+            i += 1
+
+        if succeeded is None or succeeded():
+            sys.stdout.write("\r✓ 완료!                      \n")
+        else:
+            sys.stdout.write("\r  중단됨                     \n")
+        sys.stdout.flush()
@@ -0,0 +1,241 @@
+import os
+import re
+import sys
+import threading
+import unicodedata
+from utils.templates import templates, Template
+
+class StageSpec:
+    """
+    단계별 프롬프트 설정
+
+    :param template: 프롬프트 템플릿 파일 경로
+    :param fields: 이 단계에서 build_prompt에 넘기는 필드 (템플릿에는 이 필드의 자리표시자만 있어야 합니다)
+    :param budget: 완성된 프롬프트의 최대 토큰 수
+    :param compact: 예산을 넘을 때 줄일 필드 (앞에 있는 필드부터 줄입니다)
+    :param formats: 리스트 필드의 항목 형식 (기본 '- {item}', {idx}는 1부터 시작하는 번호)
+    :param item_budget: 리스트 항목 하나의 최대 토큰 수 (넘으면 항목을 자릅니다)
+    """
+
+    def __init__(self, template: str, fields: tuple, budget: int, compact: list = (), formats: dict = None,
+                 item_budget: int = None):
+        self.template = template
+        self.fields = frozenset(fields)
+        self.budget = budget
+        self.compact = list(compact)
+        self.formats = formats or {}
+        self.item_budget = item_budget
+
+# 응답(max_tokens=1000)과 합쳐도 gpt-3.5-turbo 컨텍스트(16k)에 여유 있게 들어가는 크기로 잡았습니다.
+STAGES = {
+    "book_info": StageSpec("prompts/book_info.txt", ("title", "author"), budget=1000),
+    "review_keywords": StageSpec(
+        "prompts/review_keywords.txt", ("title", "reviews"), budget=6000, compact=["reviews"],
+        formats={"reviews": "리뷰 {idx}: {item}"}, item_budget=400
+    ),
+    # 맵리듀스 분석의 리뷰 묶음 하나 (묶음 크기는 review_processor.CHUNK_TOKENS로 정해집니다)
+    "review_chunk": StageSpec(
+        "prompts/review_keywords.txt", ("title", "reviews"), budget=4000, compact=["reviews"],
+        formats={"reviews": "리뷰 {idx}: {item}"}, item_budget=400
+    ),
+    "review_merge": StageSpec(
+        "prompts/review_points_merge.txt", ("title", "chunk_points"), budget=4000, compact=["chunk_points"]
+    ),
+    "interview_questions": StageSpec(
+        "prompts/interview_questions.txt", ("title", "book_context", "review_points"), budget=3000, compact=["book_context", "review_points"]
+    ),
+    "subtopics": StageSpec(
+        "prompts/subtopics.txt", ("title", "book_context", "review_points", "user_responses"), budget=3500, compact=["book_context", "review_points", "user_responses"]
+    ),
+    "guided_questions": StageSpec(
+        "prompts/guided_questions.txt", ("subtopic", "book_context", "review_points"), budget=3000, compact=["book_context", "review_points"]
+    ),
+    "write_chapter": StageSpec(
+        "prompts/write_chapter.txt", ("subtopic", "answers", "book_context", "review_points"), budget=4000, compact=["book_context", "review_points"]
+    ),
+}
+
+# PROMPT_BUDGET_<STAGE> 환경 변수로 단계별 예산을 바꿀 수 있습니다. (예: PROMPT_BUDGET_WRITE_CHAPTER=3000)
+for _name, _spec in STAGES.items():
+    _spec.budget = int(os.getenv(f"PROMPT_BUDGET_{_name.upper()}", _spec.budget))
+    templates.expect(os.path.splitext(os.path.basename(_spec.template))[0], _spec.fields)
+
+# 1이면 프롬프트를 만들 때마다 단계별 토큰 수를 stderr에 출력합니다.
+LOG_TOKENS = os.getenv("PROMPT_TOKEN_LOG", "") in ("1", "true", "yes")
+
+_encoding = None
+_encoding_loaded = False
+_stats = {}
+_lock = threading.Lock()
+
+def _get_encoding():
+    """tiktoken 인코딩 (읽는 데 시간이 걸리므로 처음 토큰을 셀 때 읽습니다, 없으면 None)"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:  # tiktoken이 없으면 문자 기반 추정치를 사용
+            _encoding = None
+        _encoding_loaded = True
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """
+    텍스트의 토큰 수를 셉니다. tiktoken이 있으면 정확히 세고,
+    없으면 한글 등 비ASCII 문자는 글자당 1토큰, ASCII는 4글자당 1토큰으로 넉넉하게 추정합니다.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    non_ascii = sum(1 for c in text if ord(c) > 127 and not c.isspace())
+    ascii_chars = sum(1 for c in text if ord(c) <= 127 and not c.isspace())
+    return non_ascii + (ascii_chars + 3) // 4
+
+def load_template(path: str) -> Template:
+    """
+    템플릿 저장소(utils.templates)에서 미리 읽어 둔 템플릿을 가져옵니다.
+
+    :param path: 템플릿 파일 경로 (prompts/<name>.txt)
+    """
+    return templates.get(os.path.splitext(os.path.basename(path))[0])
+
+def preload_templates() -> None:
+    """
+    모든 단계 템플릿을 읽고 자리표시자가 단계에서 넘기는 필드와 맞는지 검사합니다.
+    실행 진입점에서 크롤링·LLM 호출 전에 호출해, 잘못된 템플릿이 실행 도중이 아니라 시작할 때 드러나게 합니다.
+
+    :raises Exception: 템플릿이 없거나, 형식이 잘못되었거나, 채워지지 않는 자리표시자가 있는 경우
+    """
+    templates.load_all()
+
+def template_version(stage: str) -> str:
+    """단계 템플릿의 버전 해시. 템플릿이 없는 단계(형식 복구 등)는 빈 문자열입니다."""
+    spec = STAGES.get(stage)
+    return load_template(spec.template).version if spec else ""
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+def dedupe(items: list) -> list:
+    """공백/대소문자/전각 차이만 있는 중복 항목을 처음 것만 남기고 제거합니다."""
+    seen, unique = set(), []
+    for item in items:
+        text = str(item).strip()
+        key = _normalize(text)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(text)
+    return unique
+
+def squeeze(text: str) -> str:
+    """연속된 빈 줄과 줄 안의 중복 공백을 줄입니다."""
+    lines = [" ".join(line.split()) for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+def truncate(text: str, max_tokens: int) -> str:
+    """
+    max_tokens 안에 들어가도록 텍스트 앞부분을 남깁니다.
+    가능하면 문장(또는 줄) 단위로 자르고, 한 문장도 들어가지 않으면 글자 단위로 자릅니다.
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    sentences = re.split(r"(?<=[.!?。])\s+|\n", text)
+    kept = []
+    for sentence in sentences:
+        if count_tokens(" ".join(kept + [sentence])) > max_tokens:
+            break
+        kept.append(sentence)
+    if kept:
+        return " ".join(kept).strip()
+    # 첫 문장이 예산보다 길면 비율로 잘라낸 뒤 맞을 때까지 줄입니다.
+    cut = max(1, len(text) * max_tokens // max(count_tokens(text), 1))
+    while cut > 1 and count_tokens(text[:cut]) > max_tokens:
+        cut = cut * 9 // 10
+    return text[:cut].rstrip() + "…"
+
+def _format_list(items: list, item_format: str) -> str:
+    return "\n".join(item_format.format(idx=idx, item=item) for idx, item in enumerate(items, start=1))
+
+def build_prompt(stage: str, **fields) -> str:
+    """
+    단계 템플릿에 필드를 채워 프롬프트를 만들고, 단계별 토큰 예산 안에 들어가도록 맥락을 줄입니다.
+
+    - 리스트 필드는 중복 항목을 제거한 뒤 항목 형식(기본 '- 항목')으로 나열합니다.
+    - 예산을 넘으면 StageSpec.compact 순서대로 리스트는 뒤쪽 항목부터 빼고, 텍스트는 뒷문장부터 자릅니다.
+      (책 정보는 앞부분에 핵심이 있고, 리뷰 포인트는 중요한 것부터, 리뷰는 최신순으로 들어오므로
+      뒤쪽이 덜 중요합니다.)
+    - 사용한 토큰 수는 단계별로 집계되며 stats()로 확인할 수 있습니다.
+
+    :raises Exception: 템플릿의 자리표시자에 해당하는 필드가 빠진 경우
+    """
+    spec = STAGES[stage]
+    template = load_template(spec.template)
+
+    values = {}
+    for name, value in fields.items():
+        if isinstance(value, (list, tuple)):
+            items = dedupe(value)
+            if spec.item_budget:
+                items = [truncate(item, spec.item_budget) for item in items]
+            values[name] = items
+        elif name in spec.compact:
+            values[name] = squeeze(str(value))
+        else:
+            values[name] = value
+
+    def render():
+        return template.render(**{
+            name: _format_list(value, spec.formats.get(name, "- {item}")) if isinstance(value, list) else value
+            for name, value in values.items()
+        })
+
+    prompt = render()
+    tokens = count_tokens(prompt)
+    original = tokens
+    for name in spec.compact:
+        while tokens > spec.budget:
+            overflow = tokens - spec.budget
+            value = values.get(name)
+            if isinstance(value, list) and len(value) > 1:
+                # 최소 한 항목은 남기고 넘친 만큼 뒤에서부터 뺍니다.
+                item_format = spec.formats.get(name, "- {item}")
+                while len(value) > 1 and overflow > 0:
+                    overflow -= count_tokens(item_format.format(idx=len(value), item=value[-1]))
+                    value.pop()
+            elif isinstance(value, str) and value:
+                values[name] = truncate(value, max(count_tokens(value) - overflow, 0))
+            else:
+                break  # 이 필드는 더 줄일 수 없습니다.
+            prompt = render()
+            tokens = count_tokens(prompt)
+
+    _record(stage, tokens, compacted=tokens < original, over_budget=tokens > spec.budget)
+    if tokens > spec.budget:
+        print(f"⚠️ '{stage}' 프롬프트가 예산을 넘었습니다. ({tokens}/{spec.budget} 토큰)", file=sys.stderr)
+    elif LOG_TOKENS:
+        note = f", {original}→{tokens} 압축" if tokens < original else ""
+        print(f"[prompt] {stage}: {tokens}/{spec.budget} 토큰{note}", file=sys.stderr)
+    return prompt
+
+def _record(stage: str, tokens: int, compacted: bool, over_budget: bool) -> None:
+    with _lock:
+        entry = _stats.setdefault(stage, {"calls": 0, "tokens": 0, "max_tokens": 0, "compacted": 0, "over_budget": 0})
+        entry["calls"] += 1
+        entry["tokens"] += tokens
+        entry["max_tokens"] = max(entry["max_tokens"], tokens)
+        entry["compacted"] += int(compacted)
+        entry["over_budget"] += int(over_budget)
+
+def stats() -> dict:
+    """단계별 프롬프트 호출 수, 토큰 합계/최대값, 압축·예산 초과 횟수"""
+    with _lock:
+        return {stage: dict(entry) for stage, entry in _stats.items()}
+
+def reset_stats() -> None:
+    with _lock:
+        _stats.clear()
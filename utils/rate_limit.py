@@ -0,0 +1,345 @@
+import os
+import json
+import time
+import random
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 fcntl이 없는 환경에서는 프로세스 안에서만 공유
+    fcntl = None
+
+class CircuitOpenError(Exception):
+    """연속된 서버 오류로 차단기가 열려 있어 요청을 보내지 않았을 때 발생합니다."""
+
+class TokenBucket:
+    """
+    분당 요청 수(RPM)와 분당 토큰 수(TPM)를 제한하는 토큰 버킷
+
+    - reserve()는 요청 한 건의 몫을 미리 차감하고 기다려야 할 시간을 돌려줍니다.
+      잔량이 모자라면 음수까지 내려가므로 뒤에 온 요청일수록 더 오래 기다려 순서대로 흘러갑니다.
+    - state_path를 지정하면 상태를 파일에 두고 파일 잠금으로 갱신하므로, 배치 모드의 여러 워커 프로세스가
+      하나의 한도를 나눠 씁니다. 레이트 리밋 응답 이후의 일시 정지(pause)도 함께 공유됩니다.
+    - 한도가 없으면(RPM/TPM 모두 0) 파일 잠금을 잡지 않습니다. 일시 정지 시각은 별도 파일(.pause)에
+      통째로 바꿔 쓰므로 잠금 없이 읽고, 파일이 바뀌었을 때만 다시 읽습니다.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0, state_path: Optional[str] = None):
+        """
+        :param rpm: 분당 최대 요청 수 (0이면 제한 없음)
+        :param tpm: 분당 최대 토큰 수 (0이면 제한 없음)
+        :param state_path: 프로세스 간 공유 상태 파일 경로 (None이면 프로세스 안에서만 공유)
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.state_path = state_path if fcntl is not None else None
+        self._pause_path = f"{os.path.splitext(self.state_path)[0]}.pause" if self.state_path else None
+        self._lock = threading.Lock()
+        self._state = {}
+        self._resume_at = 0.0
+        self._pause_seen = None  # 마지막으로 읽은 일시 정지 파일의 (inode, 수정 시각)
+
+    @property
+    def limited(self) -> bool:
+        return bool(self.rpm or self.tpm)
+
+    @property
+    def blocking(self) -> bool:
+        """reserve()가 프로세스 간 파일 잠금을 기다릴 수 있는지 (이벤트 루프에서는 스레드로 넘겨 호출합니다)"""
+        return bool(self.state_path and self.limited)
+
+    @contextmanager
+    def _locked_state(self):
+        with self._lock:
+            if not self.state_path:
+                yield self._state
+                return
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            with open(self.state_path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        state = json.loads(f.read() or "{}")
+                    except ValueError:
+                        state = {}
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _take(state: dict, name: str, limit: int, cost: float, now: float) -> float:
+        """버킷에서 cost만큼 차감하고, 잔량이 음수면 다시 0이 될 때까지의 시간을 반환합니다."""
+        if not limit:
+            return 0.0
+        refill = limit / 60.0
+        bucket = state.setdefault(name, {"level": float(limit), "at": now})
+        level = min(float(limit), bucket["level"] + (now - bucket["at"]) * refill)
+        level -= min(cost, limit)
+        bucket["level"], bucket["at"] = level, now
+        return -level / refill if level < 0 else 0.0
+
+    def _read_resume_at(self) -> float:
+        """일시 정지가 끝나는 시각. 잠금 없이 읽으며, 공유 파일이 바뀌지 않았으면 읽어 둔 값을 씁니다."""
+        if not self._pause_path:
+            return self._resume_at
+        try:
+            stat = os.stat(self._pause_path)
+        except OSError:
+            return self._resume_at
+        seen = (stat.st_ino, stat.st_mtime_ns)
+        if seen != self._pause_seen:
+            try:
+                with open(self._pause_path) as f:
+                    self._resume_at = float(json.load(f)["resume_at"])
+                self._pause_seen = seen
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        return self._resume_at
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        요청 1건과 tokens개의 토큰을 예약합니다.
+
+        :return: 요청을 보내기 전에 기다려야 할 시간 (초)
+        """
+        now = time.time()
+        wait = max(self._read_resume_at() - now, 0.0)
+        if not self.limited:
+            return wait
+        with self._locked_state() as state:
+            wait = max(wait, self._take(state, "rpm", self.rpm, 1, now))
+            wait = max(wait, self._take(state, "tpm", self.tpm, tokens, now))
+        return wait
+
+    def refund(self, tokens: int) -> None:
+        """예약한 토큰보다 실제 사용량이 적으면 차이를 돌려줍니다."""
+        if not self.tpm or tokens <= 0:
+            return
+        with self._locked_state() as state:
+            bucket = state.get("tpm")
+            if bucket:
+                bucket["level"] = min(float(self.tpm), bucket["level"] + tokens)
+
+    def pause(self, seconds: float) -> None:
+        """레이트 리밋 응답을 받았을 때 모든 요청을 seconds초 동안 멈춥니다."""
+        resume_at = time.time() + seconds
+        if not self._pause_path:
+            with self._lock:
+                self._resume_at = max(self._resume_at, resume_at)
+            return
+        # 갱신 순서만 파일 잠금으로 맞추고, 읽는 쪽이 잠금 없이 읽도록 새 파일로 바꿔 씁니다.
+        with self._locked_state():
+            self._pause_seen = None
+            resume_at = max(self._read_resume_at(), resume_at)
+            temp_path = f"{self._pause_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump({"resume_at": resume_at}, f)
+            os.replace(temp_path, self._pause_path)
+            self._resume_at = resume_at
+
+    def paused_for(self) -> float:
+        return max(self._read_resume_at() - time.time(), 0.0)
+
+class CircuitBreaker:
+    """
+    서버 오류가 연속으로 threshold번 나면 reset_timeout초 동안 요청을 바로 실패시키는 차단기
+
+    시간이 지나면 요청 하나만 시험 삼아 통과시키고(half-open), 성공하면 닫고 실패하면 다시 엽니다.
+    시험 요청이 성공도 실패도 아닌 채 끝나면(429, 재시도하지 않는 4xx, 취소) release_probe()로
+    다음 요청이 다시 시험할 수 있게 합니다.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probe = 0    # 진행 중인 시험 요청 번호 (0이면 없음)
+        self._probes = 0
+        self.opens = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_request(self) -> Optional[int]:
+        """
+        :return: 이 요청이 시험 요청이면 그 번호 (release_probe에 넘깁니다), 아니면 None
+        :raises CircuitOpenError: 차단기가 열려 있거나, 다른 요청이 이미 시험 중인 경우
+        """
+        if not self.threshold:
+            return None
+        with self._lock:
+            if self._opened_at is None:
+                return None
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._probe:
+                raise CircuitOpenError(
+                    f"API 서버 오류가 계속되어 요청을 잠시 중단했습니다. ({max(remaining, 0):.0f}초 후 재시도)"
+                )
+            self._probes += 1
+            self._probe = self._probes
+            return self._probe
+
+    def release_probe(self, probe: int) -> None:
+        """시험 요청이 성공/실패 기록 없이 끝났으면 시험 자격을 돌려놓습니다. (이미 판정된 경우는 무시)"""
+        with self._lock:
+            if self._probe == probe:
+                self._probe = 0
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probe or (self.threshold and self._failures >= self.threshold):
+                if self._opened_at is None or self._probe:
+                    self.opens += 1
+                self._opened_at = time.monotonic()
+                self._probe = 0
+
+class RetryController:
+    """
+    LLM 요청의 재시도·속도 제한·차단을 한곳에서 결정하는 컨트롤러
+
+    - 재시도 대기 시간은 지수 백오프에 전체 지터(full jitter)를 적용해, 여러 워커가 같은 순간에
+      다시 몰려드는 재시도 폭주를 막습니다.
+    - 429 응답의 Retry-After 값은 그대로 지키고, 그동안 다른 요청(다른 프로세스 포함)도 함께 멈춥니다.
+    - 서버 오류(5xx)와 연결 오류가 이어지면 차단기가 열려 새 요청을 바로 실패시킵니다.
+    - 요청·재시도·대기 시간 등의 지표를 metrics()로 확인할 수 있습니다.
+    """
+
+    def __init__(self, bucket: TokenBucket, breaker: CircuitBreaker, base_delay: float = 1.0,
+                 max_delay: float = 30.0):
+        self.bucket = bucket
+        self.breaker = breaker
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self.reset_metrics()
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._metrics[name] += value
+
+    @contextmanager
+    def attempt(self):
+        """
+        요청 한 번(재시도 포함 각 시도)을 감쌉니다. 들어갈 때 차단기를 확인하고, 시험 요청이었는데
+        record_success/record_failure 없이 블록을 벗어나면(429, 재시도하지 않는 4xx, 취소·시간 초과)
+        시험 자격을 돌려놓아 차단기가 half-open에 갇히지 않게 합니다.
+
+        :raises CircuitOpenError: 차단기가 열려 있는 경우
+        """
+        try:
+            probe = self.breaker.before_request()
+        except CircuitOpenError:
+            self._count("rejected")
+            raise
+        self._count("requests")
+        try:
+            yield
+        finally:
+            if probe is not None:
+                self.breaker.release_probe(probe)
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        속도 제한 몫을 예약합니다. attempt() 블록 안에서 호출합니다.
+
+        :return: 요청 전에 기다려야 할 시간 (초)
+        """
+        wait = self.bucket.reserve(tokens)
+        if wait > 0:
+            self._count("throttled")
+            self._count("throttle_seconds", wait)
+        return wait
+
+    def record_success(self, reserved_tokens: int = 0, used_tokens: int = None) -> None:
+        self.breaker.record_success()
+        self._count("successes")
+        if used_tokens is not None:
+            self.bucket.refund(reserved_tokens - used_tokens)
+
+    def backoff(self, attempt: int) -> float:
+        """attempt번째 재시도의 대기 시간: 0 ~ min(max_delay, base_delay * 2^attempt) 사이의 임의 값"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def record_failure(self, kind: str, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        재시도할 수 있는 실패를 기록하고 다음 시도까지 기다릴 시간을 반환합니다.
+
+        :param kind: "rate_limit"(429), "server"(5xx), "connection"(연결 오류·시간 초과)
+        :param attempt: 지금까지 실패한 횟수 (1부터)
+        :param retry_after: 응답의 Retry-After 값 (초)
+        """
+        self._count(kind)
+        if kind == "rate_limit":
+            # 레이트 리밋은 서버 장애가 아니므로 차단기에는 세지 않습니다.
+            delay = retry_after if retry_after is not None else self.backoff(attempt)
+            delay += random.uniform(0, self.base_delay)
+            self.bucket.pause(delay)
+        else:
+            self.breaker.record_failure()
+            delay = max(retry_after or 0.0, self.backoff(attempt))
+        self._count("retry_seconds", delay)
+        return delay
+
+    def record_retry(self) -> None:
+        self._count("retries")
+
+    def metrics(self) -> dict:
+        """요청·성공·재시도 수, 실패 종류별 횟수, 속도 제한·재시도 대기 시간, 차단기 상태"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["breaker_opens"] = self.breaker.opens
+        metrics["breaker_state"] = self.breaker.state
+        return metrics
+
+    def reset_metrics(self) -> None:
+        with self._lock:
+            self._metrics = {
+                "requests": 0, "successes": 0, "retries": 0, "rate_limit": 0, "server": 0, "connection": 0,
+                "rejected": 0, "throttled": 0, "throttle_seconds": 0.0, "retry_seconds": 0.0
+            }
+
+def from_env(state_dir: str = ".cache") -> RetryController:
+    """
+    환경 변수로 설정한 컨트롤러를 만듭니다.
+
+    - LLM_RPM / LLM_TPM: 분당 요청 수 / 토큰 수 한도 (기본 0, 제한 없음)
+    - LLM_RETRY_BASE_DELAY / LLM_RETRY_MAX_DELAY: 백오프 기본·최대 대기 시간 (기본 1초 / 30초)
+    - LLM_BREAKER_THRESHOLD / LLM_BREAKER_RESET: 차단기를 여는 연속 실패 수 / 열린 시간 (기본 5회 / 30초, 0이면 끔)
+    """
+    bucket = TokenBucket(
+        rpm=int(os.getenv("LLM_RPM", "0")),
+        tpm=int(os.getenv("LLM_TPM", "0")),
+        state_path=os.path.join(state_dir, "ratelimit", "bucket.json")
+    )
+    breaker = CircuitBreaker(
+        threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+        reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30"))
+    )
+    return RetryController(
+        bucket, breaker,
+        base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "1")),
+        max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+    )
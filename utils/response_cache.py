@@ -0,0 +1,135 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+import unicodedata
+from typing import Optional
+
+# 유사 프롬프트 비교에 쓰는 MinHash 순열 수와 글자 n-gram 크기
+MINHASH_PERMUTATIONS = 64
+SHINGLE_SIZE = 5
+# 단계·모델·파라미터 조합마다 기억해 둘 최근 프롬프트 수
+INDEX_LIMIT = 200
+_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.sha256(f"a{i}".encode()).digest()[:8], "big") % _PRIME | 1,
+     int.from_bytes(hashlib.sha256(f"b{i}".encode()).digest()[:8], "big") % _PRIME)
+    for i in range(MINHASH_PERMUTATIONS)
+]
+
+def normalize_prompt(prompt: str) -> str:
+    """전각/반각, 대소문자, 공백 차이를 없앤 프롬프트"""
+    return " ".join(unicodedata.normalize("NFKC", prompt).casefold().split())
+
+def minhash(text: str) -> list:
+    """글자 n-gram 집합의 MinHash 서명. 두 서명에서 같은 자리의 비율이 자카드 유사도의 추정치입니다."""
+    if len(text) <= SHINGLE_SIZE:
+        hashes = {zlib.crc32(text.encode("utf-8"))}
+    else:
+        hashes = {zlib.crc32(text[i:i + SHINGLE_SIZE].encode("utf-8")) for i in range(len(text) - SHINGLE_SIZE + 1)}
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def similarity(left: list, right: list) -> float:
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+class ResponseCache:
+    """
+    LLM 응답 캐시
+
+    - 키는 모델, 생성 파라미터, 정규화한 프롬프트의 해시로 만들므로 공백·대소문자 차이는 같은 요청으로 봅니다.
+    - near_match_stages에 있는 단계(결과가 입력에 거의 결정되는 단계)는 정확히 같은 프롬프트가 없을 때
+      MinHash로 추정한 유사도가 threshold 이상인 이전 프롬프트의 응답을 재사용합니다.
+    - 적중/근사 적중/실패 횟수를 프롬프트 템플릿(단계)별로 집계합니다.
+    """
+
+    def __init__(self, store, enabled: bool = True, near_match_stages: tuple = (), threshold: float = 0.9):
+        """
+        :param store: get/set을 가진 저장소 (예: utils.cache.Cache)
+        :param near_match_stages: 근사 조회를 허용할 단계 이름들
+        :param threshold: 근사 조회로 인정할 최소 유사도 (0~1)
+        """
+        self.store = store
+        self.enabled = enabled
+        self.near_match_stages = set(near_match_stages)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _params_key(self, stage: Optional[str], model: str, params: dict) -> str:
+        raw = json.dumps({"stage": stage, "model": model, "params": params}, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def _key(self, params_key: str, normalized: str) -> str:
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"llm:{params_key}:{digest}"
+
+    def _count(self, stage: Optional[str], field: str) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(stage or "(none)", {"hits": 0, "near_hits": 0, "misses": 0})
+            entry[field] += 1
+
+    def get(self, prompt: str, model: str, params: dict, stage: Optional[str] = None) -> Optional[str]:
+        """캐시된 응답을 반환합니다. 없으면 None."""
+        if not self.enabled:
+            return None
+        normalized = normalize_prompt(prompt)
+        params_key = self._params_key(stage, model, params)
+        response = self.store.get(self._key(params_key, normalized))
+        if response is not None:
+            self._count(stage, "hits")
+            return response
+
+        if stage in self.near_match_stages:
+            signature = minhash(normalized)
+            best_key, best_score = None, self.threshold
+            for key, other in self.store.get(f"llm-index:{params_key}") or []:
+                score = similarity(signature, other)
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is not None:
+                response = self.store.get(best_key)
+                if response is not None:
+                    self._count(stage, "near_hits")
+                    return response
+
+        self._count(stage, "misses")
+        return None
+
+    def set(self, prompt: str, model: str, params: dict, response: str, stage: Optional[str] = None) -> None:
+        if not self.enabled or not response:
+            return
+        normalized = normalize_prompt(prompt)
+        params_key = self._params_key(stage, model, params)
+        key = self._key(params_key, normalized)
+        self.store.set(key, response)
+
+        if stage in self.near_match_stages:
+            # 근사 조회용 색인: 최근 INDEX_LIMIT개 프롬프트의 MinHash 서명
+            with self._lock:
+                index_key = f"llm-index:{params_key}"
+                index = [entry for entry in self.store.get(index_key) or [] if entry[0] != key]
+                index.append([key, minhash(normalized)])
+                self.store.set(index_key, index[-INDEX_LIMIT:])
+
+    def stats(self) -> dict:
+        """단계(프롬프트 템플릿)별 적중/근사 적중/실패 횟수"""
+        with self._lock:
+            return {stage: dict(entry) for stage, entry in self._stats.items()}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+def from_env(store) -> ResponseCache:
+    """
+    환경 변수로 설정한 응답 캐시를 만듭니다.
+
+    - LLM_RESPONSE_CACHE=0: 응답 캐시 끄기
+    - LLM_NEAR_MATCH_STAGES: 근사 조회를 허용할 단계 (쉼표 구분, 예: book_info,review_keywords)
+    - LLM_NEAR_MATCH_THRESHOLD: 근사 조회 최소 유사도 (기본 0.9)
+    """
+    enabled = os.getenv("LLM_RESPONSE_CACHE", "1").lower() not in ("0", "false", "no")
+    stages = tuple(s.strip() for s in os.getenv("LLM_NEAR_MATCH_STAGES", "").split(",") if s.strip())
+    threshold = float(os.getenv("LLM_NEAR_MATCH_THRESHOLD", "0.9"))
+    return ResponseCache(store, enabled=enabled, near_match_stages=stages, threshold=threshold)
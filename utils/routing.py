@@ -0,0 +1,96 @@
+import os
+import threading
+from typing import Optional
+
+# 짧은 목록만 만드는 단계에 쓰는 빠른 모델과, 본문(챕터)을 쓰는 큰 모델
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", "gpt-4o")
+DEFAULT_MODEL = os.getenv("LLM_DEFAULT_MODEL", "gpt-3.5-turbo")
+
+class Route:
+    """
+    단계별 모델 호출 설정
+
+    :param model: 먼저 시도할 모델
+    :param max_tokens: 응답 최대 토큰 수
+    :param temperature: 샘플링 온도
+    :param fallbacks: model 호출이 (재시도 후에도) 실패하면 차례로 시도할 모델들
+    """
+
+    def __init__(self, model: str, max_tokens: int, temperature: float, fallbacks: list = ()):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.fallbacks = list(fallbacks)
+
+    @property
+    def chain(self) -> list:
+        """시도할 모델 순서 (중복 제외)"""
+        return list(dict.fromkeys([self.model] + self.fallbacks))
+
+# 키는 utils.prompt_builder.STAGES의 단계 이름과 같습니다.
+# 목록형 단계는 5~7개 항목의 JSON이면 충분하므로 max_tokens를 작게 잡아 응답 시간을 줄입니다.
+ROUTES = {
+    "book_info": Route(FAST_MODEL, 600, 0.3, fallbacks=[DEFAULT_MODEL]),
+    "review_keywords": Route(FAST_MODEL, 300, 0.3, fallbacks=[DEFAULT_MODEL]),
+    "review_chunk": Route(FAST_MODEL, 300, 0.3, fallbacks=[DEFAULT_MODEL]),
+    "review_merge": Route(FAST_MODEL, 300, 0.3, fallbacks=[DEFAULT_MODEL]),
+    "interview_questions": Route(FAST_MODEL, 400, 0.7, fallbacks=[DEFAULT_MODEL]),
+    "subtopics": Route(FAST_MODEL, 300, 0.7, fallbacks=[DEFAULT_MODEL]),
+    "guided_questions": Route(FAST_MODEL, 400, 0.7, fallbacks=[DEFAULT_MODEL]),
+    "write_chapter": Route(LARGE_MODEL, 1500, 0.7, fallbacks=[DEFAULT_MODEL]),
+    # utils.structured의 형식 복구 요청
+    "repair": Route(FAST_MODEL, 500, 0.0, fallbacks=[DEFAULT_MODEL]),
+}
+DEFAULT_ROUTE = Route(DEFAULT_MODEL, 1000, 0.7)
+
+# LLM_MODEL_<STAGE>, LLM_MAX_TOKENS_<STAGE> 환경 변수로 단계별 설정을 바꿀 수 있습니다.
+# (예: LLM_MODEL_WRITE_CHAPTER=gpt-4o-mini, LLM_MAX_TOKENS_SUBTOPICS=200)
+for _name, _route in ROUTES.items():
+    _route.model = os.getenv(f"LLM_MODEL_{_name.upper()}", _route.model)
+    _route.max_tokens = int(os.getenv(f"LLM_MAX_TOKENS_{_name.upper()}", _route.max_tokens))
+
+_stats = {}
+_lock = threading.Lock()
+
+def resolve(stage: Optional[str], model: str = None, temperature: float = None, max_tokens: int = None) -> Route:
+    """
+    단계의 Route에 호출 시 직접 지정한 값을 덮어쓴 Route를 반환합니다.
+    모델을 직접 지정하면 그 모델만 시도합니다.
+    """
+    route = ROUTES.get(stage, DEFAULT_ROUTE)
+    return Route(
+        model or route.model,
+        max_tokens if max_tokens is not None else route.max_tokens,
+        temperature if temperature is not None else route.temperature,
+        fallbacks=() if model else route.fallbacks
+    )
+
+def _entry(stage: Optional[str], model: str) -> dict:
+    return _stats.setdefault(f"{stage or '(none)'}/{model}", {
+        "calls": 0, "failures": 0, "latency": 0.0, "max_latency": 0.0,
+        "prompt_tokens": 0, "completion_tokens": 0
+    })
+
+def record(stage: Optional[str], model: str, latency: float, prompt_tokens: int, completion_tokens: int) -> None:
+    """성공한 호출 한 건의 소요 시간(초)과 토큰 사용량을 경로(단계/모델)별로 기록합니다."""
+    with _lock:
+        entry = _entry(stage, model)
+        entry["calls"] += 1
+        entry["latency"] += latency
+        entry["max_latency"] = max(entry["max_latency"], latency)
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+
+def record_failure(stage: Optional[str], model: str) -> None:
+    with _lock:
+        _entry(stage, model)["failures"] += 1
+
+def stats() -> dict:
+    """경로(단계/모델)별 호출·실패 수, 소요 시간 합계/최대값, 입력·출력 토큰 합계"""
+    with _lock:
+        return {key: dict(entry) for key, entry in _stats.items()}
+
+def reset_stats() -> None:
+    with _lock:
+        _stats.clear()
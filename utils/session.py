@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import hashlib
+import secrets
+import threading
+from typing import Any
+
+SESSION_DIR = os.getenv("BOOK_REVIEW_SESSION_DIR", ".sessions")
+
+def _digest(inputs: Any) -> str:
+    raw = json.dumps(inputs, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+class Session:
+    """
+    실행 한 번의 단계별 결과를 기록하는 저널
+
+    - 단계가 끝날 때마다 한 줄짜리 JSON 레코드를 세션 파일(.sessions/<id>.jsonl)에 덧붙이고 바로 디스크에 씁니다.
+    - 레코드에는 단계 이름, 키(챕터 소제목 등), 입력의 해시, 출력이 들어갑니다.
+    - 같은 단계·키가 여러 번 기록되면 마지막 레코드가 유효합니다.
+    - 다시 열면(resume) 기록된 출력을 돌려주므로 끝난 단계는 건너뛰고 남은 단계만 실행할 수 있습니다.
+      입력 해시가 다르면 그 기록은 쓰지 않습니다.
+    """
+
+    def __init__(self, session_id: str, directory: str = SESSION_DIR):
+        self.id = session_id
+        self.path = os.path.join(directory, f"{session_id}.jsonl")
+        self._records = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            self._load()
+
+    @classmethod
+    def create(cls, directory: str = SESSION_DIR, **meta) -> "Session":
+        """새 세션을 만들고 meta(책 제목·저자 등)를 'session' 단계로 기록합니다."""
+        session_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+        session = cls(session_id, directory)
+        session.record("session", meta)
+        return session
+
+    @classmethod
+    def open(cls, session_id: str, directory: str = SESSION_DIR) -> "Session":
+        """
+        기존 세션을 엽니다. session_id가 'latest'면 가장 최근 세션을 엽니다.
+
+        :raises Exception: 세션 파일이 없는 경우
+        """
+        if session_id == "latest":
+            sessions = list_sessions(directory)
+            if not sessions:
+                raise Exception("이어서 진행할 세션이 없습니다.")
+            session_id = sessions[-1]
+        if not os.path.exists(os.path.join(directory, f"{session_id}.jsonl")):
+            raise Exception(f"세션을 찾을 수 없습니다: {session_id}")
+        return cls(session_id, directory)
+
+    def _load(self) -> None:
+        """
+        세션 파일을 읽습니다. 기록 도중 중단되어 줄바꿈 없이 잘린 마지막 줄은 건너뛰고 파일에서도 잘라 내,
+        다음 레코드가 그 뒤에 붙어 함께 깨지지 않게 합니다.
+        """
+        good = 0  # 마지막으로 온전히 기록된 줄이 끝나는 위치
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                good += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._records[(record["stage"], record.get("key"))] = record
+        if good < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    def record(self, stage: str, output: Any, key: str = None, inputs: Any = None) -> None:
+        """단계 결과를 세션 파일에 덧붙입니다."""
+        record = {"stage": stage, "key": key, "at": round(time.time(), 3), "output": output}
+        if inputs is not None:
+            record["inputs"] = _digest(inputs)
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._records[(stage, key)] = record
+
+    def get(self, stage: str, key: str = None, inputs: Any = None, default: Any = None) -> Any:
+        """
+        기록된 출력을 반환합니다. 기록이 없거나, inputs를 주었는데 기록 당시의 입력과 다르면 default.
+        """
+        with self._lock:
+            record = self._records.get((stage, key))
+        if record is None:
+            return default
+        if inputs is not None and record.get("inputs") != _digest(inputs):
+            return default
+        return record["output"]
+
+    def has(self, stage: str, key: str = None) -> bool:
+        with self._lock:
+            return (stage, key) in self._records
+
+def list_sessions(directory: str = SESSION_DIR) -> list:
+    """세션 ID 목록 (오래된 것부터)"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len(".jsonl")] for name in os.listdir(directory) if name.endswith(".jsonl"))
@@ -0,0 +1,171 @@
+import os
+import time
+import hashlib
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+from utils import tasks
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 fcntl이 없는 환경에서는 리스 파일 방식 사용
+    fcntl = None
+
+class SingleFlight:
+    """
+    같은 키에 대한 동시 호출을 하나로 합치는 클래스
+
+    - 같은 프로세스 안에서는 먼저 들어온 호출(리더)만 실행하고, 나머지는 리더의 Future를 기다립니다.
+    - lock_dir를 지정하면 잠금 파일로 다른 프로세스와도 실행을 직렬화하며,
+      잠금을 기다렸던 프로세스는 recheck 함수로 결과가 이미 저장되었는지 먼저 확인합니다.
+    - 리더를 기다리거나 잠금을 기다리는 동안에도 현재 취소 토큰(utils.tasks)을 확인하므로,
+      Ctrl+C나 제한 시간 초과 시 기다리던 호출자만 빠져나오고 리더의 실행은 그대로 둡니다.
+    """
+
+    def __init__(self, lock_dir: Optional[str] = None, lease_time: float = 600, stripes: int = 4096,
+                 poll_interval: float = 0.05):
+        """
+        :param lock_dir: 프로세스 간 잠금 파일을 둘 디렉토리 (None이면 프로세스 내에서만 합침)
+        :param lease_time: fcntl이 없을 때 사용하는 리스 파일의 최대 유효 시간 (초)
+        :param stripes: 잠금 파일 개수 상한 (키를 해시해 나눠 씀)
+        :param poll_interval: 다른 프로세스의 잠금을 기다릴 때 다시 시도하는 간격 (초)
+        """
+        self.lock_dir = lock_dir
+        self.lease_time = lease_time
+        self.stripes = stripes
+        self.poll_interval = poll_interval
+        self._calls = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.executed = 0             # 실제로 함수를 실행한 횟수
+        self.coalesced = 0            # 같은 프로세스의 진행 중 호출에 합류한 횟수
+        self.coalesced_external = 0   # 다른 프로세스가 저장한 결과를 재사용한 횟수
+        self._lock_dir_ready = False  # 잠금 디렉토리는 처음 잠글 때 만듭니다.
+
+    def do(self, key: str, func: Callable[[], Any], recheck: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        key에 대해 func를 한 번만 실행하고 그 결과를 모든 동시 호출자에게 돌려줍니다.
+
+        :param key: 중복 제거 기준 키
+        :param func: 실제 작업 함수
+        :param recheck: 다른 프로세스를 기다린 뒤 호출할 조회 함수 (None이 아니면 그 값을 사용)
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return self._follow(future)
+
+        try:
+            with self._process_lock(key) as waited:
+                result = recheck() if waited and recheck else None
+                if result is not None:
+                    with self._lock:
+                        self.coalesced_external += 1
+                else:
+                    with self._lock:
+                        self.executed += 1
+                    result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    @staticmethod
+    def _follow(future: Future) -> Any:
+        """
+        리더의 Future를 기다립니다.
+        tasks.wait_future는 취소 시 기다리던 Future를 취소하므로, 리더의 Future 대신 결과를 옮겨 받는 복사본을 기다립니다.
+        """
+        mine = Future()
+
+        def relay(done: Future) -> None:
+            if not mine.set_running_or_notify_cancel():
+                return  # 이 호출자는 이미 취소되어 빠져나갔습니다.
+            error = done.exception()
+            if error is not None:
+                mine.set_exception(error)
+            else:
+                mine.set_result(done.result())
+
+        future.add_done_callback(relay)
+        return tasks.wait_future(mine)
+
+    @contextmanager
+    def _process_lock(self, key: str):
+        """
+        프로세스 간 잠금을 잡고, 다른 프로세스를 기다렸는지 여부를 넘겨줍니다.
+        잠금은 이 키의 확인-실행 구간 동안만 잡으며, 기다리는 동안에는 취소 토큰을 확인하며 폴링합니다.
+        """
+        if not self.lock_dir:
+            yield False
+            return
+
+        if not self._lock_dir_ready:
+            os.makedirs(self.lock_dir, exist_ok=True)
+            self._lock_dir_ready = True
+        stripe = int(hashlib.sha256(key.encode('utf-8')).hexdigest(), 16) % self.stripes
+        path = os.path.join(self.lock_dir, f"{stripe:04x}.lock")
+
+        if fcntl is not None:
+            with open(path, "a+") as f:
+                waited = False
+                while True:
+                    try:
+                        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        waited = True
+                        tasks.check()
+                        time.sleep(self.poll_interval)
+                try:
+                    yield waited
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        else:
+            waited = self._acquire_lease(path)
+            try:
+                yield waited
+            finally:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _acquire_lease(self, path: str) -> bool:
+        """리스 파일을 배타적으로 생성합니다. 오래된 리스는 죽은 프로세스의 것으로 보고 제거합니다."""
+        waited = False
+        while True:
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return waited
+            except FileExistsError:
+                waited = True
+                try:
+                    if time.time() - os.path.getmtime(path) > self.lease_time:
+                        os.remove(path)
+                        continue
+                except OSError:
+                    continue
+                tasks.check()
+                time.sleep(self.poll_interval)
+
+    def stats(self) -> dict:
+        """실행 횟수와 합쳐져서 생략된 중복 호출 수를 반환합니다."""
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "coalesced_external": self.coalesced_external,
+                "in_flight": len(self._calls)
+            }
@@ -0,0 +1,122 @@
+import re
+import json
+import asyncio
+from utils.prompt_builder import dedupe
+import llm_client
+
+# JSON 모드: 모델이 반드시 JSON 객체 하나만 출력합니다. (프롬프트에 'JSON'이라는 단어가 있어야 합니다)
+JSON_MODE = {"type": "json_object"}
+
+# 번호(1. 1) ①), 불릿(- * •), 따옴표 등 항목 앞뒤에 붙는 기호
+_ITEM_PREFIX = re.compile(r"^\s*(?:\d+\s*[.)]\s*|[①-⑳]\s*|[-*•·]\s+)")
+_LIST_LINE = re.compile(r"^\s*(?:\d+\s*[.)]|[①-⑳]|[-*•·])\s+\S")
+_CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+REPAIR_PROMPT = """아래 응답은 항목 목록이어야 하지만 형식이 잘못되었습니다.
+응답에 있는 항목만 그대로 뽑아, 다른 설명 없이 {{"items": ["항목1", "항목2"]}} 형태의 JSON 객체 하나로 출력해주세요.
+항목의 내용을 바꾸거나 새로 만들지 마세요.
+
+응답:
+{response}"""
+
+class StructuredOutputError(ValueError):
+    """LLM 응답에서 요구한 형식의 결과를 얻지 못했을 때 발생합니다."""
+
+def _clean(item) -> str:
+    if isinstance(item, dict):
+        # {"question": "..."}처럼 객체로 감싼 항목은 첫 문자열 값을 씁니다.
+        item = next((value for value in item.values() if isinstance(value, str)), "")
+    text = _ITEM_PREFIX.sub("", str(item)).strip()
+    return text.strip("\"'“”‘’").strip()
+
+def _find_json(text: str):
+    """응답 전체 또는 코드 블록, 앞뒤 설명 사이에 있는 첫 JSON 값을 찾습니다."""
+    fenced = _CODE_FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"[\[{]", text):
+        try:
+            return decoder.raw_decode(text, match.start())[0]
+        except ValueError:
+            continue
+    return None
+
+def parse_items(text: str) -> list:
+    """
+    LLM 응답에서 문자열 항목 리스트를 뽑습니다.
+
+    - {"items": [...]} 또는 JSON 배열을 우선 읽고, 코드 블록이나 앞뒤 설명이 붙어 있어도 찾아냅니다.
+    - JSON이 없으면 번호·불릿으로 시작하는 줄만 항목으로 보므로 '다음은 질문입니다:' 같은 머리말은 빠집니다.
+    - 항목 앞의 번호·기호·따옴표를 지우고, 빈 항목과 중복 항목을 제거합니다.
+
+    :raises StructuredOutputError: 항목을 하나도 찾지 못한 경우
+    """
+    if not text or not text.strip():
+        raise StructuredOutputError("빈 응답입니다.")
+
+    data = _find_json(text)
+    if isinstance(data, dict):
+        data = data.get("items", next((value for value in data.values() if isinstance(value, list)), None))
+    if isinstance(data, list):
+        items = dedupe(item for item in map(_clean, data) if item)
+    else:
+        items = dedupe(_clean(line) for line in text.splitlines() if _LIST_LINE.match(line))
+    if not items:
+        raise StructuredOutputError(f"응답에서 항목을 찾지 못했습니다: {text.strip()[:80]}")
+    return items
+
+def _loose_items(text: str) -> list:
+    """복구도 실패했을 때 쓰는 예전 방식의 줄 단위 분리"""
+    return dedupe(_clean(line) for line in (text or "").splitlines() if _clean(line))
+
+def _parse(text: str, min_items: int, max_items: int) -> list:
+    items = parse_items(text)
+    if len(items) < min_items:
+        raise StructuredOutputError(f"항목이 {len(items)}개뿐입니다. (최소 {min_items}개)")
+    return items[:max_items] if max_items else items
+
+def ask_list(prompt: str, stage: str = None, min_items: int = 1, max_items: int = None) -> list:
+    """
+    JSON 모드로 항목 리스트를 요청하고 검증된 리스트를 반환합니다.
+
+    응답 형식이 잘못되면 원래 프롬프트 전체를 다시 보내지 않고, 잘못된 응답만 담은 짧은 복구 요청을
+    한 번 보냅니다. 복구도 실패하면 응답을 줄 단위로 나눈 결과를 반환합니다.
+
+    :param stage: 프롬프트 템플릿(단계) 이름 (llm_client.ask 참고)
+    :param min_items: 유효한 응답으로 볼 최소 항목 수
+    :param max_items: 반환할 최대 항목 수 (None이면 제한 없음)
+    """
+    response = llm_client.ask(prompt, stage=stage, response_format=JSON_MODE)
+    try:
+        return _parse(response, min_items, max_items)
+    except StructuredOutputError:
+        pass
+    repaired = llm_client.ask(REPAIR_PROMPT.format(response=response), stage="repair", response_format=JSON_MODE)
+    try:
+        return _parse(repaired, min_items, max_items)
+    except StructuredOutputError:
+        return _loose_items(response)[:max_items]
+
+async def ask_list_async(prompt: str, stage: str = None, min_items: int = 1, max_items: int = None) -> list:
+    """ask_list()의 비동기 버전입니다."""
+    response = await llm_client.ask_async(prompt, stage=stage, response_format=JSON_MODE)
+    try:
+        return _parse(response, min_items, max_items)
+    except StructuredOutputError:
+        pass
+    repaired = await llm_client.ask_async(REPAIR_PROMPT.format(response=response), stage="repair",
+                                          response_format=JSON_MODE)
+    try:
+        return _parse(repaired, min_items, max_items)
+    except StructuredOutputError:
+        return _loose_items(response)[:max_items]
+
+async def ask_list_many(prompts: list, **kwargs) -> list:
+    """여러 프롬프트에 대해 ask_list_async를 동시에 실행하고, 입력 순서대로 결과를 반환합니다."""
+    return list(await asyncio.gather(*(ask_list_async(prompt, **kwargs) for prompt in prompts)))
@@ -0,0 +1,255 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+class _HTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # 클라이언트가 요청을 취소해 연결을 끊은 경우는 오류로 출력하지 않고 횟수만 셉니다.
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            self.disconnects += 1
+            return
+        super().handle_error(request, client_address)
+
+class _StubServer:
+    """백그라운드 스레드에서 도는 로컬 HTTP 서버의 공통 부분"""
+
+    def __init__(self, host: str, port: int):
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = _HTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._server.disconnects = 0
+        self._thread = None
+
+    @property
+    def root_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def disconnects(self) -> int:
+        """응답을 보내기 전에 클라이언트가 연결을 끊은 요청 수"""
+        return self._server.disconnects
+
+    def _make_handler(self):
+        raise NotImplementedError
+
+    def _enter_request(self):
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def _exit_request(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, data: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+class StubLLMServer(_StubServer):
+    """
+    OpenAI Chat Completions API 형식으로 응답하는 로컬 스텁 서버
+    실제 API 없이 llm_client의 동시성/재시도 동작을 확인할 때 사용합니다.
+
+    사용 예:
+        with StubLLMServer(latency=0.5) as server:
+            os.environ["OPENAI_BASE_URL"] = server.base_url
+            ...
+    """
+
+    def __init__(self, responder=None, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0,
+                 chunk_size: int = 8, chunk_latency: float = 0.0, failures: list = None):
+        """
+        :param responder: 프롬프트를 받아 응답 텍스트를 반환하는 함수 (기본값: 프롬프트 에코)
+        :param latency: 요청마다 인위적으로 추가할 지연 시간(초)
+        :param chunk_size: 스트리밍(stream=True) 응답에서 한 조각에 담을 글자 수
+        :param chunk_latency: 스트리밍 응답 조각 사이의 지연 시간(초)
+        :param failures: 앞에서부터 요청마다 하나씩 돌려줄 오류 응답 목록.
+                         상태 코드(예: 500) 또는 (상태 코드, Retry-After 초) 튜플이며, 다 쓰면 정상 응답합니다.
+        """
+        self.responder = responder or (lambda prompt: f"stub: {prompt[:50]}")
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_latency = chunk_latency
+        self.requests = []  # 받은 요청 본문 기록
+        self.failures = list(failures or [])
+        self.failed = 0     # 오류로 응답한 요청 수
+        super().__init__(host, port)
+
+    def respond(self, body: dict) -> str:
+        """
+        요청 본문에 대한 응답 텍스트를 만듭니다. 기본은 마지막 메시지를 responder에 넘깁니다.
+        모델·파라미터까지 봐야 하는 서버(벤치마크의 기록/재생 서버 등)는 이 메서드를 재정의합니다.
+        """
+        return self.responder(body.get("messages", [{}])[-1].get("content", ""))
+
+    def fail_next(self, *failures) -> None:
+        """다음 요청들에 돌려줄 오류 응답을 추가합니다. (failures 인자와 같은 형식)"""
+        with self._lock:
+            self.failures.extend(failures)
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.root_url}/v1"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(_Handler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.requests.append(body)
+                    failure = stub.failures.pop(0) if stub.failures else None
+                if failure is not None:
+                    self._fail(failure)
+                    return
+                stub._enter_request()
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    prompt = body.get("messages", [{}])[-1].get("content", "")
+                    content = stub.respond(body)
+                    if body.get("stream"):
+                        self._stream(body.get("model", "stub"), content)
+                    else:
+                        payload = _completion_payload(body.get("model", "stub"), content, prompt)
+                        self._send(200, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json")
+                finally:
+                    stub._exit_request()
+
+            def _fail(self, failure):
+                status, retry_after = failure if isinstance(failure, tuple) else (failure, None)
+                with stub._lock:
+                    stub.failed += 1
+                error = {"error": {"message": f"stub error {status}", "type": "stub_error", "code": status}}
+                headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+                self._send(status, json.dumps(error).encode("utf-8"), "application/json", headers)
+
+            def _stream(self, model: str, content: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                pieces = [content[i:i + stub.chunk_size] for i in range(0, len(content), stub.chunk_size)]
+                for piece in pieces + [None]:
+                    if stub.chunk_latency:
+                        time.sleep(stub.chunk_latency)
+                    chunk = _chunk_payload(model, piece)
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+class FixtureServer(_StubServer):
+    """
+    경로별로 미리 준비한 HTML을 돌려주는 로컬 픽스처 서버
+    크롤러를 실제 사이트 대신 이 서버로 향하게 해서(YES24_BASE_URL) 동작을 확인합니다.
+
+    routes는 경로 -> 응답 매핑이며, 응답은 문자열(HTML), (상태 코드, 본문) 튜플,
+    또는 쿼리 딕셔너리를 받아 그중 하나를 반환하는 함수입니다.
+    default를 지정하면 routes에 없는 요청은 요청 경로(쿼리 포함)를 default에 넘겨 응답을 얻습니다.
+    """
+
+    def __init__(self, routes: dict, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0,
+                 default=None):
+        self.routes = routes
+        self.default = default
+        self.latency = latency
+        self.paths = []  # 받은 요청 경로(쿼리 포함) 기록
+        super().__init__(host, port)
+
+    @property
+    def base_url(self) -> str:
+        return self.root_url
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(_Handler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                with stub._lock:
+                    stub.paths.append(self.path)
+                stub._enter_request()
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    route = stub.routes.get(parts.path)
+                    if callable(route):
+                        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                        route = route(query)
+                    elif route is None and stub.default is not None:
+                        route = stub.default(self.path)
+                    if route is None:
+                        status, body = 404, "not found"
+                    elif isinstance(route, tuple):
+                        status, body = route
+                    else:
+                        status, body = 200, route
+                    self._send(status, body.encode("utf-8"), "text/html; charset=utf-8")
+                finally:
+                    stub._exit_request()
+
+        return Handler
+
+def _completion_payload(model: str, content: str, prompt: str = "") -> dict:
+    # 토큰 수는 글자 수로 대신합니다. (한글은 대략 글자당 1토큰)
+    usage = {"prompt_tokens": len(prompt), "completion_tokens": len(content)}
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": usage
+    }
+
+def _chunk_payload(model: str, content) -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "delta": {"content": content} if content is not None else {},
+            "finish_reason": None if content is not None else "stop"
+        }]
+    }
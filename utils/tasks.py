@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import threading
+import contextvars
+from concurrent.futures import Future, CancelledError, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Optional
+from utils.progress import Progress
+
+class TaskCancelled(Exception):
+    """작업이 취소되었을 때 발생하는 예외"""
+
+class TaskTimeout(TaskCancelled):
+    """작업이 제한 시간을 넘겼을 때 발생하는 예외"""
+
+class CancelToken:
+    """
+    작업 취소/제한 시간을 아래 단계(LLM 호출, HTTP 요청)까지 전달하는 토큰
+
+    - cancel()을 호출하면 등록된 콜백(진행 중인 요청 Future 취소 등)이 바로 실행됩니다.
+    - timeout을 지정하면 마감 시각이 생기고, 하위 호출은 remaining()만큼만 기다립니다.
+    - parent가 있으면 부모가 취소될 때 함께 취소되고, 마감 시각도 부모보다 늦어지지 않습니다.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parent: "CancelToken" = None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.reason = None
+        self.deadline = time.monotonic() + timeout if timeout else None
+        if parent is not None:
+            if parent.deadline is not None:
+                self.deadline = min(self.deadline or parent.deadline, parent.deadline)
+            parent.on_cancel(lambda: self.cancel(parent.reason))
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """마감까지 남은 시간(초). 마감이 없으면 None"""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def cancel(self, reason: str = "작업이 취소되었습니다.") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback):
+        """
+        취소될 때 호출할 콜백을 등록합니다. 이미 취소되었으면 바로 호출합니다.
+
+        :return: 등록을 해제하는 함수
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self) -> None:
+        """취소되었거나 마감을 넘겼으면 예외를 발생시킵니다."""
+        if not self.cancelled and self.expired():
+            self.cancel("제한 시간을 초과했습니다.")
+        if self.cancelled:
+            if self.expired():
+                raise TaskTimeout(self.reason)
+            raise TaskCancelled(self.reason)
+
+_current_token = contextvars.ContextVar("cancel_token", default=None)
+
+def current_token() -> Optional[CancelToken]:
+    """현재 실행 흐름에 걸린 취소 토큰 (없으면 None)"""
+    return _current_token.get()
+
+def check() -> None:
+    """현재 토큰이 취소되었거나 마감을 넘겼으면 예외를 발생시킵니다."""
+    token = current_token()
+    if token is not None:
+        token.check()
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """현재 토큰의 남은 시간과 default 중 작은 값 (둘 다 없으면 None)"""
+    token = current_token()
+    left = token.remaining() if token is not None else None
+    if left is None:
+        return default
+    return left if default is None else min(left, default)
+
+@contextmanager
+def scope(timeout: Optional[float] = None, token: CancelToken = None):
+    """
+    with 블록 안의 호출들에 취소 토큰을 겁니다. 기존 토큰이 있으면 그 하위 토큰이 됩니다.
+    """
+    token = token or CancelToken(timeout=timeout, parent=current_token())
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+def bind(func):
+    """
+    현재 취소 토큰을 그대로 이어받아 실행되도록 함수를 감쌉니다.
+    스레드 풀에 넘기는 함수에 사용합니다.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return run
+
+def wait_future(future: Future, timeout: Optional[float] = None):
+    """
+    Future의 결과를 기다리되, 현재 토큰이 취소되거나 마감을 넘기면 Future를 취소하고 예외를 발생시킵니다.
+    """
+    token = current_token()
+    unregister = token.on_cancel(future.cancel) if token is not None else (lambda: None)
+    try:
+        return future.result(timeout=remaining(timeout))
+    except CancelledError:
+        check()
+        raise TaskCancelled("작업이 취소되었습니다.")
+    except FutureTimeoutError:
+        future.cancel()
+        if token is not None and token.expired():
+            token.cancel("제한 시간을 초과했습니다.")
+        raise TaskTimeout("제한 시간을 초과했습니다.")
+    finally:
+        unregister()
+
+# 진행 상태 표시 없이 실행할지 여부 (None이면 환경 변수와 터미널 여부로 판단)
+_headless = None
+# run_with_progress 작업의 기본 제한 시간 (초, None이면 제한 없음)
+_default_timeout = None
+
+def set_headless(headless: Optional[bool]) -> None:
+    """진행 상태 표시를 끄거나 켭니다. 배치 워커처럼 화면이 없는 실행에서 사용합니다."""
+    global _headless
+    _headless = headless
+
+def is_headless() -> bool:
+    if _headless is not None:
+        return _headless
+    if os.getenv("BOOK_REVIEW_HEADLESS", "").lower() in ("1", "true", "yes"):
+        return True
+    return not sys.stdout.isatty()
+
+def set_default_timeout(timeout: Optional[float]) -> None:
+    global _default_timeout
+    _default_timeout = timeout
+
+class Task:
+    """
+    별도 스레드에서 실행되는 작업
+
+    완료는 Future로 알리므로 기다리는 쪽은 폴링 없이 바로 깨어나고,
+    진행 표시는 done 이벤트를 구독합니다. cancel()은 작업의 토큰을 통해 진행 중인 요청까지 취소합니다.
+    """
+
+    def __init__(self, func, *args, desc: str = "", timeout: Optional[float] = None, **kwargs):
+        self.desc = desc
+        self.token = CancelToken(timeout=timeout, parent=current_token())
+        self.future = Future()
+        self.done = threading.Event()
+        self.future.add_done_callback(lambda _: self.done.set())
+        self._call = (func, args, kwargs)
+
+    def start(self) -> "Task":
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(self._run,), name="task", daemon=True)
+        thread.start()
+        return self
+
+    def _run(self):
+        func, args, kwargs = self._call
+        _current_token.set(self.token)
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            self.token.check()
+            self.future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            self.future.set_exception(e)
+
+    def subscribe(self, callback) -> None:
+        """작업이 끝나면 callback(task)를 호출합니다."""
+        self.future.add_done_callback(lambda _: callback(self))
+
+    def cancel(self, reason: str = "작업이 취소되었습니다.") -> None:
+        self.token.cancel(reason)
+
+    def result(self):
+        """작업 결과를 기다립니다. 마감을 넘기면 작업을 취소하고 TaskTimeout을 발생시킵니다."""
+        try:
+            return self.future.result(timeout=self.token.remaining())
+        except FutureTimeoutError:
+            self.token.cancel("제한 시간을 초과했습니다.")
+            raise TaskTimeout(f"'{self.desc}' 작업이 제한 시간을 초과했습니다.")
+
+def run_with_progress(func, desc: str, *args, timeout: Optional[float] = None, quiet: bool = False, **kwargs):
+    """
+    작업을 백그라운드에서 실행하고, 화면이 있으면 진행 상태를 표시하면서 결과를 기다립니다.
+
+    - 작업이 끝나는 즉시 결과를 반환합니다. (진행 표시는 완료 이벤트를 구독만 합니다.)
+    - Ctrl+C나 제한 시간 초과 시 작업을 취소하며, 진행 중인 LLM 요청도 함께 취소됩니다.
+    - 헤드리스 모드이거나 quiet=True이면 진행 표시 스레드를 만들지 않습니다.
+      (작업이 직접 터미널에 출력하는 동안 진행 표시와 섞이지 않게 할 때 씁니다.)
+    """
+    task = Task(func, *args, desc=desc, timeout=timeout or _default_timeout, **kwargs).start()
+    display = None
+    stop = threading.Event()
+    if not quiet and not is_headless():
+        task.subscribe(lambda _: stop.set())
+        display = threading.Thread(
+            target=Progress.follow, args=(desc, stop, lambda: task.future.done() and not task.future.exception()),
+            name="progress", daemon=True
+        )
+        display.start()
+    try:
+        return task.result()
+    except BaseException:
+        task.cancel()
+        raise
+    finally:
+        stop.set()
+        if display is not None:
+            display.join()
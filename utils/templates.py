@@ -0,0 +1,167 @@
+import os
+import sys
+import time
+import string
+import hashlib
+import threading
+from utils.io import load_text
+
+# 작업 디렉토리와 관계없이 저장소의 prompts/를 씁니다. (벤치마크처럼 다른 디렉토리에서 실행하는 경우)
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts")
+# 1이면 템플릿 파일이 바뀌었는지 확인해 다시 읽습니다. (오래 도는 배치 워커에서 프롬프트를 고칠 때)
+HOT_RELOAD = os.getenv("PROMPT_HOT_RELOAD", "") in ("1", "true", "yes")
+# 핫 리로드 시 파일 수정 시각을 확인하는 최소 간격 (초)
+RELOAD_INTERVAL = float(os.getenv("PROMPT_RELOAD_INTERVAL", "2"))
+
+class Template:
+    """
+    미리 분석해 둔 프롬프트 템플릿
+
+    - fields: 템플릿에 있는 {placeholder} 이름 집합
+    - version: 템플릿 내용의 해시. 캐시 키에 넣어 템플릿이 바뀌면 이전 결과를 쓰지 않게 합니다.
+    """
+
+    def __init__(self, name: str, path: str, text: str, mtime: float):
+        self.name = name
+        self.path = path
+        self.text = text
+        self.mtime = mtime
+        self.version = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise Exception(f"프롬프트 템플릿 형식이 잘못되었습니다: {path} ({e})")
+        self.fields = frozenset(field.split(".")[0].split("[")[0] for _, field, _, _ in parsed if field)
+        if any(field.isdigit() or not field for field in self.fields):
+            raise Exception(f"프롬프트 템플릿에 이름 없는 자리표시자가 있습니다: {path}")
+
+    def render(self, **values) -> str:
+        """
+        :raises Exception: 템플릿에 필요한 값이 빠진 경우 (str.format의 KeyError 대신 어떤 값이 빠졌는지 알려줍니다)
+        """
+        missing = self.fields - values.keys()
+        if missing:
+            raise Exception(f"'{self.name}' 프롬프트에 필요한 값이 없습니다: {', '.join(sorted(missing))}")
+        return self.text.format(**values)
+
+class TemplateRegistry:
+    """
+    prompts/ 디렉토리의 템플릿을 한 번에 읽어 메모리에 두는 저장소
+
+    - expect()로 템플릿마다 호출하는 쪽이 채우는 필드를 등록해 두면, 그 밖의 자리표시자가 있는 템플릿은 거부합니다.
+    - 실행 진입점은 시작할 때 load_all()을 호출하므로, 잘못되거나 빠진 템플릿은 크롤링·LLM 호출 전에 드러납니다.
+    - hot_reload면 RELOAD_INTERVAL마다 디렉토리를 확인해 바뀐 템플릿만 다시 읽고, 새 파일은 추가하고 지운 파일은 뺍니다.
+      다시 읽은 템플릿이 잘못되었거나 필요한 템플릿이 지워졌으면 경고를 출력하고 이전 템플릿을 계속 씁니다.
+    """
+
+    def __init__(self, directory: str = TEMPLATE_DIR, hot_reload: bool = HOT_RELOAD,
+                 reload_interval: float = RELOAD_INTERVAL):
+        self.directory = directory
+        self.hot_reload = hot_reload
+        self.reload_interval = reload_interval
+        self._templates = {}
+        self._loaded = False
+        self._checked_at = 0.0
+        self._rejected = {}  # 다시 읽지 못한 템플릿 이름 -> 그 파일의 수정 시각 (같은 경고를 반복하지 않도록)
+        self._expected = {}  # 템플릿 이름 -> 호출하는 쪽이 채우는 필드 집합
+        self._gone = set()    # 파일이 지워졌지만 이전 내용을 계속 쓰는 템플릿 (같은 경고를 반복하지 않도록)
+        self._lock = threading.Lock()
+
+    def expect(self, name: str, fields) -> None:
+        """
+        템플릿 name을 쓰는 쪽이 채우는 필드를 등록합니다. 여러 곳에서 같은 템플릿을 쓰면 모두가 채우는 필드만 허용합니다.
+
+        :param name: 템플릿 이름 (prompts/<name>.txt)
+        :param fields: 렌더링할 때 넘기는 필드 이름들
+        """
+        with self._lock:
+            fields = frozenset(fields)
+            self._expected[name] = self._expected[name] & fields if name in self._expected else fields
+
+    def _read(self, name: str) -> Template:
+        """
+        :raises Exception: 형식이 잘못되었거나, 등록된 필드(expect) 밖의 자리표시자가 있는 경우
+        """
+        path = os.path.join(self.directory, f"{name}.txt")
+        template = Template(name, path, load_text(path), os.path.getmtime(path))
+        unknown = template.fields - self._expected.get(name, template.fields)
+        if unknown:
+            raise Exception(f"프롬프트 템플릿에 채워지지 않는 자리표시자가 있습니다: {path} ({', '.join(sorted(unknown))})")
+        return template
+
+    def load_all(self) -> dict:
+        """
+        디렉토리의 모든 템플릿을 읽고 검사합니다.
+
+        :raises Exception: 템플릿 형식이 잘못되었거나, 채워지지 않는 자리표시자가 있거나, 등록된 템플릿이 없는 경우
+        """
+        with self._lock:
+            names = sorted(f[:-4] for f in os.listdir(self.directory) if f.endswith(".txt"))
+            missing = sorted(set(self._expected) - set(names))
+            if missing:
+                raise Exception(f"프롬프트 템플릿을 찾을 수 없습니다: {', '.join(missing)} ({self.directory})")
+            self._templates = {name: self._read(name) for name in names}
+            self._loaded = True
+            self._checked_at = time.monotonic()
+            return dict(self._templates)
+
+    def _reload_changed(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                names = {f[:-4] for f in os.listdir(self.directory) if f.endswith(".txt")}
+            except OSError:
+                return
+            for name in list(self._templates):
+                if name in names:
+                    self._gone.discard(name)
+                elif name not in self._expected:
+                    del self._templates[name]
+                elif name not in self._gone:
+                    # 필요한 템플릿이 지워지면 실행 중인 작업이 실패하지 않도록 이전 템플릿을 유지합니다.
+                    self._gone.add(name)
+                    print(f"⚠️ 프롬프트 템플릿 파일이 없어 이전 템플릿을 계속 씁니다: {self._templates[name].path}",
+                          file=sys.stderr)
+            self._rejected = {name: mtime for name, mtime in self._rejected.items() if name in names}
+            for name in sorted(names):
+                path = os.path.join(self.directory, f"{name}.txt")
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue  # 확인하는 사이에 지워진 경우
+                template = self._templates.get(name)
+                if (template is not None and template.mtime == mtime) or self._rejected.get(name) == mtime:
+                    continue
+                try:
+                    self._templates[name] = self._read(name)
+                    self._rejected.pop(name, None)
+                except Exception as e:
+                    # 편집 중인 잘못된 템플릿 때문에 실행 중인 작업이 실패하지 않도록 이전 템플릿을 유지합니다.
+                    self._rejected[name] = mtime
+                    kept = "이전 템플릿을 계속 씁니다" if template is not None else "추가하지 않습니다"
+                    print(f"⚠️ 프롬프트 템플릿을 다시 읽지 못해 {kept}: {e}", file=sys.stderr)
+
+    def get(self, name: str) -> Template:
+        """
+        :param name: 템플릿 이름 (prompts/<name>.txt)
+        :raises Exception: 템플릿이 없는 경우
+        """
+        if not self._loaded:
+            self.load_all()
+        elif self.hot_reload:
+            self._reload_changed()
+        template = self._templates.get(name)
+        if template is None:
+            raise Exception(f"프롬프트 템플릿을 찾을 수 없습니다: {name}")
+        return template
+
+    def versions(self) -> dict:
+        """템플릿 이름 -> 버전 해시"""
+        if not self._loaded:
+            self.load_all()
+        return {name: template.version for name, template in self._templates.items()}
+
+templates = TemplateRegistry()
@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from typing import Optional
+
+# 모델별 토큰 가격 (USD, 100만 토큰당 입력/출력). 요약표의 비용 추정에만 쓰입니다.
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+# 경로를 지정하면 main.py/batch.py가 --trace 없이도 트레이스를 기록합니다.
+TRACE_PATH = os.getenv("BOOK_REVIEW_TRACE", "")
+
+_current = contextvars.ContextVar("trace_span", default=None)
+
+class Span:
+    """
+    시간 구간 하나 (LLM 호출, 크롤링 요청, 캐시 조회, 파이프라인 단계 등)
+
+    with 블록으로 쓰면 블록 안에서 시작한 구간의 부모가 되며, 블록에서 예외가 나면 error 속성이 붙습니다.
+    attrs에는 토큰 수, 재시도 횟수, 받은 바이트 수, 캐시 적중 여부 같은 값을 기록합니다.
+    """
+
+    __slots__ = ("tracer", "id", "parent", "name", "cat", "attrs", "start", "end", "tid", "_reset")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, attrs: dict):
+        self.tracer = tracer
+        self.id = tracer._next_id()
+        parent = _current.get()
+        self.parent = parent.id if parent is not None else None
+        self.name = name
+        self.cat = cat
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end = None
+        self.tid = threading.get_ident()
+        self._reset = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def add(self, name: str, value: float = 1) -> None:
+        """숫자 속성에 value를 더합니다. (예: 재시도 횟수)"""
+        self.attrs[name] = self.attrs.get(name, 0) + value
+
+    def finish(self) -> None:
+        if self.end is None:
+            self.end = time.perf_counter()
+            self.tracer._finish(self)
+
+    def __enter__(self) -> "Span":
+        self._reset = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.attrs.setdefault("error", exc_type.__name__)
+        _current.reset(self._reset)
+        self.finish()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id, "parent": self.parent, "name": self.name, "cat": self.cat,
+            "start": round(self.start - self.tracer.origin, 6), "dur": round(self.end - self.start, 6),
+            "pid": self.tracer.pid, "tid": self.tid, "attrs": self.attrs,
+        }
+
+class _NoSpan:
+    """트레이스가 꺼져 있을 때 쓰는 아무 일도 하지 않는 구간"""
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def add(self, name: str, value: float = 1) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+NO_SPAN = _NoSpan()
+
+class Tracer:
+    """
+    실행 중의 구간(Span)을 모아 JSONL 또는 Chrome 트레이스 파일로 내보내고 요약표를 만듭니다.
+
+    - 꺼져 있으면(기본) span()이 NO_SPAN을 돌려주므로 계측 코드의 비용은 거의 없습니다.
+    - 부모 구간은 contextvars로 이어지므로 utils.tasks.bind로 넘긴 스레드와 비동기 루프 안의 호출도
+      호출한 단계 아래에 묶입니다.
+    - 내보낸 .json 파일은 chrome://tracing 또는 https://ui.perfetto.dev 에서 열 수 있습니다.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.started_at = time.time()  # origin의 벽시계 시각 (여러 프로세스의 구간을 한 타임라인에 맞출 때 씁니다)
+        self.pid = os.getpid()
+        self._spans = []
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.reset()
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def _next_id(self) -> int:
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def span(self, name: str, cat: str = "", **attrs):
+        """
+        구간을 시작합니다. with 블록으로 쓰거나, 제너레이터처럼 블록으로 감쌀 수 없으면 finish()를 직접 호출합니다.
+
+        :param name: 구간 이름 (요약표에서 cat과 함께 묶는 기준)
+        :param cat: 분류 (llm, crawl, cache, stage, step 등)
+        """
+        if not self.enabled:
+            return NO_SPAN
+        return Span(self, name, cat, attrs)
+
+    def current(self):
+        """지금 실행 흐름의 구간 (없거나 꺼져 있으면 NO_SPAN)"""
+        span = _current.get() if self.enabled else None
+        return span if span is not None else NO_SPAN
+
+    def spans(self) -> list:
+        """끝난 구간들을 딕셔너리 리스트로 반환합니다. (시작 순)"""
+        with self._lock:
+            spans = list(self._spans)
+        return [span.to_dict() for span in sorted(spans, key=lambda s: s.start)]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self.origin = time.perf_counter()
+            self.started_at = time.time()
+            self.pid = os.getpid()
+
+    def export(self, path: str, spans: list = None) -> None:
+        """
+        구간들을 파일로 내보냅니다. 확장자가 .json이면 Chrome 트레이스 형식, 아니면 한 줄에 구간 하나인 JSONL입니다.
+
+        :param spans: 내보낼 구간 (None이면 이 프로세스의 구간, 배치 실행에서는 워커들의 구간을 합쳐 넘깁니다)
+        """
+        spans = self.spans() if spans is None else spans
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                json.dump({"traceEvents": [_chrome_event(span) for span in spans], "displayTimeUnit": "ms"},
+                          f, ensure_ascii=False)
+            else:
+                for span in spans:
+                    f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+
+def _chrome_event(span: dict) -> dict:
+    return {
+        "name": span["name"], "cat": span["cat"] or "default", "ph": "X",
+        "ts": round(span["start"] * 1e6), "dur": round(span["dur"] * 1e6),
+        "pid": span["pid"], "tid": span["tid"], "args": span["attrs"],
+    }
+
+def cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """토큰 사용량의 예상 비용(USD). 가격을 모르는 모델이면 None."""
+    price = MODEL_PRICES.get(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+def summarize(spans: list) -> list:
+    """
+    구간들을 (분류, 이름)별로 묶어 집계합니다.
+
+    :return: 분류·이름·횟수·합계/최대 시간(초)과 토큰·재시도·바이트·캐시 적중 수·비용 합계 딕셔너리 리스트
+    """
+    groups = {}
+    for span in spans:
+        attrs = span["attrs"]
+        entry = groups.setdefault((span["cat"], span["name"]), {
+            "cat": span["cat"], "name": span["name"], "count": 0, "errors": 0, "total": 0.0, "max": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0, "retries": 0, "bytes": 0, "hits": 0, "misses": 0,
+            "cost": 0.0,
+        })
+        entry["count"] += 1
+        entry["errors"] += int("error" in attrs)
+        entry["total"] += span["dur"]
+        entry["max"] = max(entry["max"], span["dur"])
+        for field in ("prompt_tokens", "completion_tokens", "retries", "bytes"):
+            entry[field] += attrs.get(field) or 0
+        if "hit" in attrs:
+            entry["hits" if attrs["hit"] else "misses"] += 1
+        spent = cost(attrs.get("model"), attrs.get("prompt_tokens") or 0, attrs.get("completion_tokens") or 0)
+        entry["cost"] += spent or 0.0
+    return sorted(groups.values(), key=lambda entry: (entry["cat"], -entry["total"]))
+
+def summary_table(spans: list) -> str:
+    """summarize() 결과를 표로 만듭니다."""
+    lines = [f"{'구간(분류/이름)':<34}{'횟수':>6}{'오류':>6}{'합계(초)':>10}{'평균':>8}{'최대':>8}"
+             f"{'입력/출력 토큰':>16}{'재시도':>7}{'적중/실패':>11}{'KB':>8}{'비용($)':>10}"]
+    for entry in summarize(spans):
+        tokens = f"{entry['prompt_tokens']}/{entry['completion_tokens']}" if entry["prompt_tokens"] else "-"
+        cache = f"{entry['hits']}/{entry['misses']}" if entry["hits"] or entry["misses"] else "-"
+        size = f"{entry['bytes'] / 1024:.1f}" if entry["bytes"] else "-"
+        spent = f"{entry['cost']:.4f}" if entry["cost"] else "-"
+        lines.append(
+            f"{entry['cat'] + '/' + entry['name']:<34}{entry['count']:>6}{entry['errors']:>6}"
+            f"{entry['total']:>10.2f}{entry['total'] / entry['count']:>8.2f}{entry['max']:>8.2f}"
+            f"{tokens:>16}{entry['retries'] or '-':>7}{cache:>11}{size:>8}{spent:>10}"
+        )
+    return "\n".join(lines)
+
+tracer = Tracer()
+if TRACE_PATH:
+    tracer.enable()
@@ -0,0 +1,170 @@
+"""
+책 리뷰 작업을 로컬 소켓으로 받아 처리하는 상주 워커 서버
+
+batch.py는 실행할 때마다 워커 프로세스를 새로 띄우고 openai/requests 등을 다시 읽으며 클라이언트·커넥션 풀을
+새로 만듭니다. 이 서버는 미리 데워 둔 워커 프로세스 풀을 계속 유지하므로 책마다 드는 시작 비용이 없습니다.
+
+사용법:
+    python worker_server.py --workers 4 --llm-concurrency 8          # 서버 시작 (Ctrl+C로 종료)
+    python batch.py books.jsonl --server /tmp/book-review-worker.sock  # 작업 보내기
+
+프로토콜: 유닉스 도메인 소켓에 요청 한 줄({"jobs": [...], "output_dir": ..., "book_timeout": ..., "trace": bool})을
+보내면, 책 하나가 끝날 때마다 batch.review_book과 같은 형식의 결과를 한 줄씩(JSON) 돌려주고 연결을 닫습니다.
+"""
+import os
+import sys
+import json
+import socket
+import tempfile
+import argparse
+import multiprocessing
+import socketserver
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import batch
+import llm_client
+
+DEFAULT_SOCKET = os.getenv("BOOK_REVIEW_WORKER_SOCKET",
+                           os.path.join(tempfile.gettempdir(), "book-review-worker.sock"))
+
+def _init_warm_worker(limiter, quiet: bool) -> None:
+    """워커 프로세스 초기화: batch 워커 설정에 더해, 첫 작업에서 할 준비를 미리 해 둡니다."""
+    batch._init_worker(limiter, quiet)
+    import review_crawler
+    from utils.prompt_builder import preload_templates
+    llm_client.warm_up()
+    review_crawler._get_session()
+    preload_templates()
+
+def _ready() -> int:
+    # 모든 워커가 떠서 초기화를 마치도록 시작할 때 워커 수만큼 보냅니다.
+    import time
+    time.sleep(0.2)
+    return os.getpid()
+
+def _review_book(job: dict, output_dir: str, timeout: float, trace: bool) -> dict:
+    # 요청마다 트레이스 기록 여부가 다르므로 작업 단위로 켜고 끕니다.
+    if trace:
+        batch.tracer.enable()
+    else:
+        batch.tracer.disable()
+    return batch.review_book(job, output_dir, timeout)
+
+class WorkerServer:
+    """
+    데워 둔 워커 프로세스 풀과, 작업 요청을 받는 유닉스 소켓 서버
+
+    :param socket_path: 소켓 파일 경로 (이미 있으면 지우고 새로 만듭니다)
+    :param workers: 워커 프로세스 수 (동시에 처리할 책 수)
+    :param llm_concurrency: 모든 워커가 함께 쓰는 최대 동시 LLM 요청 수
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, workers: int = os.cpu_count() or 2,
+                 llm_concurrency: int = llm_client.MAX_CONCURRENCY, quiet: bool = True):
+        self.socket_path = socket_path
+        self.workers = workers
+        self.llm_concurrency = llm_concurrency
+        self.quiet = quiet
+        self._executor = None
+        self._server = None
+
+    def start(self) -> "WorkerServer":
+        batch.preload_for_workers()
+        ctx = multiprocessing.get_context()
+        limiter = ctx.BoundedSemaphore(self.llm_concurrency)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                             initializer=_init_warm_worker, initargs=(limiter, self.quiet))
+        pids = {future.result() for future in [self._executor.submit(_ready) for _ in range(self.workers)]}
+        print(f"🔥 워커 {len(pids)}개 준비 완료 (LLM 동시 요청 {self.llm_concurrency}개)")
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, self._make_handler())
+        self._server.daemon_threads = True
+        return self
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                request = json.loads(self.rfile.readline() or b"{}")
+                jobs = request.get("jobs") or []
+                futures = {
+                    server._executor.submit(_review_book, job, request["output_dir"], request.get("book_timeout"),
+                                            bool(request.get("trace"))): job
+                    for job in jobs
+                }
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:  # 워커 프로세스가 죽은 경우 등
+                        job = futures[future]
+                        result = {"title": job.get("title"), "author": job.get("author"), "timings": {},
+                                  "path": None, "error": f"워커 오류: {e}", "elapsed": 0.0}
+                    self.wfile.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+        return Handler
+
+    def serve_forever(self) -> None:
+        print(f"📮 작업 대기 중: {self.socket_path}")
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> "WorkerServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+def submit(socket_path: str, jobs: list, output_dir: str, book_timeout: float = None, trace: bool = False):
+    """
+    실행 중인 워커 서버에 작업을 보내고, 책이 끝나는 대로 결과를 yield 합니다.
+
+    :raises Exception: 서버에 연결할 수 없는 경우
+    """
+    request = {"jobs": jobs, "output_dir": os.path.abspath(output_dir), "book_timeout": book_timeout, "trace": trace}
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError as e:
+        sock.close()
+        raise Exception(f"워커 서버에 연결할 수 없습니다: {socket_path} ({e})")
+    with sock, sock.makefile("rb") as reader:
+        sock.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        for line in reader:
+            yield json.loads(line)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="책 리뷰 작업을 로컬 소켓으로 받아 처리하는 상주 워커 서버")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="유닉스 소켓 경로")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="워커 프로세스 수")
+    parser.add_argument("--llm-concurrency", type=int, default=llm_client.MAX_CONCURRENCY,
+                        help="모든 워커가 함께 쓰는 최대 동시 LLM 요청 수")
+    parser.add_argument("--verbose", action="store_true", help="워커의 단계별 출력을 숨기지 않습니다.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        llm_client.check_api_key()
+    except EnvironmentError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    server = WorkerServer(args.socket, args.workers, args.llm_concurrency, quiet=not args.verbose)
+    try:
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n워커 서버를 종료합니다.")
+
+if __name__ == "__main__":
+    main()